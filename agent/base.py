@@ -1,16 +1,26 @@
+from __future__ import annotations
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
 
 from ui.model.heuristic_type import HeuristicType
+from ui.debug import Debug, DebugType
 from core.board import Board
 from core.color import Color
 from core.move import Move
 
+if TYPE_CHECKING:
+    from store.opening_book import OpeningBook
+    from store.position_db import PositionDB
+
 
 class BaseAgent(ABC):
     """
     An abstract class for an Abalone agent.
     """
 
+    _opening_book = None
+    _position_db = None
+
     @property
     @abstractmethod
     def is_searching(self) -> bool:
@@ -46,6 +56,21 @@ class BaseAgent(ABC):
         :param heuristic_type: The heuristic type.
         """
 
+    @abstractmethod
+    def set_depth_limit(self, depth: int):
+        """
+        Sets the maximum depth to be searched.
+        :param depth: The depth limit in plies.
+        """
+
+    @property
+    def node_count(self) -> int:
+        """
+        Gets the total number of nodes searched by the agent since it was created.
+        Agents that do not count nodes report 0.
+        """
+        return 0
+
     def apply_move(self, move: Move):
         """
         Enables the agent to respond when a move is determined during search.
@@ -53,3 +78,74 @@ class BaseAgent(ABC):
         """
         # stops search by default if a move is applied
         self.stop()
+
+    def close(self):
+        """
+        Releases the resources held by the agent, such as worker processes.
+        The agent must not be used after it is closed.
+        """
+        self.stop()
+
+    def set_symmetric_hashing(self, symmetric: bool):
+        """
+        Sets whether or not the agent's tables share entries between symmetric images of a board.
+        Agents without such tables ignore it.
+        :param symmetric: a bool
+        """
+
+    def set_batch_leaves(self, batch_leaves: bool):
+        """
+        Sets whether or not the agent's search evaluates the leaves of a node in one batch.
+        Agents without batched evaluation ignore it.
+        :param batch_leaves: a bool
+        """
+
+    def set_opening_book(self, opening_book: OpeningBook):
+        """
+        Sets the opening book to play from before probing the position database or searching.
+        :param opening_book: an OpeningBook, else None
+        """
+        self._opening_book = opening_book
+
+    def set_position_db(self, position_db: PositionDB):
+        """
+        Sets the position database to probe at the root before searching.
+        :param position_db: a PositionDB, else None
+        """
+        self._position_db = position_db
+
+    def probe_root(self, board: Board, player: Color) -> Move:
+        """
+        Looks up a book move or the best known move of the root position, so that it need not be searched.
+        :param board: a Board
+        :param player: the Color to move
+        :return: a Move, else None
+        """
+        if self._opening_book is not None:
+            move = self._opening_book.probe(board, player)
+            if move:
+                Debug.log(f"opening book hit -> {move}", DebugType.Agent)
+                return move
+
+        if self._position_db is None:
+            return None
+
+        entry = self._position_db.probe(board, player)
+        move = entry.get_best_move() if entry else None
+        if move:
+            Debug.log(f"position database hit -> {move} (depth {entry.depth})", DebugType.Agent)
+        return move
+
+    def _answer_without_search(self, board: Board, player: Color, on_find: callable, on_complete: callable) -> bool:
+        """
+        Answers a search from the opening book or the position database if either knows the root position.
+        :return: a bool denoting whether the search was answered
+        """
+        move = self.probe_root(board, player)
+        if not move:
+            return False
+
+        on_find(move)
+        if on_complete:
+            on_complete()
+        return True
@@ -2,6 +2,7 @@ from threading import Thread
 
 from agent.base import BaseAgent
 from agent.brandon.search import Search
+from agent.profiler import SearchProfiler
 from core.board import Board
 from core.color import Color
 from ui.model.heuristic_type import HeuristicType
@@ -16,7 +17,8 @@ def search_worker(search, board, color, on_find, on_complete):
     :param on_find: a Callable[Move]
     :param on_complete: a Callable
     """
-    search.start(board, color, on_find=on_find)
+    with SearchProfiler.profile("brandon"):
+        search.start(board, color, on_find=on_find)
     on_complete()
 
 
@@ -34,6 +36,8 @@ class BrandonAgent(BaseAgent):
         return self._thread is not None and self._thread.is_alive()
 
     def start(self, board: Board, player: Color, on_find: callable, on_complete: callable):
+        if self._answer_without_search(board, player, on_find, on_complete):
+            return
         thread = Thread(target=search_worker, args=(self._search, board, player, on_find, on_complete))
         thread.daemon = True
         thread.start()
@@ -47,3 +51,16 @@ class BrandonAgent(BaseAgent):
 
     def set_heuristic_type(self, heuristic_type: HeuristicType):
         self._search.heuristic = heuristic_type
+
+    def set_depth_limit(self, depth: int):
+        self._search.depth = depth
+
+    def set_symmetric_hashing(self, symmetric: bool):
+        self._search.symmetric = symmetric
+
+    def set_batch_leaves(self, batch_leaves: bool):
+        self._search.batch_leaves = batch_leaves
+
+    @property
+    def node_count(self):
+        return self._search.node_count
@@ -8,8 +8,9 @@ from threading import Thread
 
 from agent.ponderer import PonderingAgent
 from agent.brandon.search import Search
+from agent.profiler import SearchProfiler
 from agent.state_generator import StateGenerator
-from agent.zobrist import Zobrist
+from agent.heuristics.batch import encode_moves
 from core.board import Board
 from core.color import Color
 from core.move import Move
@@ -27,15 +28,16 @@ def search_worker(search, board, color, on_find, on_complete):
     :param on_find: a Callable[Move]
     :param on_complete: a Callable
     """
-    search.start(board, color, on_find=on_find)
+    with SearchProfiler.profile("ponderer"):
+        search.start(board, color, on_find=on_find)
     on_complete()
 
-def ponder_worker(search, refutation_table, board, color, on_find, on_complete):
+def ponder_worker(search, set_refutation_move, board, color, on_find, on_complete):
     """
     Manages the pondering search task.
     Caches a defined number of refutations for each opponent move.
     :param search: a Search instance
-    :param refutation_table: a dict[Board, Move]
+    :param set_refutation_move: a Callable[Board, Move] caching the refutation of a board
     :param board: a Board
     :param color: a Color
     :param on_find: a Callable[Move, Move] mapping predictions to refutations
@@ -56,7 +58,12 @@ def ponder_worker(search, refutation_table, board, color, on_find, on_complete):
 
     # find x amount of most likely moves (ordered by heuristic)
     opponent_moves = StateGenerator.enumerate_board(board, color)
-    opponent_moves.sort(key=find_move_score, reverse=True)
+    if search.batch_leaves:
+        move_scores = search.heuristic.call_batch(encode_moves(board, opponent_moves, temp_board), color, board)
+        opponent_moves = [move for _, move in sorted(zip(move_scores, opponent_moves),
+                                                     key=lambda item: item[0], reverse=True)]
+    else:
+        opponent_moves.sort(key=find_move_score, reverse=True)
 
     if NUM_PREDICTIONS != inf:
         opponent_moves = opponent_moves[:NUM_PREDICTIONS]
@@ -74,8 +81,7 @@ def ponder_worker(search, refutation_table, board, color, on_find, on_complete):
         exhausted = search.start(temp_board, Color.next(color), on_find=set_best_move)
         if exhausted and best_move:
             Debug.log(f"set refutation for {opponent_move} -> {best_move}", DebugType.Agent)
-            opponent_hash = Zobrist.create_board_hash(temp_board)
-            refutation_table[opponent_hash] = best_move
+            set_refutation_move(temp_board, best_move)
             if on_find:
                 on_find(opponent_move, best_move)
 
@@ -117,7 +123,7 @@ class BrandonPonderer(PonderingAgent):
                                      on_find: callable, on_complete: callable):
         return Thread(target=ponder_worker, args=(
             self._search,
-            self._refutation_table,
+            self.set_refutation_move,
             board,
             player,
             on_find,
@@ -130,6 +136,8 @@ class BrandonPonderer(PonderingAgent):
         self._thread = thread
 
     def start(self, board: Board, player: Color, on_find: callable, on_complete: callable):
+        if self._answer_without_search(board, player, on_find, on_complete):
+            return
         thread = self._create_normal_search_thread(board, player, on_find, on_complete)
         self._search_mode = self.SearchMode.NORMAL_SEARCH
         self._start_search(thread)
@@ -153,3 +161,17 @@ class BrandonPonderer(PonderingAgent):
 
     def set_heuristic_type(self, heuristic_type: HeuristicType):
         self._search.heuristic = heuristic_type
+
+    def set_depth_limit(self, depth: int):
+        self._search.depth = depth
+
+    def set_symmetric_hashing(self, symmetric: bool):
+        super().set_symmetric_hashing(symmetric)
+        self._search.symmetric = symmetric
+
+    def set_batch_leaves(self, batch_leaves: bool):
+        self._search.batch_leaves = batch_leaves
+
+    @property
+    def node_count(self):
+        return self._search.node_count
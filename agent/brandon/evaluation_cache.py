@@ -0,0 +1,94 @@
+"""
+Defines a fixed-size cache of leaf evaluations keyed by Zobrist hash.
+"""
+
+from array import array
+from random import getrandbits
+
+from agent.zobrist.setup import ZOBRIST_BITS
+
+
+class EvaluationCache:
+    """
+    A fixed-size, array-backed cache mapping board hashes to heuristic values.
+    Uses an always-replace policy: each key maps to a single slot and a store
+    overwrites whatever occupied it.
+
+    Keys are board hashes salted by a random mask per heuristic id, so that the
+    same board evaluated by different heuristics or players never shares an
+    entry. Caches are cleared rather than salted when weights change, as the
+    entries of past weights are never read again. Empty slots hold the key 0 and may report a false hit for
+    a key of exactly 0, which is as likely as any other Zobrist collision.
+    """
+
+    DEFAULT_SIZE_BITS = 18
+
+    def __init__(self, size_bits: int = DEFAULT_SIZE_BITS):
+        """
+        :param size_bits: the log2 of the number of cache slots
+        """
+        size = 1 << size_bits
+        self._mask = size - 1
+        self._keys = array("Q", bytes(8 * size))
+        self._scores = array("d", bytes(8 * size))
+        self._salts = {}
+        self.num_reads = 0
+        self.num_hits = 0
+
+    def __len__(self):
+        """
+        Determines the number of slots in the cache.
+        :return: an int
+        """
+        return len(self._keys)
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Gets the ratio of probes that hit the cache.
+        :return: a float between 0 and 1
+        """
+        return self.num_hits / (self.num_reads or 1)
+
+    def get_salt(self, heuristic_id) -> int:
+        """
+        Gets the key salt for the given heuristic id, creating one if needed.
+        :param heuristic_id: a hashable identifying a heuristic evaluation function
+        :return: an int to XOR board hashes with
+        """
+        if heuristic_id not in self._salts:
+            self._salts[heuristic_id] = getrandbits(ZOBRIST_BITS)
+        return self._salts[heuristic_id]
+
+    def probe(self, key: int):
+        """
+        Looks up the evaluation stored for the given salted key.
+        :param key: a board hash XOR a heuristic salt
+        :return: the cached heuristic value, else None
+        """
+        self.num_reads += 1
+        index = key & self._mask
+        if self._keys[index] != key:
+            return None
+        self.num_hits += 1
+        return self._scores[index]
+
+    def store(self, key: int, score: float):
+        """
+        Stores an evaluation for the given salted key, replacing the slot's previous entry.
+        :param key: a board hash XOR a heuristic salt
+        :param score: the heuristic value
+        """
+        index = key & self._mask
+        self._keys[index] = key
+        self._scores[index] = score
+
+    def clear(self):
+        """
+        Empties the cache and resets its statistics.
+        """
+        size = len(self._keys)
+        self._keys = array("Q", bytes(8 * size))
+        self._scores = array("d", bytes(8 * size))
+        self.num_reads = 0
+        self.num_hits = 0
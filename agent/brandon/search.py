@@ -5,11 +5,16 @@ Defines common search logic for Brandon's agent.
 from math import inf
 from time import time, sleep
 from copy import deepcopy
+from dataclasses import replace
 from core.board import Board
 from core.color import Color
 from agent.zobrist import Zobrist
+from agent.zobrist.symmetry import LANE_MASK, get_canonical_hash, invert_symmetry, transform_move
 from agent.brandon.transposition_table import TranspositionTable
+from agent.brandon.evaluation_cache import EvaluationCache
+from agent.search_stats import SearchStats
 from agent.state_generator import StateGenerator
+from agent.heuristics.batch import BATCH_AVAILABLE, encode_moves
 from ui.constants import FPS
 from ui.debug import Debug
 
@@ -19,6 +24,8 @@ class Search:
     An interface around Abalone search logic.
     """
 
+    DEFAULT_DEPTH = 2
+
     @staticmethod
     def _estimate_move_score(board, move):
         WEIGHT_SUMITO = 10 # consider sumitos first
@@ -46,17 +53,97 @@ class Search:
 
         return sorted(moves, key=lambda move: cls._estimate_move_score(board, move), reverse=True)
 
-    def __init__(self):
+    def __init__(self, batch_leaves: bool = False, symmetric: bool = False):
+        """
+        :param batch_leaves: whether or not to evaluate the children of frontier nodes in one batch;
+                             requires NumPy and forgoes leaf pruning and transposition table probes
+        :param symmetric: whether or not symmetric images of a board share transposition table entries
+        """
         self.heuristic = None
+        self.depth = self.DEFAULT_DEPTH
+        self.current_depth = 0
+        self._batch_leaves = False
+        self.batch_leaves = batch_leaves
+        self.best_score = -inf
         self._stopped = False
         self._paused = False
         self._transposition_table = {}
+        self._evaluation_cache = EvaluationCache()
+        self._evaluation_salt = 0
+        self._table_salt = 0
+        self._weights = None
+        self._symmetric = False
+        self._create_hash = Zobrist.create_board_hash
+        self._update_hash = Zobrist.update_board_hash
+        self.symmetric = symmetric
         self.__debug_num_tt_reads = 0
         self.__debug_num_tt_hits = 0
         self.__debug_num_nodes_enumerated = 0
         self.__debug_num_nodes_pruned = 0
         self.__debug_num_plies_expanded = 0
 
+    @property
+    def node_count(self):
+        """
+        Gets the total number of nodes enumerated by the search since it was created.
+        :return: an int
+        """
+        return self.__debug_num_nodes_enumerated
+
+    @property
+    def stats(self) -> SearchStats:
+        """
+        Gets the statistics of the search since it was created.
+        :return: a SearchStats
+        """
+        return SearchStats(
+            num_nodes=self.__debug_num_nodes_enumerated,
+            num_nodes_pruned=self.__debug_num_nodes_pruned,
+            num_plies_expanded=self.__debug_num_plies_expanded,
+            num_tt_reads=self.__debug_num_tt_reads,
+            num_tt_hits=self.__debug_num_tt_hits,
+        )
+
+    @property
+    def symmetric(self):
+        """
+        Gets whether or not symmetric images of a board share transposition table entries.
+        :return: a bool
+        """
+        return self._symmetric
+
+    @symmetric.setter
+    def symmetric(self, symmetric: bool):
+        """
+        Sets whether or not symmetric images of a board share transposition table entries.
+        Boards are then hashed by the wide hashes of their 12 images and keyed by the least of them,
+        and their best moves are stored in the frame of that image.
+        Clears the transposition table if the setting changes, as its keys change with it.
+        :param symmetric: a bool
+        """
+        if symmetric != self._symmetric:
+            self._transposition_table.clear()
+        self._symmetric = symmetric
+        self._create_hash = Zobrist.create_symmetric_board_hash if symmetric else Zobrist.create_board_hash
+        self._update_hash = Zobrist.update_symmetric_board_hash if symmetric else Zobrist.update_board_hash
+
+    @property
+    def batch_leaves(self):
+        """
+        Gets whether or not the children of frontier nodes are evaluated in one batch.
+        :return: a bool
+        """
+        return self._batch_leaves
+
+    @batch_leaves.setter
+    def batch_leaves(self, batch_leaves: bool):
+        """
+        Sets whether or not the children of frontier nodes are evaluated in one batch.
+        Batching stays off without NumPy.
+        :param batch_leaves: a bool
+        """
+        self._batch_leaves = batch_leaves and BATCH_AVAILABLE
+
     @property
     def stopped(self):
         """
@@ -65,14 +152,27 @@ class Search:
         """
         return self._stopped
 
-    def start(self, board: Board, color: Color, depth: int = 2, on_find: callable = None):
+    def start(self, board: Board, color: Color, depth: int = None, on_find: callable = None, moves: list = None):
         """
         Starts the search.
+        :param depth: the depth to search to, else the search's depth
+        :param moves: the root Moves to search, else all legal moves
         :return: a bool denoting whether the search was completed or not
         """
+        depth = depth or self.depth
+        self.best_score = -inf
         self._stopped = False
+        weights = tuple(self.heuristic.get_weights().items())
+        if weights != self._weights:
+            # entries scored with other weights would never be read again, so they only hold memory
+            self._transposition_table.clear()
+            self._evaluation_cache.clear()
+            self._weights = weights
+        # scores depend on the root player through the heuristic, so each keys its own entries
+        self._evaluation_salt = self._evaluation_cache.get_salt((self.heuristic, color))
+        self._table_salt = self._evaluation_salt
         try:
-            self._search(board, color, depth, on_find)
+            self._search(board, color, depth, on_find, moves)
             exhausted = True
         except StopIteration:
             exhausted = False
@@ -80,6 +180,38 @@ class Search:
         self.__print_debug_report(exhausted)
         return exhausted
 
+    def get_principal_variation(self, board: Board, color: Color, move, max_length: int) -> list:
+        """
+        Follows the best moves stored in the transposition table from a root move.
+        Reads the entries of the last search, so the root color should be the color it searched for.
+        The variation ends at the first board without a stored move that is legal for its player.
+        :param board: the root Board
+        :param color: the Color to move at the root
+        :param move: the root Move
+        :param max_length: the maximum number of moves in the variation
+        :return: a list of Moves starting with the root move
+        """
+        variation = [move]
+        board = deepcopy(board)
+        board_hash = self._create_hash(board)
+        while len(variation) < max_length:
+            board_hash = self._update_hash(board_hash, board, move)
+            board.apply_move(move)
+            color = Color.next(color)
+
+            symmetry = 0
+            table_hash = board_hash
+            if self._symmetric:
+                table_hash, symmetry = get_canonical_hash(board_hash)
+            cached_entry = self._transposition_table.get(table_hash ^ self._table_salt)
+            move = cached_entry.move if cached_entry else None
+            if move and symmetry:
+                move = transform_move(move, invert_symmetry(symmetry))
+            if not move or not board.is_valid_move(move, color):
+                break
+            variation.append(move)
+        return variation
+
     def stop(self):
         """
         Stops the search.
@@ -93,29 +225,44 @@ class Search:
         """
         self._paused = not self._paused
 
-    def _search(self, board: Board, color: Color, depth: int, on_find: callable = None):
+    def _search(self, board: Board, color: Color, depth: int, on_find: callable = None, moves: list = None):
         if self._is_quiescent(board) and depth > 1:
-            return self._search(board, color, depth=1, on_find=on_find)
+            return self._search(board, color, depth=1, on_find=on_find, moves=moves)
 
-        moves = StateGenerator.enumerate_board(board, color)
+        moves = list(moves) if moves else StateGenerator.enumerate_board(board, color)
         self.__debug_num_nodes_enumerated += len(moves)
 
-        root_hash = Zobrist.create_board_hash(board)
+        root_hash = self._create_hash(board)
         best_move = None
         temp_board = deepcopy(board)
 
         for d in range(1, depth + 1):
             time_start = time()
             alpha = -inf
+            self.current_depth = d
             self.__debug_num_plies_expanded += 1
 
             moves = self._order_moves(board, moves, best_move)
             is_first_move = True
 
+            if d == 1 and self.batch_leaves:
+                move_scores = self._evaluate_moves(board, temp_board, moves, color, perspective=1)
+                for move, move_score in zip(moves, move_scores):
+                    if move_score > alpha:
+                        alpha = move_score
+                        best_move = move
+                        self.best_score = move_score
+                        if on_find:
+                            on_find(move)
+                        Debug.log(f"new best move {move}/{move_score:.2f}")
+
+                Debug.log(f"complete search at depth {d} in {time() - time_start:.2f}s")
+                continue
+
             for move in moves:
                 self._handle_interrupts()
                 temp_board.apply_move(move)
-                move_hash = Zobrist.update_board_hash(root_hash, board, move)
+                move_hash = self._update_hash(root_hash, board, move)
 
                 move_score = -self._negascout(
                     board=temp_board,
@@ -131,6 +278,7 @@ class Search:
                 if move_score > alpha:
                     alpha = move_score
                     best_move = move
+                    self.best_score = move_score
                     if on_find:
                         on_find(move)
                     Debug.log(f"new best move {move}/{move_score:.2f}")
@@ -153,13 +301,9 @@ class Search:
     def _negamax(self, board, board_hash, color, depth, alpha, beta, perspective):
         self._handle_interrupts()
 
-        self.__debug_num_tt_reads += 1
-        cached_entry = (self._transposition_table[board_hash]
-            if board_hash in self._transposition_table
-            else None)
-
-        if cached_entry:
-            self.__debug_num_tt_hits += 1
+        cached_entry = self._probe_transposition_table(board_hash)
+        # entries from shallower searches only order moves, as their scores do not bound this one
+        if cached_entry and cached_entry.depth >= depth:
             if cached_entry.type == TranspositionTable.EntryType.PV:
                 return cached_entry.score
             elif cached_entry.type == TranspositionTable.EntryType.CUT:
@@ -171,7 +315,7 @@ class Search:
                 return cached_entry.score
 
         if depth == 0:
-            return self.heuristic.call(board, color) * perspective
+            return self._evaluate(board, board_hash, color) * perspective
 
         alpha_old = alpha
         best_score = -inf
@@ -184,34 +328,68 @@ class Search:
         self.__debug_num_nodes_enumerated += len(moves)
         self.__debug_num_plies_expanded += 1
 
-        is_first_move = True
-        for move in moves:
-            temp_board.apply_move(move)
-            move_hash = Zobrist.update_board_hash(board_hash, board, move)
-
-            move_score = -self._negascout(
-                board=temp_board,
-                board_hash=move_hash,
-                color=color,
-                depth=depth - 1,
-                alpha=alpha,
-                beta=beta,
-                perspective=-perspective,
-                is_pv=is_first_move
-            )
+        if depth == 1 and self.batch_leaves:
+            best_score, best_move = self._negamax_frontier(board, temp_board, moves, color,
+                                                           alpha, beta, perspective)
+        else:
+            is_first_move = True
+            for move in moves:
+                temp_board.apply_move(move)
+                move_hash = self._update_hash(board_hash, board, move)
 
-            if move_score > best_score:
-                best_score = move_score
-                best_move = move
+                move_score = -self._negascout(
+                    board=temp_board,
+                    board_hash=move_hash,
+                    color=color,
+                    depth=depth - 1,
+                    alpha=alpha,
+                    beta=beta,
+                    perspective=-perspective,
+                    is_pv=is_first_move
+                )
 
-            alpha = max(alpha, best_score)
-            if alpha >= beta:
-                self.__debug_num_nodes_pruned += len(moves) - moves.index(move) - 1
-                break
+                if move_score > best_score:
+                    best_score = move_score
+                    best_move = move
 
-            temp_board.copy_state(board)
-            is_first_move = False
+                alpha = max(alpha, best_score)
+                if alpha >= beta:
+                    self.__debug_num_nodes_pruned += len(moves) - moves.index(move) - 1
+                    break
 
+                temp_board.copy_state(board)
+                is_first_move = False
+
+        self._store_transposition_table(board_hash, best_score, best_move, depth, alpha_old, beta)
+        return best_score
+
+    def _probe_transposition_table(self, board_hash):
+        """
+        Looks up the transposition table entry of a board.
+        :return: a TranspositionTable.Entry, else None
+        """
+        self.__debug_num_tt_reads += 1
+        symmetry = 0
+        if self._symmetric:
+            board_hash, symmetry = get_canonical_hash(board_hash)
+
+        cached_entry = self._transposition_table.get(board_hash ^ self._table_salt)
+        if cached_entry:
+            self.__debug_num_tt_hits += 1
+            if symmetry and cached_entry.move:
+                cached_entry = replace(cached_entry, move=transform_move(cached_entry.move, invert_symmetry(symmetry)))
+        return cached_entry
+
+    def _store_transposition_table(self, board_hash, best_score, best_move, depth, alpha, beta):
+        """
+        Stores the result of a node search in the transposition table, typed by the node's original window.
+        """
+        if self._symmetric:
+            board_hash, symmetry = get_canonical_hash(board_hash)
+            if symmetry and best_move:
+                best_move = transform_move(best_move, symmetry)
+
+        board_hash ^= self._table_salt
         if board_hash in self._transposition_table:
             cached_entry = self._transposition_table[board_hash]
         else:
@@ -222,14 +400,56 @@ class Search:
         cached_entry.move = best_move
         cached_entry.depth = depth
 
-        if best_score <= alpha_old:
+        if best_score <= alpha:
             cached_entry.type = TranspositionTable.EntryType.ALL
         elif best_score >= beta:
             cached_entry.type = TranspositionTable.EntryType.CUT
         else:
             cached_entry.type = TranspositionTable.EntryType.PV
 
-        return best_score
+    def _evaluate(self, board, board_hash, color):
+        """
+        Evaluates a leaf board, reusing cached evaluations of transpositions.
+        :return: the heuristic value of the board for the given color
+        """
+        if self._symmetric:
+            board_hash &= LANE_MASK
+        key = board_hash ^ self._evaluation_salt
+        score = self._evaluation_cache.probe(key)
+        if score is None:
+            score = self.heuristic.call(board, color)
+            self._evaluation_cache.store(key, score)
+        return score
+
+    def _evaluate_moves(self, board, temp_board, moves, color, perspective):
+        """
+        Evaluates the children of a board in one batch.
+        :param temp_board: a scratch Board in the same state as `board`
+        :return: the move scores from the perspective of the node's player
+        """
+        self._handle_interrupts()
+        encoded = encode_moves(board, moves, temp_board)
+        return self.heuristic.call_batch(encoded, color, board) * perspective
+
+    def _negamax_frontier(self, board, temp_board, moves, color, alpha, beta, perspective):
+        """
+        Expands the last ply of a depth 1 node, evaluating all of its children at once.
+        :return: a tuple of (best score, best move)
+        """
+        best_score = -inf
+        best_move = None
+        move_scores = self._evaluate_moves(board, temp_board, moves, color, perspective)
+        for i, (move, move_score) in enumerate(zip(moves, move_scores)):
+            if move_score > best_score:
+                best_score = move_score
+                best_move = move
+
+            alpha = max(alpha, best_score)
+            if alpha >= beta:
+                self.__debug_num_nodes_pruned += len(moves) - i - 1
+                break
+
+        return best_score, best_move
 
     def _handle_interrupts(self):
         while self._paused:
@@ -241,20 +461,19 @@ class Search:
     def __print_debug_report(self, exhausted):
         Debug.log(f"search result: {'exhausted' if exhausted else 'interrupted'}")
 
-        prune_rate = self.__debug_num_nodes_pruned / (self.__debug_num_nodes_enumerated or 1)
-        prune_percent = prune_rate * 100
-        Debug.log(f"nodes enumerated: {self.__debug_num_nodes_enumerated}")
-        Debug.log(f"nodes pruned: {self.__debug_num_nodes_pruned} ({prune_percent:.2f}%)")
+        stats = self.stats
+        Debug.log(f"nodes enumerated: {stats.num_nodes}")
+        Debug.log(f"nodes pruned: {stats.num_nodes_pruned} ({stats.prune_rate * 100:.2f}%)")
 
-        tt_hit_rate = self.__debug_num_tt_hits / (self.__debug_num_tt_reads or 1)
-        tt_hit_percent = tt_hit_rate * 100
         Debug.log(f"transposition table size: {len(self._transposition_table)} nodes")
         Debug.log(f"transposition table hit rate:"
-            f" {self.__debug_num_tt_hits}/{self.__debug_num_tt_reads}"
-            f" ({tt_hit_percent:.2f}%)")
+            f" {stats.num_tt_hits}/{stats.num_tt_reads}"
+            f" ({stats.tt_hit_rate * 100:.2f}%)")
+
+        eval_cache = self._evaluation_cache
+        Debug.log(f"evaluation cache hit rate:"
+            f" {eval_cache.num_hits}/{eval_cache.num_reads}"
+            f" ({eval_cache.hit_rate * 100:.2f}%)")
 
-        num_nodes_explored = self.__debug_num_nodes_enumerated - self.__debug_num_nodes_pruned
-        branching_factor = self.__debug_num_nodes_enumerated / self.__debug_num_plies_expanded
-        effective_branching_factor = num_nodes_explored / self.__debug_num_plies_expanded
         Debug.log("effective branching factor: "
-                  f"{effective_branching_factor:.2f}/{branching_factor:.2f}")
+                  f"{stats.effective_branching_factor:.2f}/{stats.branching_factor:.2f}")
@@ -27,6 +27,8 @@ class DefaultAgent(BaseAgent):
         :param on_find: A function that gets called everytime a better move is found.
         :param on_complete: A function that gets called when a search runs to exhaustion without interruption.
         """
+        if self._answer_without_search(board, player, on_find, on_complete):
+            return
         self._launch_thread(board, player, on_find, on_complete)
 
     def toggle_paused(self):
@@ -39,6 +41,24 @@ class DefaultAgent(BaseAgent):
         """
         self._search.set_heuristic_type(heuristic_type)
 
+    def set_depth_limit(self, depth: int):
+        """
+        Sets the maximum depth to be searched.
+        :param depth: The depth limit in plies.
+        """
+        self._search.depth_limit = depth
+
+    def set_batch_leaves(self, batch_leaves: bool):
+        """
+        Sets whether or not the search evaluates the leaves of a node in one batch.
+        :param batch_leaves: a bool
+        """
+        self._search.batch_leaves = batch_leaves
+
+    @property
+    def node_count(self):
+        return self._search.total_node_count
+
     def stop(self):
         """
         Force the search to stop.
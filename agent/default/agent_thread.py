@@ -1,3 +1,4 @@
+from agent.profiler import SearchProfiler
 from ui.constants import FPS
 import threading
 
@@ -30,7 +31,8 @@ class AgentThread(threading.Thread):
         Calls on_complete() after if search not interrupted.
         """
         self.running = True
-        self.search.alpha_beta(self.board, self.player, self.on_find)
+        with SearchProfiler.profile("default"):
+            self.search.alpha_beta(self.board, self.player, self.on_find)
         self.running = False
 
         if not self.search.interrupt:
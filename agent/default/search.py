@@ -2,7 +2,9 @@ import math
 from time import sleep
 
 from agent.state_generator import StateGenerator
+from agent.heuristics.batch import BATCH_AVAILABLE, encode_boards
 from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.search_stats import SearchStats
 from ui.model.heuristic_type import HeuristicType
 from core.board import Board
 from core.color import Color
@@ -16,13 +18,38 @@ class Search:
     MIN = -math.inf
     MAX = math.inf
 
-    def __init__(self):
+    def __init__(self, batch_leaves: bool = False):
+        """
+        :param batch_leaves: whether or not to evaluate leaf boards in one batch per node (requires NumPy)
+        """
+        self._batch_leaves = False
+        self.batch_leaves = batch_leaves
         self.interrupt = False
         self.paused = False
         self.prune_count = 0
         self.node_count = 0
         self.heuristic_type = None
         self.on_find = None
+        self.depth_limit = self.DEPTH_LIMIT
+        self.total_node_count = 0
+        self.stats = SearchStats()
+
+    @property
+    def batch_leaves(self):
+        """
+        Gets whether or not leaf boards are evaluated in one batch per node.
+        :return: a bool
+        """
+        return self._batch_leaves
+
+    @batch_leaves.setter
+    def batch_leaves(self, batch_leaves: bool):
+        """
+        Sets whether or not leaf boards are evaluated in one batch per node.
+        Batching stays off without NumPy.
+        :param batch_leaves: a bool
+        """
+        self._batch_leaves = batch_leaves and BATCH_AVAILABLE
 
     def set_heuristic_type(self, heuristic_type: HeuristicType):
         """
@@ -34,6 +61,30 @@ class Search:
     def _get_heuristic(self, board: Board, player: Color):
         return self.heuristic_type.call(board, player)
 
+    def _handle_interrupts(self):
+        """
+        Waits while the search is paused, then stops it if interrupted.
+        :raise TimeoutException: if the search is interrupted
+        """
+        while self.paused and not self.interrupt:
+            sleep(1 / ui.constants.FPS)
+
+        if self.interrupt:
+            raise TimeoutException()
+
+    def _get_leaf_heuristics(self, board: Board, boards: list[Board], player: Color, depth: int):
+        """
+        Evaluates all child boards of a node in one batch if they are leaves and batching is enabled.
+        :return: a sequence of heuristics for each child board, else None
+        """
+        if not self.batch_leaves or depth > 1:
+            return None
+
+        # the children skip their own interrupt checks, so check once for the batch
+        self._handle_interrupts()
+        self.node_count += len(boards)
+        return self.heuristic_type.call_batch(encode_boards(boards), player, board)
+
     def alpha_beta(self, board: Board, player: Color, on_find: callable):
         """
         Search to find the best moves using minimax with alpha-beta pruning.
@@ -48,10 +99,12 @@ class Search:
         result = "Exhausted"
         try:
             self._alpha_beta_max(board, player, self.MIN, self.MAX,
-                                 self.DEPTH_LIMIT, self.DEPTH_LIMIT)
+                                 self.depth_limit, self.depth_limit)
         except TimeoutException:
             result = "Timeout"
 
+        self.total_node_count += self.node_count
+
         Debug.log(F"Result: {result}", DebugType.Agent)
         Debug.log(F"Heuristic: {self.heuristic_type.value}", DebugType.Agent)
         Debug.log(F"Branches Pruned: {self.prune_count}", DebugType.Agent)
@@ -65,11 +118,7 @@ class Search:
         """
         Alpha-beta helper function for the max player
         """
-        if self.interrupt:
-            raise TimeoutException()
-
-        while self.paused:
-            sleep(1 / ui.constants.FPS)
+        self._handle_interrupts()
 
         if depth <= 0:
             self.node_count += 1
@@ -80,19 +129,25 @@ class Search:
         moves = StateGenerator.enumerate_board(board, player)
         boards = StateGenerator.generate(board, moves)
         transitions = list(zip(moves, boards))
+        self.stats.num_nodes += len(moves)
+        self.stats.num_plies_expanded += 1
 
         if depth >= depth_limit:
             self._order_nodes(board, transitions)
 
+        leaf_heuristics = self._get_leaf_heuristics(board, [node[1] for node in transitions], player, depth)
+
         for index, node in enumerate(transitions):
             move, next_board = node
 
             if depth >= depth_limit:
                 original_move = move
 
-            heuristic = self._alpha_beta_min(next_board, player,
-                                             alpha, beta,
-                                             depth - 1, depth_limit)
+            heuristic = (leaf_heuristics[index]
+                if leaf_heuristics is not None
+                else self._alpha_beta_min(next_board, player,
+                                          alpha, beta,
+                                          depth - 1, depth_limit))
 
             best_heuristic = max(best_heuristic, heuristic)
 
@@ -103,6 +158,7 @@ class Search:
 
             if best_heuristic > beta:
                 self.prune_count += len(transitions) - index
+                self.stats.num_nodes_pruned += len(transitions) - index - 1
                 return best_heuristic
 
             alpha = max(alpha, best_heuristic)
@@ -115,11 +171,7 @@ class Search:
         """
         Alpha-beta helper function for the min player
         """
-        if self.interrupt:
-            raise TimeoutException()
-
-        while self.paused:
-            sleep(1 / ui.constants.FPS)
+        self._handle_interrupts()
 
         if depth <= 0:
             self.node_count += 1
@@ -129,16 +181,22 @@ class Search:
 
         moves = StateGenerator.enumerate_board(board, Color.next(player))
         boards = StateGenerator.generate(board, moves)
+        self.stats.num_nodes += len(moves)
+        self.stats.num_plies_expanded += 1
+        leaf_heuristics = self._get_leaf_heuristics(board, boards, player, depth)
 
         for index, next_board in enumerate(boards):
-            heuristic = self._alpha_beta_max(next_board, player,
-                                             alpha, beta,
-                                             depth - 1, depth_limit)
+            heuristic = (leaf_heuristics[index]
+                if leaf_heuristics is not None
+                else self._alpha_beta_max(next_board, player,
+                                          alpha, beta,
+                                          depth - 1, depth_limit))
 
             best_heuristic = min(best_heuristic, heuristic)
 
             if best_heuristic < alpha:
                 self.prune_count += len(boards) - index
+                self.stats.num_nodes_pruned += len(boards) - index - 1
                 return best_heuristic
 
             beta = min(beta, best_heuristic)
@@ -0,0 +1,198 @@
+"""
+Defines batched NumPy leaf evaluation for many boards at once.
+Boards are encoded as an (N, CELL_COUNT) int8 array of color values in board
+storage order (0 for empty cells), and features are computed for all boards
+with neighbor-index gathers and a precomputed center distance vector.
+
+NumPy is optional: callers should check `BATCH_AVAILABLE` and fall back to
+`HeuristicType.call` per board when it is not installed.
+"""
+
+from copy import deepcopy
+from functools import lru_cache
+from numbers import Number
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from agent.heuristics.features import Feature
+from agent.heuristics.heuristic_jonathan import Heuristic
+from core.board import Board, CELL_DISTANCES, CELL_NEIGHBORS
+from core.color import Color
+from core.constants import WIN_SCORE
+from core.hex import HexDirection
+
+BATCH_AVAILABLE = np is not None
+
+CELL_COUNT = sum(len(line) for line in CELL_DISTANCES)
+MAX_ADJACENCY = len(HexDirection) * CELL_COUNT
+
+
+def _setup_cell_vectors():
+    """
+    Flattens the board cell tables into arrays indexed by cell.
+    Out of bounds neighbors point at index CELL_COUNT, a sentinel column that is always empty.
+    :return: a tuple of (distances, neighbor indices) arrays of shape (CELL_COUNT,) and (CELL_COUNT, 6)
+    """
+    line_starts = []
+    start = 0
+    for line in CELL_DISTANCES:
+        line_starts.append(start)
+        start += len(line)
+
+    distances = [distance for line in CELL_DISTANCES for distance in line]
+    neighbors = []
+    for line in CELL_NEIGHBORS:
+        for cell_neighbors in line:
+            indices = [line_starts[r] + q for r, q in cell_neighbors]
+            indices += [CELL_COUNT] * (len(HexDirection) - len(indices))
+            neighbors.append(indices)
+
+    return np.array(distances, dtype=np.int16), np.array(neighbors, dtype=np.intp)
+
+if BATCH_AVAILABLE:
+    DISTANCES, NEIGHBOR_INDICES = _setup_cell_vectors()
+
+
+@lru_cache(maxsize=None)
+def _normalization_tables():
+    """
+    Tabulates the normalized Jonathan features by (marble count, value) using `Heuristic`'s own
+    normalization functions, so that batch and per-board evaluation agree exactly.
+    Built on first use.
+    :return: a dict mapping normalized Features to arrays
+    """
+    scores = range(CELL_COUNT + 1)
+    counts = range(CELL_COUNT + 1)
+    values = range(MAX_ADJACENCY + 1)
+
+    def tabulate(normalize):
+        return np.array([[normalize(value, count) for value in values] for count in counts])
+
+    return {
+        Feature.SCORE_NORMALIZED: np.array([
+            Heuristic._score_normalized(np.inf if score >= WIN_SCORE else score)
+                for score in scores]),
+        Feature.SCORE_OPPONENT_NORMALIZED: np.array([
+            Heuristic._score_opponent_normalized(-np.inf if score >= WIN_SCORE else WIN_SCORE - score)
+                for score in scores]),
+        Feature.MANHATTAN_NORMALIZED: tabulate(Heuristic._manhattan_normalized),
+        Feature.MANHATTAN_OPPONENT_NORMALIZED: tabulate(Heuristic._manhattan_opponent_normalized),
+        Feature.ADJACENCY_NORMALIZED: tabulate(Heuristic._adjacency_normalized),
+        Feature.ADJACENCY_OPPONENT_NORMALIZED: tabulate(Heuristic._adjacency_opponent_normalized),
+    }
+
+
+def encode_boards(boards: list[Board]) -> "np.ndarray":
+    """
+    Encodes many boards at once.
+    :param boards: a list of Boards
+    :return: an (N, CELL_COUNT) int8 array
+    """
+    return np.array([board.to_flat_array() for board in boards], dtype=np.int8).reshape(-1, CELL_COUNT)
+
+
+def encode_moves(board: Board, moves: list, temp_board: Board = None) -> "np.ndarray":
+    """
+    Encodes the children of a board without keeping a Board per child.
+    :param board: the parent Board
+    :param moves: the Moves to apply to the parent
+    :param temp_board: a scratch Board in the same state as `board`, left in that state on return
+    :return: an (N, CELL_COUNT) int8 array
+    """
+    temp_board = temp_board or deepcopy(board)
+    encoded = np.empty((len(moves), CELL_COUNT), dtype=np.int8)
+    for i, move in enumerate(moves):
+        temp_board.apply_move(move)
+        encoded[i] = temp_board.to_flat_array()
+        temp_board.copy_state(board)
+    return encoded
+
+
+def extract_features_batch(encoded: "np.ndarray", player: Color, layout: Board,
+                           features: tuple[Feature, ...]) -> "np.ndarray":
+    """
+    Computes the given features for every encoded board, matching `features.extract_features`.
+    :param encoded: an (N, CELL_COUNT) int8 array of boards
+    :param player: the Color to compute features for
+    :param layout: a Board sharing the starting layout of the encoded boards, used for scores
+    :param features: the Features to compute
+    :return: an (N, len(features)) float array
+    """
+    opponent = Color.next(player)
+    num_boards = len(encoded)
+
+    # gather each cell's neighbors through the sentinel-padded board
+    padded = np.concatenate((encoded, np.zeros((num_boards, 1), dtype=np.int8)), axis=1)
+    neighbors = padded[:, NEIGHBOR_INDICES]
+    links = (neighbors == encoded[:, :, None]).sum(axis=2)
+
+    def accumulate(color):
+        mask = encoded == color.value
+        color_links = links * mask
+        return (mask.sum(axis=1),
+                (DISTANCES * mask).sum(axis=1),
+                color_links.sum(axis=1),
+                (color_links * color_links).sum(axis=1))
+
+    player_count, player_distance, adjacency, adjacency_squares = accumulate(player)
+    opponent_count, opponent_distance, opponent_adjacency, opponent_adjacency_squares = accumulate(opponent)
+
+    score = layout.get_layout_count(opponent) - opponent_count
+    score_opponent = layout.get_layout_count(player) - player_count
+    manhattan = Heuristic.MAX_MANHATTAN_DISTANCE * player_count - player_distance
+    adjacency_opponent = len(HexDirection) * opponent_count - opponent_adjacency
+
+    columns = {
+        Feature.BIAS: lambda: np.ones(num_boards),
+        Feature.MARBLES: lambda: player_count,
+        Feature.MARBLES_OPPONENT: lambda: opponent_count,
+        # per `Heuristic._score_optimized`
+        Feature.SCORE: lambda: np.where(score >= WIN_SCORE, np.inf, score),
+        Feature.SCORE_OPPONENT: lambda: np.where(score_opponent >= WIN_SCORE, -np.inf,
+                                                 WIN_SCORE - score_opponent),
+        Feature.MANHATTAN: lambda: manhattan,
+        Feature.MANHATTAN_OPPONENT: lambda: opponent_distance,
+        Feature.CENTRALIZATION_OPPONENT: lambda: (Heuristic.MAX_MANHATTAN_DISTANCE * opponent_count
+                                                  - opponent_distance),
+        Feature.ADJACENCY: lambda: adjacency,
+        Feature.ADJACENCY_OPPONENT: lambda: adjacency_opponent,
+        Feature.ADJACENCY_SQUARES: lambda: adjacency_squares / 4,
+        Feature.ADJACENCY_SQUARES_OPPONENT: lambda: opponent_adjacency_squares / 4,
+        Feature.SCORE_NORMALIZED: lambda: _normalization_tables()[Feature.SCORE_NORMALIZED][score],
+        Feature.SCORE_OPPONENT_NORMALIZED: lambda: (
+            _normalization_tables()[Feature.SCORE_OPPONENT_NORMALIZED][score_opponent]),
+        Feature.MANHATTAN_NORMALIZED: lambda: (
+            _normalization_tables()[Feature.MANHATTAN_NORMALIZED][player_count, manhattan]),
+        Feature.MANHATTAN_OPPONENT_NORMALIZED: lambda: (
+            _normalization_tables()[Feature.MANHATTAN_OPPONENT_NORMALIZED][opponent_count, opponent_distance]),
+        Feature.ADJACENCY_NORMALIZED: lambda: (
+            _normalization_tables()[Feature.ADJACENCY_NORMALIZED][player_count, adjacency]),
+        Feature.ADJACENCY_OPPONENT_NORMALIZED: lambda: (
+            _normalization_tables()[Feature.ADJACENCY_OPPONENT_NORMALIZED][opponent_count, adjacency_opponent]),
+    }
+
+    matrix = np.empty((num_boards, len(features)))
+    for i, feature in enumerate(features):
+        matrix[:, i] = columns[feature]()
+    return matrix
+
+
+def evaluate_batch(encoded: "np.ndarray", player: Color, layout: Board,
+                   weights: dict[Feature, Number]) -> "np.ndarray":
+    """
+    Evaluates many boards at once as the dot product of their features and the given weights.
+    :param encoded: an (N, CELL_COUNT) int8 array of boards
+    :param player: the Color to evaluate for
+    :param layout: a Board sharing the starting layout of the encoded boards, used for scores
+    :param weights: a dict mapping features to weights, per `features.compile_evaluator`
+    :return: an (N,) float array of heuristic values
+    """
+    terms = [(feature, weight) for feature, weight in weights.items() if weight]
+    features = tuple(feature for feature, _ in terms)
+    vector = np.array([weight for _, weight in terms], dtype=float)
+    if not len(encoded):
+        return np.empty(0)
+    return extract_features_batch(encoded, player, layout, features) @ vector
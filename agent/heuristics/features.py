@@ -0,0 +1,150 @@
+"""
+Defines a unified feature extractor shared by every weighted heuristic.
+Heuristics are expressed as weight vectors over these features and compiled
+into evaluator callables that apply the weights as a dot product.
+"""
+
+from enum import IntEnum
+from numbers import Number
+from operator import mul
+from typing import Callable
+
+from agent.heuristics.heuristic_jonathan import Heuristic
+from core.board import Board
+from core.color import Color
+from core.hex import HexDirection
+
+
+class Feature(IntEnum):
+    """
+    Indexes the feature vector returned by `extract_features`.
+    Features are from the perspective of the given player.
+    """
+    BIAS = 0
+    MARBLES = 1
+    MARBLES_OPPONENT = 2
+    SCORE = 3
+    SCORE_OPPONENT = 4
+    MANHATTAN = 5
+    MANHATTAN_OPPONENT = 6
+    CENTRALIZATION_OPPONENT = 7
+    ADJACENCY = 8
+    ADJACENCY_OPPONENT = 9
+    ADJACENCY_SQUARES = 10
+    ADJACENCY_SQUARES_OPPONENT = 11
+
+    # normalized features are only extracted when a weight vector uses them
+    SCORE_NORMALIZED = 12
+    SCORE_OPPONENT_NORMALIZED = 13
+    MANHATTAN_NORMALIZED = 14
+    MANHATTAN_OPPONENT_NORMALIZED = 15
+    ADJACENCY_NORMALIZED = 16
+    ADJACENCY_OPPONENT_NORMALIZED = 17
+
+    @property
+    def is_normalized(self) -> bool:
+        """
+        Determines if the feature requires normalization.
+        """
+        return self >= Feature.SCORE_NORMALIZED
+
+
+def extract_features(board: Board, player: Color, normalized: bool = True) -> list[Number]:
+    """
+    Computes every base feature used by any heuristic in one pass over the board's evaluation state:
+        BIAS: always 1
+        MARBLES: marble count
+        SCORE: score per `Heuristic._score` (inf on win)
+        SCORE_OPPONENT: opponent score per `Heuristic._score_opponent` (-inf on loss)
+        MANHATTAN: sum of marble centralization (max distance minus distance to center)
+        MANHATTAN_OPPONENT: sum of opponent marble distances to center
+        CENTRALIZATION_OPPONENT: sum of opponent marble centralization
+        ADJACENCY: sum of same-color neighbors over marbles
+        ADJACENCY_OPPONENT: sum of non-opponent or out of bounds neighbors over opponent marbles
+        ADJACENCY_SQUARES: sum of (same-color neighbors / 2) ** 2 over marbles
+    :param normalized: whether or not to compute normalized features (else left as 0)
+    :return: a list of features indexed by Feature
+    """
+    opponent = Color.next(player)
+    player_count = board.get_marble_count(player)
+    opponent_count = board.get_marble_count(opponent)
+    player_distance = board.get_distance_sum(player)
+    opponent_distance = board.get_distance_sum(opponent)
+
+    score, score_opponent = Heuristic._score_optimized(board, player, player_count, opponent_count)
+    manhattan = Heuristic.MAX_MANHATTAN_DISTANCE * player_count - player_distance
+    adjacency = board.get_adjacency_count(player)
+    adjacency_opponent = len(HexDirection) * opponent_count - board.get_adjacency_count(opponent)
+
+    features = [
+        1,
+        player_count,
+        opponent_count,
+        score,
+        score_opponent,
+        manhattan,
+        opponent_distance,
+        Heuristic.MAX_MANHATTAN_DISTANCE * opponent_count - opponent_distance,
+        adjacency,
+        adjacency_opponent,
+        board.get_adjacency_squares(player) / 4,
+        board.get_adjacency_squares(opponent) / 4,
+        0, 0, 0, 0, 0, 0,
+    ]
+
+    if normalized:
+        features[Feature.SCORE_NORMALIZED] = Heuristic._score_normalized(score)
+        features[Feature.SCORE_OPPONENT_NORMALIZED] = Heuristic._score_opponent_normalized(score_opponent)
+        features[Feature.MANHATTAN_NORMALIZED] = Heuristic._manhattan_normalized(manhattan, player_count)
+        features[Feature.MANHATTAN_OPPONENT_NORMALIZED] = \
+            Heuristic._manhattan_opponent_normalized(opponent_distance, opponent_count)
+        features[Feature.ADJACENCY_NORMALIZED] = Heuristic._adjacency_normalized(adjacency, player_count)
+        features[Feature.ADJACENCY_OPPONENT_NORMALIZED] = \
+            Heuristic._adjacency_opponent_normalized(adjacency_opponent, opponent_count)
+
+    return features
+
+
+def _compile_weights(weights: dict[Feature, Number]) -> tuple[tuple[int, ...], tuple[Number, ...]]:
+    """
+    Compiles a weight mapping into parallel (feature indices, weights) tuples.
+    Zero weights are dropped so that infinite features they would multiply never produce `nan`.
+    """
+    terms = [(feature, weight) for feature, weight in weights.items() if weight]
+    return tuple(int(feature) for feature, _ in terms), tuple(weight for _, weight in terms)
+
+
+def compile_evaluator(weights: dict[Feature, Number]) -> Callable[[Board, Color], Number]:
+    """
+    Compiles a weight vector into an evaluator callable.
+    :param weights: a dict mapping features to weights
+    :return: a Callable[Board, Color] returning the dot product of the weights and features
+    """
+    indices, vector = _compile_weights(weights)
+    normalized = any(Feature(i).is_normalized for i in indices)
+
+    def evaluate(board: Board, player: Color) -> Number:
+        features = extract_features(board, player, normalized)
+        return sum(map(mul, vector, [features[i] for i in indices]))
+
+    return evaluate
+
+
+def compile_scheduled_evaluator(schedule: list[dict[Feature, Number]],
+                                get_step: Callable[[], int]) -> Callable[[Board, Color], Number]:
+    """
+    Compiles a sequence of weight vectors into an evaluator callable that selects its weights by step,
+    e.g. the turn count of the game.
+    :param schedule: a list of dicts mapping features to weights
+    :param get_step: a Callable returning an index into `schedule`
+    :return: a Callable[Board, Color] returning the dot product of the current weights and features
+    """
+    compiled = [_compile_weights(weights) for weights in schedule]
+    normalized = any(Feature(i).is_normalized for indices, _ in compiled for i in indices)
+
+    def evaluate(board: Board, player: Color) -> Number:
+        indices, vector = compiled[get_step()]
+        features = extract_features(board, player, normalized)
+        return sum(map(mul, vector, [features[i] for i in indices]))
+
+    return evaluate
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from core.hex import Hex
+from agent.heuristics.features import Feature
+from core.color import Color
 from core.constants import BOARD_SIZE
 
 
@@ -16,61 +17,74 @@ class HeuristicWeights:
     adjacency_opponent: int
 
 
+WEIGHTS_OFFENSIVE = HeuristicWeights(
+    score=15,
+    score_opponent=30,
+    centralization=1,
+    centralization_opponent=1.25,
+    adjacency=0.1,
+    adjacency_opponent=0.15
+)
+
+WEIGHTS_DEFENSIVE = HeuristicWeights(
+    score=15,
+    score_opponent=25,
+    centralization=1,
+    centralization_opponent=1,
+    adjacency=0.1,
+    adjacency_opponent=0.125
+)
+
+MAX_MARBLES = 14
+
+
 def heuristic_offensive(board, color):
     """
     An offensive heuristic.
     """
-    return heuristic(board, color, HeuristicWeights(
-        score=15,
-        score_opponent=30,
-        centralization=1,
-        centralization_opponent=1.25,
-        adjacency=0.1,
-        adjacency_opponent=0.15
-    ))
+    return heuristic(board, color, WEIGHTS_OFFENSIVE)
 
 def heuristic_defensive(board, color):
     """
     A defensive heuristic.
     """
-    return heuristic(board, color, HeuristicWeights(
-        score=15,
-        score_opponent=25,
-        centralization=1,
-        centralization_opponent=1,
-        adjacency=0.1,
-        adjacency_opponent=0.125
-    ))
+    return heuristic(board, color, WEIGHTS_DEFENSIVE)
+
+def feature_weights(weights: HeuristicWeights) -> dict[Feature, float]:
+    """
+    Expresses the given heuristic weights as a weight vector over `Feature`s.
+    The marble terms expand as score * (MAX_MARBLES - opponent marbles) - score_opponent * (MAX_MARBLES - marbles).
+    """
+    return {
+        Feature.BIAS: MAX_MARBLES * (weights.score - weights.score_opponent),
+        Feature.MARBLES: weights.score_opponent,
+        Feature.MARBLES_OPPONENT: -weights.score,
+        Feature.MANHATTAN: weights.centralization,
+        Feature.CENTRALIZATION_OPPONENT: -weights.centralization_opponent,
+        Feature.ADJACENCY_SQUARES: weights.adjacency,
+        Feature.ADJACENCY_SQUARES_OPPONENT: -weights.adjacency_opponent,
+    }
 
 
 def heuristic(board, color, weights):
-    MAX_MARBLES = 14
+    """
+    Weighs marble counts, centralization and adjacency for both players.
+    Reads the board's incremental evaluation state rather than enumerating the board.
+    """
     BOARD_RADIUS = BOARD_SIZE - 1
-    BOARD_CENTER = Hex(BOARD_RADIUS, BOARD_RADIUS)
-
-    heuristic_score = MAX_MARBLES
-    heuristic_score_opponent = MAX_MARBLES
-    heuristic_centralization = 0
-    heuristic_centralization_opponent = 0
-    heuristic_adjacency = 0
-    heuristic_adjacency_opponent = 0
-
-    for cell, cell_color in board.enumerate_nonempty():
-        cell_centralization = BOARD_RADIUS - Hex.manhattan(cell, BOARD_CENTER)
-        cell_adjacency = sum([
-            board[n] == cell_color if n in board else 0
-                for n in Hex.neighbors(cell)
-        ])
-        cell_adjacency = pow(cell_adjacency / 2, 2)
-
-        if cell_color == color:
-            heuristic_centralization += cell_centralization
-            heuristic_adjacency += cell_adjacency
-            heuristic_score_opponent -= 1
-        else:
-            heuristic_centralization_opponent += cell_centralization
-            heuristic_adjacency_opponent += cell_adjacency
-            heuristic_score -= 1
+
+    opponent = Color.next(color)
+    count = board.get_marble_count(color)
+    count_opponent = board.get_marble_count(opponent)
+
+    heuristic_score = MAX_MARBLES - count_opponent
+    heuristic_score_opponent = MAX_MARBLES - count
+    heuristic_centralization = BOARD_RADIUS * count - board.get_distance_sum(color)
+    heuristic_centralization_opponent = BOARD_RADIUS * count_opponent - board.get_distance_sum(opponent)
+
+    # each marble contributes (same-color neighbors / 2) ** 2
+    heuristic_adjacency = board.get_adjacency_squares(color) / 4
+    heuristic_adjacency_opponent = board.get_adjacency_squares(opponent) / 4
 
     return (
         weights.score * heuristic_score
@@ -4,7 +4,7 @@ from numbers import Number
 from core.board import Board
 from core.color import Color
 from core.constants import BOARD_SIZE, WIN_SCORE
-from core.hex import Hex
+from core.hex import Hex, HexDirection
 from lib.clamp import clamp_01, clamp
 from lib.remap import remap_01, remap
 from ui import debug
@@ -110,12 +110,39 @@ class Heuristic:
         manhattan_score, manhattan_opponent_score, \
         adjacency_score, adjacency_opponent_score = cls._composite_normalized(board, player)
 
-        turn_count = 0
+        weight_normalized_score, weight_normalized_opponent_score, \
+        weight_normalized_manhattan, weight_normalized_opponent_manhattan, \
+        weight_normalized_adjacency, weight_normalized_opponent_adjacency = \
+            cls.get_dynamic_weights(cls.get_turn_count())
+
+        return weight_normalized_score * score \
+               + weight_normalized_opponent_score * score_opponent \
+               + weight_normalized_manhattan * manhattan_score \
+               + weight_normalized_opponent_manhattan * manhattan_opponent_score \
+               + weight_normalized_adjacency * adjacency_score \
+               + weight_normalized_opponent_adjacency * adjacency_opponent_score
+
+    @classmethod
+    def get_turn_count(cls) -> int:
+        """
+        Gets the turn count used by dynamic heuristics, clamped between 0 and DYNAMIC_TURN_MAX.
+        :return: The turn count, or 0 if the turn count handler is not setup.
+        """
         if cls._get_turn_count:
-            turn_count = cls._get_turn_count()
-        else:
-            Debug.log("Warning: Dynamic turn count not setup", DebugType.Warning)
+            return cls._get_turn_count()
+
+        Debug.log("Warning: Dynamic turn count not setup", DebugType.Warning)
+        return 0
 
+    @classmethod
+    def get_dynamic_weights(cls, turn_count: int) -> tuple[float, float, float, float, float, float]:
+        """
+        Calculates the normalized weights used by the dynamic heuristic at the given turn count.
+        :return: The weights in a tuple of the format:
+                 score, opponent_score,
+                 manhattan_score, manhattan_opponent_score,
+                 adjacency_score, adjacency_opponent_score
+        """
         weight_initial_score = cls.WEIGHT_SCORE / 2
         weight_final_score = cls.WEIGHT_SCORE
 
@@ -138,12 +165,9 @@ class Heuristic:
                                                      weight_initial_normalized_opponent_manhattan,
                                                      weight_final_normalized_opponent_manhattan)
 
-        return weight_normalized_score * score \
-               + cls.WEIGHT_NORMALIZED_OPPONENT_SCORE * score_opponent \
-               + weight_normalized_manhattan * manhattan_score \
-               + weight_normalized_opponent_manhattan * manhattan_opponent_score \
-               + cls.WEIGHT_NORMALIZED_ADJACENCY * adjacency_score \
-               + cls.WEIGHT_NORMALIZED_OPPONENT_ADJACENCY * adjacency_opponent_score
+        return weight_normalized_score, cls.WEIGHT_NORMALIZED_OPPONENT_SCORE, \
+               weight_normalized_manhattan, weight_normalized_opponent_manhattan, \
+               cls.WEIGHT_NORMALIZED_ADJACENCY, cls.WEIGHT_NORMALIZED_OPPONENT_ADJACENCY
 
     @classmethod
     def _score(cls, board: Board, player: Color) -> int:
@@ -337,8 +361,8 @@ class Heuristic:
         Calculates all of the 6 base heuristics:
         (Score, Opponent Score, Manhattan, Opponent Manhattan, Adjacency, Opponent Adjacency)
 
-        Calculates these in the most optimal way, enumerating the board once to calculate all heuristics and enumerating
-        the board layout once to calculate score heuristics.
+        Reads these from the board's incremental evaluation state, which is updated by delta on every move,
+        so no board enumeration is required.
 
         :return: The marbles counts for both players and heuristic values in a tuple of the format:
                  player_count, opponent_count,
@@ -346,32 +370,16 @@ class Heuristic:
                  manhattan_score, manhattan_opponent_score,
                  adjacency_score, adjacency_opponent_score
         """
-        manhattan_score = 0
-        manhattan_opponent_score = 0
-        adjacency_score = 0
-        adjacency_opponent_score = 0
+        opponent = Color.next(player)
+        player_count = board.get_marble_count(player)
+        opponent_count = board.get_marble_count(opponent)
 
-        player_count = 0
-        opponent_count = 0
-        for cell, color in board.enumerate():
-            for neighbour in cell.neighbors():
-                if color is player:
-                    if board.cell_in_bounds(neighbour) and board[neighbour] == player:
-                        adjacency_score += 1
-                elif color is Color.next(player):
-                    if not board.cell_in_bounds(neighbour):
-                        adjacency_opponent_score += 1
-                    elif board[neighbour] != Color.next(player):
-                        adjacency_opponent_score += 1
+        manhattan_score = cls.MAX_MANHATTAN_DISTANCE * player_count - board.get_distance_sum(player)
+        manhattan_opponent_score = board.get_distance_sum(opponent)
 
-            if color is player:
-                player_count += 1
-                manhattan_score += cls.MAX_MANHATTAN_DISTANCE - cell.manhattan(cls.BOARD_CENTER)
-            elif color is Color.next(player):
-                opponent_count += 1
-                manhattan_opponent_score += cell.manhattan(cls.BOARD_CENTER)
-            else:
-                pass
+        # opponent adjacency counts every neighbor that is out of bounds or not an opponent marble
+        adjacency_score = board.get_adjacency_count(player)
+        adjacency_opponent_score = len(HexDirection) * opponent_count - board.get_adjacency_count(opponent)
 
         score, opponent_score = cls._score_optimized(board, player, player_count, opponent_count)
 
@@ -0,0 +1,169 @@
+"""
+Verifies the board's incremental evaluation state against a full recomputation.
+Plays random games from each board layout and checks the accumulators and the
+heuristics that read them after every move and every `copy_state` undo.
+
+Usage: python -m agent.heuristics.verify [num_games] [num_plies] [seed]
+"""
+
+import random
+import sys
+from copy import deepcopy
+
+from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.heuristics.heuristic_brandon import HeuristicWeights, heuristic as heuristic_brandon
+from agent.state_generator import StateGenerator
+from core.board import Board
+from core.board_layout import BoardLayout
+from core.color import Color
+from core.constants import BOARD_SIZE
+from core.hex import Hex
+
+EPSILON = 1e-9
+
+
+def _composite_full(board: Board, player: Color):
+    """
+    Calculates the unnormalized base heuristics of `Heuristic._composite` by enumerating the board.
+    :return: a tuple in the same format as `Heuristic._composite`
+    """
+    manhattan_score = 0
+    manhattan_opponent_score = 0
+    adjacency_score = 0
+    adjacency_opponent_score = 0
+
+    player_count = 0
+    opponent_count = 0
+    for cell, color in board.enumerate():
+        for neighbour in cell.neighbors():
+            if color is player:
+                if board.cell_in_bounds(neighbour) and board[neighbour] == player:
+                    adjacency_score += 1
+            elif color is Color.next(player):
+                if not board.cell_in_bounds(neighbour):
+                    adjacency_opponent_score += 1
+                elif board[neighbour] != Color.next(player):
+                    adjacency_opponent_score += 1
+
+        if color is player:
+            player_count += 1
+            manhattan_score += Heuristic.MAX_MANHATTAN_DISTANCE - cell.manhattan(Heuristic.BOARD_CENTER)
+        elif color is Color.next(player):
+            opponent_count += 1
+            manhattan_opponent_score += cell.manhattan(Heuristic.BOARD_CENTER)
+
+    score, opponent_score = Heuristic._score_optimized(board, player, player_count, opponent_count)
+
+    return score, opponent_score, \
+           manhattan_score, manhattan_opponent_score, \
+           adjacency_score, adjacency_opponent_score, \
+           player_count, opponent_count
+
+
+def _heuristic_brandon_full(board: Board, color: Color, weights):
+    """
+    Calculates `heuristic_brandon.heuristic` by enumerating the board.
+    :return: the heuristic value
+    """
+    MAX_MARBLES = 14
+    BOARD_RADIUS = BOARD_SIZE - 1
+    BOARD_CENTER = Hex(BOARD_RADIUS, BOARD_RADIUS)
+
+    values = [MAX_MARBLES, MAX_MARBLES, 0, 0, 0, 0]
+    for cell, cell_color in board.enumerate_nonempty():
+        cell_centralization = BOARD_RADIUS - Hex.manhattan(cell, BOARD_CENTER)
+        cell_adjacency = sum([
+            board[n] == cell_color if n in board else 0
+                for n in Hex.neighbors(cell)
+        ])
+        cell_adjacency = pow(cell_adjacency / 2, 2)
+
+        if cell_color == color:
+            values[2] += cell_centralization
+            values[4] += cell_adjacency
+            values[1] -= 1
+        else:
+            values[3] += cell_centralization
+            values[5] += cell_adjacency
+            values[0] -= 1
+
+    return (
+        weights.score * values[0]
+        - weights.score_opponent * values[1]
+        + weights.centralization * values[2]
+        - weights.centralization_opponent * values[3]
+        + weights.adjacency * values[4]
+        - weights.adjacency_opponent * values[5]
+    )
+
+
+def _check(actual, expected, label):
+    """
+    Raises an AssertionError if `actual` and `expected` differ.
+    """
+    if isinstance(actual, tuple):
+        for a, e in zip(actual, expected):
+            _check(a, e, label)
+        return
+
+    if actual != expected and abs(actual - expected) > EPSILON:
+        raise AssertionError(f"{label}: incremental {actual} != full {expected}")
+
+
+def verify_board(board: Board):
+    """
+    Compares the incremental evaluation state and heuristics of a board against a full recomputation.
+    :param board: a Board
+    """
+    weights = HeuristicWeights(score=1, score_opponent=2, centralization=3,
+                               centralization_opponent=4, adjacency=5, adjacency_opponent=6)
+
+    marble_counts, distance_sums, adjacency_counts, adjacency_squares = board.compute_eval_state()
+    for color in Color:
+        _check(board.get_marble_count(color), marble_counts[color.value], f"{color} marble count")
+        _check(board.get_distance_sum(color), distance_sums[color.value], f"{color} distance sum")
+        _check(board.get_adjacency_count(color), adjacency_counts[color.value], f"{color} adjacency count")
+        _check(board.get_adjacency_squares(color), adjacency_squares[color.value], f"{color} adjacency squares")
+        _check(Heuristic._composite(board, color), _composite_full(board, color), f"{color} composite")
+        _check(heuristic_brandon(board, color, weights),
+               _heuristic_brandon_full(board, color, weights), f"{color} brandon heuristic")
+
+
+def verify_playouts(num_games: int = 10, num_plies: int = 80, seed: int = None) -> int:
+    """
+    Plays random games from each board layout, verifying the board after every applied and undone move.
+    :param num_games: the number of games to play per layout
+    :param num_plies: the maximum number of plies per game
+    :param seed: a random seed for reproducible playouts
+    :return: the number of boards verified
+    """
+    random.seed(seed)
+    num_verified = 0
+    for layout in BoardLayout:
+        for _ in range(num_games):
+            board = BoardLayout.setup_board(layout)
+            temp_board = deepcopy(board)
+            player = Color.BLACK
+            for _ in range(num_plies):
+                moves = StateGenerator.enumerate_board(board, player)
+                if not moves:
+                    break
+
+                # apply and undo a sibling move via `copy_state` as the search does
+                temp_board.apply_move(random.choice(moves))
+                verify_board(temp_board)
+                temp_board.copy_state(board)
+                verify_board(temp_board)
+
+                board.apply_move(random.choice(moves))
+                verify_board(board)
+                temp_board.copy_state(board)
+                player = Color.next(player)
+                num_verified += 3
+
+    return num_verified
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    print(f"Verified {verify_playouts(*args)} boards")
@@ -4,6 +4,7 @@ from core.board import Board
 from core.color import Color
 from agent.base import BaseAgent
 from agent.zobrist import Zobrist
+from agent.zobrist.symmetry import invert_symmetry, transform_move
 from ui.debug import Debug, DebugType
 
 
@@ -11,6 +12,8 @@ class PonderingAgent(BaseAgent):
     """
     An abstract base class for agents with pondering capabilities.
     Exposes an interface around a refutation table for mapping boards to refutation moves.
+    With symmetric hashing, the table is keyed by canonical board hash and holds moves in the
+    frame of the canonical image, so that a refutation serves every symmetric image of its board.
     """
 
     class SearchMode(Enum):
@@ -23,6 +26,21 @@ class PonderingAgent(BaseAgent):
     def __init__(self):
         super().__init__()
         self._refutation_table = {}
+        self._symmetric_refutations = False
+
+    def set_symmetric_hashing(self, symmetric: bool):
+        if symmetric != self._symmetric_refutations:
+            self.clear_refutation_table()
+        self._symmetric_refutations = symmetric
+
+    def _hash_board(self, board):
+        """
+        Hashes a board for the refutation table.
+        :return: a tuple of (the board hash, the symmetry mapping the board to the frame of its moves)
+        """
+        if self._symmetric_refutations:
+            return Zobrist.create_canonical_board_hash(board)
+        return Zobrist.create_board_hash(board), 0
 
     def get_refutation_move(self, board):
         """
@@ -30,7 +48,7 @@ class PonderingAgent(BaseAgent):
         :param board: a Board
         :return: a Move if refutation move is cached else None
         """
-        board_hash = Zobrist.create_board_hash(board)
+        board_hash, symmetry = self._hash_board(board)
 
         if board_hash in self._refutation_table:
             Debug.log(f"refutation table hit {board_hash} -> {self._refutation_table[board_hash]}",
@@ -38,10 +56,12 @@ class PonderingAgent(BaseAgent):
         else:
             Debug.log(f"refutation table miss {board_hash} -> None",
                 DebugType.Agent)
+            return None
 
-        return (self._refutation_table[board_hash]
-            if board_hash in self._refutation_table
-            else None)
+        refutation_move = self._refutation_table[board_hash]
+        return (transform_move(refutation_move, invert_symmetry(symmetry))
+            if symmetry
+            else refutation_move)
 
     def set_refutation_move(self, board, refutation_move):
         """
@@ -49,8 +69,10 @@ class PonderingAgent(BaseAgent):
         :param board: a Board
         :param refutation_move: a Move
         """
-        board_hash = Zobrist.create_board_hash(board)
-        self._refutation_table[board_hash] = refutation_move
+        board_hash, symmetry = self._hash_board(board)
+        self._refutation_table[board_hash] = (transform_move(refutation_move, symmetry)
+            if symmetry
+            else refutation_move)
 
     def clear_refutation_table(self):
         """
@@ -0,0 +1,178 @@
+"""
+Defines an opt-in profiler for root searches.
+
+Profiling is enabled by setting an output directory, either from the Config or the
+ABALONE_PROFILE environment variable. Each profiled search writes:
+- <label>.pstats: a cProfile dump, readable with pstats or snakeviz
+- <label>.collapsed: sampled call stacks in collapsed format, readable with flamegraph.pl or speedscope
+and logs the share of sampled time spent in each search phase.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from enum import Enum
+from itertools import count
+from time import strftime
+
+from ui.debug import Debug, DebugType
+
+PROFILE_ENV_VAR = "ABALONE_PROFILE"
+SAMPLE_INTERVAL = 0.001
+
+
+class Phase(Enum):
+    """
+    The phases of a search that sampled time is attributed to.
+    """
+    MOVE_GENERATION = "move generation"
+    BOARD_COPY = "board copy/apply"
+    HASHING = "hashing"
+    TT_PROBE = "transposition table"
+    EVALUATION = "evaluation"
+    ORDERING = "move ordering"
+    INTERRUPTS = "interrupt checks"
+    OTHER = "other"
+
+
+# (path suffix, function names or None for any, phase), matched in order
+PHASE_RULES = (
+    ("agent/state_generator.py", {"generate"}, Phase.BOARD_COPY),
+    ("agent/state_generator.py", None, Phase.MOVE_GENERATION),
+    ("copy.py", {"deepcopy"}, Phase.BOARD_COPY),
+    ("core/board.py", {"copy_state", "apply_move"}, Phase.BOARD_COPY),
+    ("agent/zobrist/hashing.py", None, Phase.HASHING),
+    ("search.py", {"_probe_transposition_table", "_store_transposition_table"}, Phase.TT_PROBE),
+    ("search.py", {"_evaluate", "_evaluate_moves", "_get_heuristic", "_get_leaf_heuristics"}, Phase.EVALUATION),
+    ("ui/model/heuristic_type.py", None, Phase.EVALUATION),
+    ("search.py", {"_order_moves", "_order_nodes"}, Phase.ORDERING),
+    ("search.py", {"_handle_interrupts"}, Phase.INTERRUPTS),
+)
+
+
+def _get_phase(code) -> Phase:
+    """
+    Determines the phase of a code object, if any.
+    :param code: a code object
+    :return: a Phase, else None
+    """
+    filename = code.co_filename.replace(os.sep, "/")
+    for path_suffix, names, phase in PHASE_RULES:
+        if filename.endswith(path_suffix) and (names is None or code.co_name in names):
+            return phase
+    return None
+
+
+def _format_frame(code) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+
+class _StackSampler(threading.Thread):
+    """
+    Periodically samples the call stack of a thread.
+    Samples are taken as often as the sampled thread releases the GIL, at most every SAMPLE_INTERVAL.
+    """
+
+    def __init__(self, thread_id: int):
+        super().__init__(daemon=True)
+        self._thread_id = thread_id
+        self._stopped = threading.Event()
+        self.stacks = Counter()
+        self.phases = Counter()
+
+    def run(self):
+        while not self._stopped.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self._thread_id)
+            codes = []
+            while frame:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+
+            # attribute the sample to the outermost frame with a phase, e.g. heuristic calls
+            # made during move ordering count towards ordering
+            phase = next(filter(None, map(_get_phase, codes)), Phase.OTHER)
+            self.stacks[";".join(map(_format_frame, codes))] += 1
+            self.phases[phase] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class SearchProfiler:
+    """
+    Wraps root searches in cProfile and a stack sampler when profiling is enabled.
+    """
+
+    _output_dir = os.environ.get(PROFILE_ENV_VAR) or None
+    _num_profiles = count(1)
+
+    @classmethod
+    def set_output_dir(cls, output_dir: str):
+        """
+        Enables profiling to the given directory, or disables it.
+        :param output_dir: a str path, else None to disable profiling
+        """
+        cls._output_dir = output_dir or None
+
+    @classmethod
+    def get_output_dir(cls) -> str:
+        """
+        Gets the directory profiles are written to.
+        :return: a str path, else None if profiling is disabled
+        """
+        return cls._output_dir
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls._output_dir is not None
+
+    @classmethod
+    @contextmanager
+    def profile(cls, label: str):
+        """
+        Profiles the code run by the calling thread within this context, if profiling is enabled.
+        :param label: a str to name the output files with
+        """
+        if not cls.is_enabled():
+            yield
+            return
+
+        output_dir = cls._output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        file_path = os.path.join(output_dir,
+                                 f"{strftime('%Y%m%d-%H%M%S')}-{label}-{os.getpid()}-{next(cls._num_profiles)}")
+
+        sampler = _StackSampler(threading.get_ident())
+        profiler = cProfile.Profile()
+        sampler.start()
+        try:
+            profiler.enable()
+        except ValueError:
+            # only one cProfile may be active at a time from Python 3.12
+            Debug.log("Warning: another search is being profiled, only sampling this search", DebugType.Warning)
+            profiler = None
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(f"{file_path}.pstats")
+            sampler.stop()
+            with open(f"{file_path}.collapsed", mode="w", encoding="utf-8") as file:
+                file.writelines(f"{stack} {count}\n" for stack, count in sampler.stacks.most_common())
+            cls._log_phases(sampler.phases, file_path)
+
+    @staticmethod
+    def _log_phases(phases: Counter, file_path: str):
+        num_samples = sum(phases.values())
+        Debug.log(f"profile written to {file_path}.pstats/.collapsed ({num_samples} samples)", DebugType.Agent)
+        for phase, count in phases.most_common():
+            Debug.log(f"  {phase.value}: {count / num_samples * 100:.1f}%", DebugType.Agent)
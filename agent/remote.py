@@ -0,0 +1,275 @@
+"""
+Defines agents that search in a worker process.
+
+A remote agent hosts an agent in a long-lived worker process, which owns the agent's search and
+its tables so that they stay warm across moves, and drives it by messages over a pipe. Searching
+in another process keeps a CPU-bound search from holding the GIL of the UI process.
+
+Commands are sent to the worker as tuples of (AgentCommand, *args), and the worker streams back
+tuples of (AgentMessage, search id, *args). Each start or ponder is numbered by a search id so
+that moves found by a search superseded before its messages arrived are dropped. Each search
+ends with exactly one COMPLETE or STOPPED message.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from copy import deepcopy
+from enum import Enum, auto
+from threading import Lock, Thread
+from time import sleep, time
+from typing import TYPE_CHECKING
+
+from agent.base import BaseAgent
+from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.ponderer import PonderingAgent
+from agent.profiler import SearchProfiler
+from ui.constants import FPS
+from ui.debug import Debug, DebugType
+
+if TYPE_CHECKING:
+    from core.board import Board
+    from core.color import Color
+    from core.move import Move
+    from ui.model.heuristic_type import HeuristicType
+
+# the seconds to wait for a worker process to exit when closing its agent
+CLOSE_TIMEOUT = 5
+
+# the seconds a worker process waits for a stopped search to exit before reporting it stopped
+STOP_TIMEOUT = 5
+
+
+class AgentCommand(Enum):
+    """
+    Enumerates the commands a remote agent sends to its worker process.
+    """
+    START = auto()  # search id, board, player, turn count, profile dir
+    PONDER = auto()  # search id, board, player, turn count, profile dir
+    STOP = auto()
+    TOGGLE_PAUSED = auto()
+    APPLY_MOVE = auto()  # move
+    SET_HEURISTIC_TYPE = auto()  # heuristic type
+    SET_DEPTH_LIMIT = auto()  # depth
+    SET_SYMMETRIC_HASHING = auto()  # symmetric
+    SET_BATCH_LEAVES = auto()  # batch leaves
+    CLOSE = auto()
+
+
+class AgentMessage(Enum):
+    """
+    Enumerates the messages a worker process streams back to its remote agent.
+    """
+    FIND = auto()  # move, node count
+    REFUTATION = auto()  # opponent move, refutation move, node count
+    COMPLETE = auto()  # node count
+    STOPPED = auto()  # node count
+
+
+def agent_host(connection, agent_class: type):
+    """
+    Hosts an agent in a worker process, running commands from the connection until it is closed.
+    :param connection: the worker's end of the pipe to the remote agent
+    :param agent_class: the BaseAgent subclass to host
+    """
+    agent = agent_class()
+    send_lock = Lock()
+    search_id = 0
+    # the id of the last search that sent a COMPLETE or STOPPED message
+    ended_search_id = 0
+    turn_count = 0
+    Heuristic.set_turn_count_handler(lambda: turn_count)
+
+    def send(message: AgentMessage, search_id: int, *args):
+        with send_lock:
+            connection.send((message, search_id, *args))
+
+    def end(message: AgentMessage, search_id: int):
+        """
+        Sends the one COMPLETE or STOPPED message of a search, dropping any that follow.
+        """
+        nonlocal ended_search_id
+        with send_lock:
+            if ended_search_id == search_id:
+                return
+            ended_search_id = search_id
+            connection.send((message, search_id, agent.node_count))
+
+    while True:
+        try:
+            command, *args = connection.recv()
+        except (EOFError, OSError):
+            break
+
+        if command is AgentCommand.START:
+            search_id, board, player, turn_count, profile_dir = args
+            SearchProfiler.set_output_dir(profile_dir)
+            agent.start(board, player,
+                        on_find=lambda move, search_id=search_id: (
+                            send(AgentMessage.FIND, search_id, move, agent.node_count)),
+                        on_complete=lambda search_id=search_id: end(AgentMessage.COMPLETE, search_id))
+        elif command is AgentCommand.PONDER:
+            search_id, board, player, turn_count, profile_dir = args
+            SearchProfiler.set_output_dir(profile_dir)
+            agent.ponder(board, player,
+                         on_find=lambda opponent_move, move, search_id=search_id: (
+                             send(AgentMessage.REFUTATION, search_id, opponent_move, move, agent.node_count)),
+                         on_complete=lambda search_id=search_id: end(AgentMessage.COMPLETE, search_id))
+        elif command is AgentCommand.STOP:
+            agent.stop()
+            # wait for the search to exit, as some agents complete stopped searches and others do not
+            deadline = time() + STOP_TIMEOUT
+            while agent.is_searching and time() < deadline:
+                sleep(1 / FPS)
+            end(AgentMessage.STOPPED, search_id)
+        elif command is AgentCommand.TOGGLE_PAUSED:
+            agent.toggle_paused()
+        elif command is AgentCommand.APPLY_MOVE:
+            agent.apply_move(*args)
+        elif command is AgentCommand.SET_HEURISTIC_TYPE:
+            agent.set_heuristic_type(*args)
+        elif command is AgentCommand.SET_DEPTH_LIMIT:
+            agent.set_depth_limit(*args)
+        elif command is AgentCommand.SET_SYMMETRIC_HASHING:
+            agent.set_symmetric_hashing(*args)
+        elif command is AgentCommand.SET_BATCH_LEAVES:
+            agent.set_batch_leaves(*args)
+        elif command is AgentCommand.CLOSE:
+            break
+
+    agent.stop()
+    connection.close()
+
+
+class RemoteAgent(BaseAgent):
+    """
+    An agent that runs another agent in a worker process.
+    Opening book and position database probes are answered in the calling process, and
+    callbacks are called from a listener thread, as they would be from a search thread.
+    """
+
+    def __init__(self, agent_class: type):
+        """
+        Launches the worker process.
+        :param agent_class: the BaseAgent subclass to host
+        """
+        super().__init__()
+        context = multiprocessing.get_context("spawn")
+        self._connection, worker_connection = context.Pipe()
+        self._process = context.Process(target=agent_host, args=(worker_connection, agent_class), daemon=True)
+        self._process.start()
+        worker_connection.close()
+
+        self._send_lock = Lock()
+        # the current search as a tuple of (search id, on_find, on_complete, pondered board)
+        self._search = (0, None, None, None)
+        self._completed_search_id = 0
+        self._node_count = 0
+
+        self._listener = Thread(target=self._listen, daemon=True)
+        self._listener.start()
+
+    @property
+    def is_searching(self) -> bool:
+        return self._completed_search_id != self._search[0]
+
+    @property
+    def node_count(self) -> int:
+        return self._node_count
+
+    def _send(self, command: AgentCommand, *args):
+        try:
+            with self._send_lock:
+                self._connection.send((command, *args))
+        except (BrokenPipeError, OSError):
+            Debug.log(f"remote agent worker is gone, dropped {command.name}", DebugType.Warning)
+
+    def _start_search(self, command: AgentCommand, board: Board, player: Color,
+                      on_find: callable, on_complete: callable):
+        search_id = self._search[0] + 1
+        self._search = (search_id, on_find, on_complete,
+                        deepcopy(board) if command is AgentCommand.PONDER else None)
+        self._send(command, search_id, board, player, Heuristic.get_turn_count(), SearchProfiler.get_output_dir())
+
+    def start(self, board: Board, player: Color, on_find: callable, on_complete: callable):
+        if self._answer_without_search(board, player, on_find, on_complete):
+            return
+        self._start_search(AgentCommand.START, board, player, on_find, on_complete)
+
+    def stop(self):
+        self._send(AgentCommand.STOP)
+
+    def toggle_paused(self):
+        self._send(AgentCommand.TOGGLE_PAUSED)
+
+    def apply_move(self, move: Move):
+        self._send(AgentCommand.APPLY_MOVE, move)
+
+    def set_heuristic_type(self, heuristic_type: HeuristicType):
+        self._send(AgentCommand.SET_HEURISTIC_TYPE, heuristic_type)
+
+    def set_depth_limit(self, depth: int):
+        self._send(AgentCommand.SET_DEPTH_LIMIT, depth)
+
+    def set_symmetric_hashing(self, symmetric: bool):
+        super().set_symmetric_hashing(symmetric)
+        self._send(AgentCommand.SET_SYMMETRIC_HASHING, symmetric)
+
+    def set_batch_leaves(self, batch_leaves: bool):
+        self._send(AgentCommand.SET_BATCH_LEAVES, batch_leaves)
+
+    def close(self):
+        self._send(AgentCommand.CLOSE)
+        self._process.join(CLOSE_TIMEOUT)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._connection.close()
+
+    def _listen(self):
+        """
+        Receives messages from the worker process until it exits, calling back the current search.
+        """
+        while True:
+            try:
+                message, search_id, *args = self._connection.recv()
+            except (EOFError, OSError):
+                break
+
+            self._node_count = args[-1]
+            current_search_id, on_find, on_complete, pondered_board = self._search
+            if search_id != current_search_id:
+                continue
+
+            if message is AgentMessage.FIND:
+                on_find and on_find(args[0])
+            elif message is AgentMessage.REFUTATION:
+                self._receive_refutation(pondered_board, *args[:2])
+                on_find and on_find(*args[:2])
+            elif message is AgentMessage.COMPLETE:
+                self._completed_search_id = search_id
+                on_complete and on_complete()
+            elif message is AgentMessage.STOPPED:
+                self._completed_search_id = search_id
+
+    def _receive_refutation(self, board: Board, opponent_move: Move, refutation_move: Move):
+        """
+        Handles a refutation found while pondering.
+        """
+
+
+class RemotePonderingAgent(RemoteAgent, PonderingAgent):
+    """
+    A remote agent for a pondering agent.
+    Refutations found by the worker are cached in this process's refutation table, so that
+    `get_refutation_move` answers without a round trip.
+    """
+
+    def ponder(self, board: Board, player: Color,
+               on_find: callable = None, on_complete: callable = None):
+        self.clear_refutation_table()
+        self._start_search(AgentCommand.PONDER, board, player, on_find, on_complete)
+
+    def _receive_refutation(self, board: Board, opponent_move: Move, refutation_move: Move):
+        board = deepcopy(board)
+        board.apply_move(opponent_move)
+        self.set_refutation_move(board, refutation_move)
@@ -0,0 +1,43 @@
+"""
+Defines the search statistics shared by the search implementations.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class SearchStats:
+    """
+    Models the counters of a search.
+    Nodes are counted as they are enumerated, and pruned nodes are the enumerated
+    nodes that were skipped by a cutoff.
+    """
+    num_nodes: int = 0
+    num_nodes_pruned: int = 0
+    num_plies_expanded: int = 0
+    num_tt_reads: int = 0
+    num_tt_hits: int = 0
+
+    @property
+    def prune_rate(self) -> float:
+        return self.num_nodes_pruned / (self.num_nodes or 1)
+
+    @property
+    def tt_hit_rate(self) -> float:
+        return self.num_tt_hits / (self.num_tt_reads or 1)
+
+    @property
+    def branching_factor(self) -> float:
+        """
+        Gets the average number of nodes enumerated per expanded node.
+        :return: a float
+        """
+        return self.num_nodes / (self.num_plies_expanded or 1)
+
+    @property
+    def effective_branching_factor(self) -> float:
+        """
+        Gets the average number of nodes explored, i.e. not pruned, per expanded node.
+        :return: a float
+        """
+        return (self.num_nodes - self.num_nodes_pruned) / (self.num_plies_expanded or 1)
@@ -1,5 +1,12 @@
-from agent.zobrist.hashing import create_board_hash, update_board_hash
+from agent.zobrist.hashing import create_board_hash, create_position_hash, update_board_hash
+from agent.zobrist.symmetry import (create_canonical_board_hash, create_canonical_position_hash,
+                                    create_symmetric_board_hash, update_symmetric_board_hash)
 
 class Zobrist:
     create_board_hash = create_board_hash
+    create_position_hash = create_position_hash
     update_board_hash = update_board_hash
+    create_symmetric_board_hash = create_symmetric_board_hash
+    update_symmetric_board_hash = update_symmetric_board_hash
+    create_canonical_board_hash = create_canonical_board_hash
+    create_canonical_position_hash = create_canonical_position_hash
@@ -1,34 +1,43 @@
 
+from core.color import Color
 from core.hex import Hex
-from agent.zobrist.setup import zobrist_table, cell_table
+from agent.zobrist.setup import zobrist_table, cell_table, player_mask
 
 
-def _get_piece_mask(cell, color):
+def _get_piece_mask(cell, color, table=zobrist_table):
     piece_hash = _hash_piece(cell, color)
     try:
-        return zobrist_table[piece_hash]
+        return table[piece_hash]
     except KeyError:
         return 0
 
 def _hash_piece(cell, color):
     try:
-        return cell_table[cell] * color.value
+        return cell_table[cell] + (color.value - 1) * len(cell_table)
     except AttributeError:
         return 0
 
-def create_board_hash(board):
+def create_board_hash(board, table=zobrist_table):
     """
     Creates a Zobrist hash with the given board.
+    :param table: the piece keys to hash with, e.g. the wide keys of `agent.zobrist.symmetry`
     """
     board_hash = 0
     for cell, color in board.enumerate_nonempty():
-        board_hash ^= _get_piece_mask(cell, color)
+        board_hash ^= _get_piece_mask(cell, color, table)
     return board_hash
 
-def update_board_hash(hash, board, move):
+def create_position_hash(board, player):
+    """
+    Creates a Zobrist hash with the given board and player to move.
+    """
+    return create_board_hash(board) ^ (player_mask if player == Color.WHITE else 0)
+
+def update_board_hash(hash, board, move, table=zobrist_table):
     """
     Updates a Zobrist hash with the given move.
     Foregoes move validation in favor of speed.
+    :param table: the piece keys the hash was created with
     """
     move_tail = move.get_back() or move.selection.start
     move_cells = move.get_cells()
@@ -36,10 +45,10 @@ def update_board_hash(hash, board, move):
     attacker_color = board[move_tail] if move_tail in board else None
 
     for cell in move_cells:
-        hash ^= _get_piece_mask(cell, attacker_color)
+        hash ^= _get_piece_mask(cell, attacker_color, table)
 
     for target in move_targets:
-        hash ^= _get_piece_mask(target, attacker_color)
+        hash ^= _get_piece_mask(target, attacker_color, table)
 
     if not move.is_inline():
         return hash
@@ -48,7 +57,7 @@ def update_board_hash(hash, board, move):
     defender_color = board[move_dest] if move_dest in board else None
 
     if defender_color is not None:
-        hash ^= _get_piece_mask(move_dest, defender_color)
+        hash ^= _get_piece_mask(move_dest, defender_color, table)
 
         push_dest = move_dest
         push_content = defender_color
@@ -57,6 +66,6 @@ def update_board_hash(hash, board, move):
             push_content = board[push_dest] if push_dest in board else None
 
         if push_content is not None:
-            hash ^= _get_piece_mask(push_dest, defender_color)
+            hash ^= _get_piece_mask(push_dest, defender_color, table)
 
     return hash
@@ -1,9 +1,12 @@
-from random import getrandbits
+from random import Random
 from core.board import Board
 
 
 ZOBRIST_BITS = 64
 
+# keys are persisted by the position database and opening book, so they must not change between runs
+ZOBRIST_SEED = 3981
+
 
 def _setup_cell_table():
     table = {}
@@ -15,12 +18,15 @@ def _setup_cell_table():
 cell_table = _setup_cell_table()
 
 
-def _setup_zobrist(num_bits):
+def _setup_zobrist(num_bits, rng):
     table = {}
     for i in range(2):
-        piece_index = i + 1
         for _, cell_index in cell_table.items():
-            table[cell_index * piece_index] = getrandbits(num_bits)
+            table[cell_index + i * len(cell_table)] = rng.getrandbits(num_bits)
     return table
 
-zobrist_table = _setup_zobrist(num_bits=ZOBRIST_BITS)
+_rng = Random(ZOBRIST_SEED)
+zobrist_table = _setup_zobrist(num_bits=ZOBRIST_BITS, rng=_rng)
+
+# distinguishes positions with white to move from the same board with black to move
+player_mask = _rng.getrandbits(ZOBRIST_BITS)
@@ -0,0 +1,226 @@
+"""
+Canonicalizes positions under the symmetries of the hexagonal board.
+
+The board has 12 symmetries: six rotations about the center cell, each with or without a
+reflection. The hashes of a board's 12 images are packed into one wide integer, one 64-bit lane
+per symmetry, so that they are created and updated by the same XORs as a single hash. The least
+lane is the board's canonical hash, and its index is the symmetry mapping the board to its
+canonical image, through which moves are mapped into the canonical frame and back.
+
+Positions, which include the player to move, also map onto their color-swapped images: swapping
+the color of every marble and the player to move gives an equivalent position, e.g. the STANDARD
+layout is a half turn of its color-swapped image. Position symmetries are numbered 0..23, those
+from 12 up swapping colors.
+"""
+
+from __future__ import annotations
+
+from core.board import Board
+from core.color import Color
+from core.constants import BOARD_SIZE
+from core.hex import Hex, HexDirection
+from core.move import Move
+from core.selection import Selection
+from agent.zobrist.hashing import create_board_hash, update_board_hash
+from agent.zobrist.setup import ZOBRIST_BITS, cell_table, player_mask, zobrist_table
+
+NUM_ROTATIONS = 6
+NUM_SYMMETRIES = NUM_ROTATIONS * 2
+NUM_POSITION_SYMMETRIES = NUM_SYMMETRIES * 2
+
+LANE_MASK = (1 << ZOBRIST_BITS) - 1
+CENTER = Hex(BOARD_SIZE - 1, BOARD_SIZE - 1)
+CELLS = sorted(cell_table, key=cell_table.get)
+
+
+def _transform_vector(x: int, y: int, symmetry: int) -> tuple[int, int]:
+    """
+    Reflects an axial vector across the axis through the center if the symmetry includes
+    a reflection, then rotates it by the symmetry's number of sixth turns.
+    """
+    if symmetry >= NUM_ROTATIONS:
+        x, y = y, x
+    for _ in range(symmetry % NUM_ROTATIONS):
+        x, y = -y, x + y
+    return x, y
+
+
+def _transform_cell(cell: Hex, symmetry: int) -> Hex:
+    x, y = _transform_vector(cell.x - CENTER.x, cell.y - CENTER.y, symmetry)
+    return Hex(x + CENTER.x, y + CENTER.y)
+
+
+def _setup_symmetry_tables():
+    """
+    Precomputes the cell and direction permutations of each board symmetry, and their inverses.
+    :return: a tuple of (cell tables mapping cell indices to image cell indices,
+             direction tables mapping HexDirections to image HexDirections,
+             the inverse of each symmetry)
+    """
+    cell_tables = [[cell_table[_transform_cell(cell, symmetry)] for cell in CELLS]
+                   for symmetry in range(NUM_SYMMETRIES)]
+    direction_tables = [{direction: HexDirection.resolve(Hex(*_transform_vector(
+                            direction.value.x, direction.value.y, symmetry)))
+                         for direction in HexDirection}
+                        for symmetry in range(NUM_SYMMETRIES)]
+    inverses = [next(inverse for inverse in range(NUM_SYMMETRIES)
+                     if all(cell_tables[inverse][image] == index
+                            for index, image in enumerate(cell_tables[symmetry])))
+                for symmetry in range(NUM_SYMMETRIES)]
+    return cell_tables, direction_tables, inverses
+
+CELL_TABLES, DIRECTION_TABLES, INVERSE_SYMMETRIES = _setup_symmetry_tables()
+
+
+def _swap_piece_color(piece: int) -> int:
+    num_cells = len(CELLS)
+    return piece + num_cells if piece < num_cells else piece - num_cells
+
+
+def _transform_piece(piece: int, symmetry: int) -> int:
+    """
+    Maps a piece index, as hashed by `agent.zobrist.hashing`, through a position symmetry.
+    """
+    num_cells = len(CELLS)
+    image = CELL_TABLES[symmetry % NUM_SYMMETRIES][piece % num_cells] + piece // num_cells * num_cells
+    return _swap_piece_color(image) if symmetry >= NUM_SYMMETRIES else image
+
+
+def _setup_wide_tables():
+    """
+    Packs the keys of each piece's images into wide keys, one lane per symmetry.
+    :return: a tuple of (the wide piece keys of the board symmetries,
+             the wide piece keys of the position symmetries,
+             the wide player keys of the position symmetries, indexed by color value - 1)
+    """
+    board_table = {}
+    position_table = {}
+    for piece in zobrist_table:
+        position_key = 0
+        for symmetry in range(NUM_POSITION_SYMMETRIES):
+            position_key |= zobrist_table[_transform_piece(piece, symmetry)] << symmetry * ZOBRIST_BITS
+        position_table[piece] = position_key
+        board_table[piece] = position_key & (1 << NUM_SYMMETRIES * ZOBRIST_BITS) - 1
+
+    player_keys = []
+    for player in (Color.BLACK, Color.WHITE):
+        player_key = 0
+        for symmetry in range(NUM_POSITION_SYMMETRIES):
+            image_player = Color.next(player) if symmetry >= NUM_SYMMETRIES else player
+            if image_player == Color.WHITE:
+                player_key |= player_mask << symmetry * ZOBRIST_BITS
+        player_keys.append(player_key)
+    return board_table, position_table, player_keys
+
+BOARD_SYMMETRY_TABLE, POSITION_SYMMETRY_TABLE, POSITION_SYMMETRY_PLAYER_KEYS = _setup_wide_tables()
+
+
+def create_symmetric_board_hash(board: Board) -> int:
+    """
+    Creates the wide hash of a board's 12 images.
+    Its lowest lane is the board's own Zobrist hash.
+    :param board: a Board
+    :return: an int
+    """
+    return create_board_hash(board, BOARD_SYMMETRY_TABLE)
+
+
+def update_symmetric_board_hash(symmetric_hash: int, board: Board, move: Move) -> int:
+    """
+    Updates the wide hash of a board's 12 images with the given move.
+    :param symmetric_hash: a wide hash from `create_symmetric_board_hash`
+    :param board: the Board before the move
+    :param move: a Move
+    :return: an int
+    """
+    return update_board_hash(symmetric_hash, board, move, BOARD_SYMMETRY_TABLE)
+
+
+def get_canonical_hash(symmetric_hash: int, num_symmetries: int = NUM_SYMMETRIES) -> tuple[int, int]:
+    """
+    Finds the least lane of a wide hash.
+    :param symmetric_hash: a wide hash
+    :param num_symmetries: the number of lanes in the hash
+    :return: a tuple of (the canonical hash, the symmetry mapping the hashed board to its canonical image)
+    """
+    canonical_hash = symmetric_hash & LANE_MASK
+    canonical_symmetry = 0
+    for symmetry in range(1, num_symmetries):
+        symmetric_hash >>= ZOBRIST_BITS
+        lane = symmetric_hash & LANE_MASK
+        if lane < canonical_hash:
+            canonical_hash = lane
+            canonical_symmetry = symmetry
+    return canonical_hash, canonical_symmetry
+
+
+def create_canonical_board_hash(board: Board) -> tuple[int, int]:
+    """
+    Creates the canonical hash of a board, the least hash of its 12 images.
+    :param board: a Board
+    :return: a tuple of (the canonical hash, the symmetry mapping the board to its canonical image)
+    """
+    return get_canonical_hash(create_symmetric_board_hash(board))
+
+
+def create_canonical_position_hash(board: Board, player: Color) -> tuple[int, int]:
+    """
+    Creates the canonical hash of a position, the least hash of its 24 images.
+    Lane 0 is the position's own hash from `create_position_hash`.
+    :param board: a Board
+    :param player: the Color to move
+    :return: a tuple of (the canonical hash, the position symmetry mapping the position to its canonical image)
+    """
+    symmetric_hash = (create_board_hash(board, POSITION_SYMMETRY_TABLE)
+                      ^ POSITION_SYMMETRY_PLAYER_KEYS[player.value - 1])
+    return get_canonical_hash(symmetric_hash, NUM_POSITION_SYMMETRIES)
+
+
+def invert_symmetry(symmetry: int) -> int:
+    """
+    Finds the symmetry that undoes a board or position symmetry.
+    :param symmetry: a symmetry index
+    :return: a symmetry index
+    """
+    return INVERSE_SYMMETRIES[symmetry % NUM_SYMMETRIES] + symmetry // NUM_SYMMETRIES * NUM_SYMMETRIES
+
+
+def transform_move(move: Move, symmetry: int) -> Move:
+    """
+    Maps a move through a board or position symmetry.
+    :param move: a Move
+    :param symmetry: a symmetry index
+    :return: a Move
+    """
+    symmetry %= NUM_SYMMETRIES
+    selection = move.selection
+    return Move(
+        selection=Selection(_transform_cell(selection.start, symmetry),
+                            _transform_cell(selection.get_head(), symmetry)),
+        direction=DIRECTION_TABLES[symmetry][move.direction],
+    )
+
+
+def transform_player(player: Color, symmetry: int) -> Color:
+    """
+    Maps the player to move through a position symmetry.
+    :param player: a Color
+    :param symmetry: a position symmetry index
+    :return: a Color
+    """
+    return Color.next(player) if symmetry >= NUM_SYMMETRIES else player
+
+
+def transform_cell_values(values: list[int], symmetry: int) -> list[int]:
+    """
+    Maps cell values in storage order, as from `Board.to_flat_array`, through a board or position symmetry.
+    :param values: a list of ints of domain 0..2
+    :param symmetry: a symmetry index
+    :return: a list of ints of domain 0..2
+    """
+    cells = CELL_TABLES[symmetry % NUM_SYMMETRIES]
+    swap = symmetry >= NUM_SYMMETRIES
+    image_values = [0] * len(values)
+    for index, value in enumerate(values):
+        image_values[cells[index]] = 3 - value if swap and value else value
+    return image_values
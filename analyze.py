@@ -0,0 +1,47 @@
+"""
+Analyzes many positions in parallel, writing one JSON line per position.
+
+Usage: python analyze.py archive debug.json Test1.input suites/tactics.apd --depth 3 --output analysis.jsonl
+where each path is a game record (.agr), a directory of game records, a history dump (.json),
+a state file (.input) or a position suite. Positions from games report the move played and
+the score it lost, so that blunders can be found by sorting on `loss`.
+"""
+
+import sys
+from argparse import ArgumentParser
+
+from headless.analysis import analyze_paths
+from ui.model.heuristic_type import HeuristicType
+
+
+def _parse_args():
+    parser = ArgumentParser(description="Analyzes positions from games, state files and position suites.")
+    parser.add_argument("paths", nargs="+", help="game records, directories of them, history dumps, "
+                                                 "state files or position suites")
+    parser.add_argument("--heuristic", type=lambda name: HeuristicType[name.upper()],
+                        default=HeuristicType.BRANDON_OFFENSIVE, help="the heuristic to search with")
+    parser.add_argument("-d", "--depth", type=int, default=None,
+                        help="the depth to search each position to (default: 2, or unbounded with --time)")
+    parser.add_argument("-t", "--time", type=float, default=None, help="the seconds to search each position for")
+    parser.add_argument("-o", "--output", default=None, help="the JSONL file to write (default: stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show search logs")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    file = open(args.output, mode="w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for result in analyze_paths(args.paths, args.heuristic, depth=args.depth, time_limit=args.time,
+                                    num_workers=args.workers, verbose=args.verbose):
+            file.write(result.to_json() + "\n")
+            file.flush()
+    finally:
+        if file is not sys.stdout:
+            file.close()
+
+
+if __name__ == "__main__":
+    main()
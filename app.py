@@ -1,5 +1,8 @@
+from multiprocessing import freeze_support
+
 from ui.app import App
 
 if __name__ == "__main__":
+    freeze_support()
     app = App()
     app.run_game()
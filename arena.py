@@ -0,0 +1,120 @@
+"""
+Plays headless self-play matches between two agent configurations.
+
+Usage: python arena.py BRANDON:BRANDON_OFFENSIVE:10 BRANDON_PONDERER:DYNAMIC:5:3 --games 20
+where each config is written as AGENT[:HEURISTIC[:TIME[:DEPTH]]].
+
+With --sprt ELO0 ELO1, games are played until a sequential probability ratio test
+accepts either hypothesis, recording each game to --results so the run can be resumed.
+"""
+
+import os
+from argparse import ArgumentParser
+
+from core.board_layout import BoardLayout
+from core.color import Color
+from headless.game_runner import PlayerConfig
+from headless.match import MATCH_LAYOUTS, GameSpec, MatchResult, play_games
+from headless.sprt import SprtRun, SprtStatus, SprtTest
+
+
+def _parse_args():
+    parser = ArgumentParser(description="Plays headless games between two agent configurations.")
+    parser.add_argument("config_a", type=PlayerConfig.parse, help="AGENT[:HEURISTIC[:TIME[:DEPTH]]]")
+    parser.add_argument("config_b", type=PlayerConfig.parse, help="AGENT[:HEURISTIC[:TIME[:DEPTH]]]")
+    parser.add_argument("-n", "--games", type=int, default=None,
+                        help="number of games, played in color-swapped pairs (default: 12, or 1000 with --sprt)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--move-limit", type=int, default=40, help="moves per player before a game ends")
+    parser.add_argument("--layouts", nargs="+", type=lambda name: BoardLayout[name.upper()],
+                        default=MATCH_LAYOUTS, help="board layouts to cycle through")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random opening moves")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show search logs")
+    parser.add_argument("--sprt", nargs=2, type=float, metavar=("ELO0", "ELO1"),
+                        help="stop once an SPRT accepts either Elo difference")
+    parser.add_argument("--alpha", type=float, default=0.05, help="SPRT false positive rate")
+    parser.add_argument("--beta", type=float, default=0.05, help="SPRT false negative rate")
+    parser.add_argument("--results", default="sprt_results.jsonl",
+                        help="SPRT results file, resumed if it exists")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="SPRT games scheduled at a time (default: two per worker)")
+    return parser.parse_args()
+
+
+def _format_elo(elo, lower, upper):
+    return f"{elo:+.1f} [{lower:+.1f}, {upper:+.1f}]"
+
+
+def _format_game(spec, result, match):
+    return (f"game {spec.index + 1} ({spec.layout.name}{', swapped' if spec.swapped else ''}):"
+          f" {result.scores[Color.BLACK]}-{result.scores[Color.WHITE]} in {result.num_plies} plies"
+          f" -> W/D/L {match.wins}/{match.draws}/{match.losses}")
+
+
+def _print_summary(args, match):
+    print(f"W/D/L: {match.wins}/{match.draws}/{match.losses}")
+    print(f"Elo difference (95%): {_format_elo(*match.elo())}")
+    for config, stats in zip((args.config_a, args.config_b), match.stats):
+        print(f"{config}: {stats.nodes_per_second:.0f} nodes/s, {stats.time_per_move:.2f}s/move")
+
+
+def run_match(args):
+    """
+    Plays a fixed number of games.
+    """
+    args.games = args.games or 12
+    specs = GameSpec.schedule(0, args.games + args.games % 2, layouts=tuple(args.layouts), seed=args.seed)
+    match = MatchResult()
+
+    print(f"{args.config_a} vs {args.config_b}: {len(specs)} games")
+    for spec, result in play_games(args.config_a, args.config_b, specs,
+                                   num_workers=args.workers, move_limit=args.move_limit,
+                                   verbose=args.verbose):
+        match.add(spec, result)
+        print(_format_game(spec, result, match))
+
+    _print_summary(args, match)
+
+
+def run_sprt(args):
+    """
+    Plays games until an SPRT accepts either hypothesis.
+    """
+    elo0, elo1 = args.sprt
+    test = SprtTest(elo0=elo0, elo1=elo1, alpha=args.alpha, beta=args.beta)
+    run = SprtRun(args.config_a, args.config_b, test, file_path=args.results,
+                  layouts=tuple(args.layouts), seed=args.seed, move_limit=args.move_limit)
+    run.load()
+
+    lower, upper = test.bounds
+    status = test.status(run.match)
+    print(f"{args.config_a} vs {args.config_b}: SPRT elo0={elo0:g} elo1={elo1:g}"
+          f" alpha={args.alpha:g} beta={args.beta:g}, LLR bounds [{lower:.2f}, {upper:.2f}]")
+    if run.match.num_games:
+        print(f"resuming from {args.results} after {run.match.num_games} games,"
+              f" LLR {test.llr(run.match):.2f}")
+
+    batch_size = args.batch_size or 2 * (args.workers or os.cpu_count() or 1)
+    for spec, result, status in run.run(max_games=args.games or 1000, batch_size=batch_size,
+                                        num_workers=args.workers, verbose=args.verbose):
+        print(f"{_format_game(spec, result, run.match)}, LLR {test.llr(run.match):.2f}")
+
+    _print_summary(args, run.match)
+    print({
+        SprtStatus.ACCEPT_H0: f"H0 accepted: {args.config_a} is closer to {elo0:g} than {elo1:g} Elo stronger",
+        SprtStatus.ACCEPT_H1: f"H1 accepted: {args.config_a} is closer to {elo1:g} than {elo0:g} Elo stronger",
+        SprtStatus.CONTINUE: "No hypothesis accepted within the game limit",
+    }[status])
+
+
+def main():
+    args = _parse_args()
+    if args.sprt:
+        run_sprt(args)
+    else:
+        run_match(args)
+
+
+if __name__ == "__main__":
+    main()
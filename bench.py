@@ -0,0 +1,54 @@
+"""
+Runs the micro-benchmark suite and saves or compares against a JSON baseline.
+
+Usage: python bench.py [--save bench_baseline.json] [--compare bench_baseline.json] [--only NAME ...]
+"""
+
+import sys
+from argparse import ArgumentParser
+
+from benchmark.micro import (DEFAULT_REPEAT, DEFAULT_THRESHOLD,
+                             compare_results, load_results, run_benchmarks, save_results)
+from headless.match import init_worker
+
+
+def _parse_args():
+    parser = ArgumentParser(description="Times the hot paths of the engine on fixed benchmark positions.")
+    parser.add_argument("--save", metavar="FILE", help="save results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare results against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown flagged as a regression (default: 0.1)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed repeats per benchmark")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="run benchmarks whose names contain NAME")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show search logs")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    init_worker(args.verbose)
+
+    baseline = load_results(args.compare) if args.compare else {}
+    num_regressions = 0
+
+    def print_result(result):
+        nonlocal num_regressions
+        line = f"{result.name:<40} {result.time_per_call * 1e6:>10.2f} us/call"
+        for _, ratio, regressed in compare_results(baseline, [result], args.threshold):
+            line += f"  {ratio:>6.2f}x baseline"
+            if regressed:
+                line += "  REGRESSION"
+                num_regressions += 1
+        print(line)
+
+    results = run_benchmarks(args.only, repeat=args.repeat, on_result=print_result)
+    if args.save:
+        save_results(args.save, results)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        print(f"{num_regressions} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1 if num_regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Measures the memory use of searches with tracemalloc.
+
+Usage: python bench_memory.py [--searches BRANDON DEFAULT] [--depth 2]
+       python bench_memory.py --self-play BRANDON:BRANDON_OFFENSIVE:2 BRANDON_PONDERER:DYNAMIC:2 --move-limit 20
+"""
+
+from argparse import ArgumentParser
+
+from benchmark.memory import profile_search, profile_self_play
+from benchmark.positions import load_positions
+from benchmark.search import SEARCH_PLY_INTERVAL, SearchType
+from core.board_layout import BoardLayout
+from headless.game_runner import PlayerConfig
+from headless.match import init_worker
+
+
+def _parse_args():
+    parser = ArgumentParser(description="Measures the memory use of searches.")
+    parser.add_argument("--searches", nargs="+", type=lambda name: SearchType[name.upper()],
+                        default=list(SearchType), help="searches to measure (default: all)")
+    parser.add_argument("--depth", type=int, default=2, help="the fixed depth to search to")
+    parser.add_argument("--positions", type=int, default=4, help="the number of benchmark positions")
+    parser.add_argument("--self-play", nargs=2, type=PlayerConfig.parse, metavar="CONFIG",
+                        help="play a game between two AGENT[:HEURISTIC[:TIME[:DEPTH]]] configs instead")
+    parser.add_argument("--layout", type=lambda name: BoardLayout[name.upper()], default=BoardLayout.BELGIAN_DAISY,
+                        help="the self-play layout")
+    parser.add_argument("--move-limit", type=int, default=20, help="self-play moves per player")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show search logs")
+    return parser.parse_args()
+
+
+def _format_size(size):
+    return f"{size / 1024:,.0f} KiB"
+
+
+def run_searches(args):
+    # skip the starting layouts, which are quiescent and searched to depth 1
+    positions = load_positions(SEARCH_PLY_INTERVAL)[3:3 + args.positions]
+    for search_type in args.searches:
+        for position in positions:
+            report = profile_search(search_type, position, args.depth)
+            print(f"{report.name}: peak {_format_size(report.peak_size)},"
+                  f" {report.peak_blocks} blocks at peak ({report.blocks_per_node:.1f}/node over"
+                  f" {report.num_nodes} nodes)")
+            for name, size in report.table_sizes.items():
+                print(f"  {name}: {_format_size(size)} retained")
+            for site, size, num_blocks in report.top_sites:
+                print(f"  {_format_size(size):>10} {num_blocks:>7} blocks  {site}")
+
+
+def run_self_play(args):
+    black, white = args.self_play
+    print(f"{black} vs {white} on {args.layout.name}")
+    reports = profile_self_play(args.layout, black, white, move_limit=args.move_limit)
+    for report in reports:
+        tables = ", ".join(f"{name} {_format_size(size)}" for name, size in report.table_sizes.items())
+        print(f"ply {report.ply:>3}: traced {_format_size(report.traced_size)}  {tables}")
+
+    if len(reports) > 2:
+        # compare the second half of the game to the first, past the opening allocations
+        half = len(reports) // 2
+        num_plies = len(reports) - 1 - half
+        growth = reports[-1].traced_size - reports[half].traced_size
+        table_growth = sum(reports[-1].table_sizes.values()) - sum(reports[half].table_sizes.values())
+        print(f"traced memory growth over the second half: {_format_size(growth / num_plies)}/ply,"
+              f" {_format_size((growth - table_growth) / num_plies)}/ply outside the tables")
+
+
+def main():
+    args = _parse_args()
+    init_worker(args.verbose)
+
+    if args.self_play:
+        run_self_play(args)
+    else:
+        run_searches(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Runs the search benchmark and saves or compares against a JSON baseline.
+
+Usage: python bench_search.py [--depths 1 2 3] [--times 0.5 2] [--batch-leaves] [--save FILE] [--compare FILE]
+The last line printed is the bench signature, the total nodes of all fixed-depth searches.
+Pass --batch-leaves to time batched leaf evaluation against a baseline saved without it.
+"""
+
+import sys
+from argparse import ArgumentParser
+from itertools import groupby
+
+from agent.heuristics.batch import BATCH_AVAILABLE
+from agent.search_stats import SearchStats
+from benchmark.search import (DEFAULT_TIME_LIMITS, SearchType, get_bench_signature, get_reference_moves,
+                              load_runs, run_search_benchmarks, save_runs)
+from headless.match import init_worker
+
+
+def _parse_args():
+    parser = ArgumentParser(description="Benchmarks the searches at fixed depths and time budgets.")
+    parser.add_argument("--searches", nargs="+", type=lambda name: SearchType[name.upper()],
+                        default=list(SearchType), help="searches to benchmark (default: all)")
+    parser.add_argument("--depths", nargs="*", type=int, default=None,
+                        help="fixed depths (default: 1-4 for BRANDON, 1-3 for DEFAULT)")
+    parser.add_argument("--times", nargs="*", type=float, default=DEFAULT_TIME_LIMITS,
+                        help="time budgets in seconds (default: 0.5 2)")
+    parser.add_argument("--batch-leaves", action="store_true",
+                        help="evaluate the leaves of a node in one batch (requires NumPy)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show search logs")
+    parser.add_argument("--save", metavar="FILE", help="save runs as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="compare best moves and the bench signature against a JSON baseline")
+    args = parser.parse_args()
+    if args.batch_leaves and not BATCH_AVAILABLE:
+        parser.error("--batch-leaves requires NumPy")
+    return args
+
+
+def _format_stats(stats, time_taken):
+    return (f"{stats.num_nodes:>9} nodes {stats.num_nodes / (time_taken or 1):>8.0f} n/s"
+            f" tt {stats.tt_hit_rate * 100:>5.1f}% pruned {stats.prune_rate * 100:>5.1f}%"
+            f" ebf {stats.effective_branching_factor:>5.2f}")
+
+
+def main():
+    args = _parse_args()
+    init_worker(args.verbose)
+
+    baseline = {run.key: run for run in load_runs(args.compare)} if args.compare else {}
+
+    def print_run(run):
+        print(f"{run.key:<40} {_format_stats(run, run.time)} {run.time:>6.2f}s  {run.best_move}")
+
+    runs = run_search_benchmarks(args.searches, depths=args.depths, time_limits=args.times, on_run=print_run,
+                                 batch_leaves=args.batch_leaves)
+
+    # best moves match the baseline run if comparing, else the deepest Brandon search
+    reference_moves = get_reference_moves(runs)
+    print()
+    for (search, mode), group in groupby(runs, key=lambda run: (run.search, run.mode)):
+        group = list(group)
+        stats = SearchStats()
+        for run in group:
+            for field in vars(stats):
+                setattr(stats, field, getattr(stats, field) + getattr(run, field))
+        time_taken = sum(run.time for run in group)
+        num_matches = sum(run.best_move == (baseline[run.key].best_move if run.key in baseline
+                                            else reference_moves.get(run.position))
+                          for run in group)
+        print(f"{search + ' ' + mode:<20} {_format_stats(stats, time_taken)}"
+              f" best move {num_matches}/{len(group)}")
+
+    signature = get_bench_signature(runs)
+    if args.save:
+        save_runs(args.save, runs)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        # only the runs made by both are comparable
+        baseline_signature = get_bench_signature([baseline[run.key] for run in runs if run.key in baseline])
+        if signature != baseline_signature:
+            print(f"bench signature changed from {baseline_signature}")
+    print(f"bench: {signature}")
+    if args.compare and signature != baseline_signature:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Defines a tracemalloc harness for the memory use of searches.
+Fixed searches report peak memory, allocated blocks per node, the top allocation sites near
+the peak and the retained size of the search tables. Self-play games report memory and table
+sizes after every move to reveal growth across turns.
+
+CPython does not count allocations, only live blocks, so churn is measured as the blocks live
+at the sampled peak rather than the total number of allocations.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import tracemalloc
+from dataclasses import dataclass, field
+
+from benchmark.positions import Position
+from benchmark.search import SearchType
+from core.board_layout import BoardLayout
+from headless.game_runner import PlayerConfig, play_game
+
+SNAPSHOT_INTERVAL = 0.05
+NUM_TOP_SITES = 10
+
+# the attributes of searches and agents that hold tables across searches
+TABLE_ATTRIBUTES = ("_transposition_table", "_evaluation_cache", "_refutation_table")
+
+
+@dataclass
+class SearchMemoryReport:
+    """
+    Models the memory use of a fixed search.
+    """
+    name: str
+    num_nodes: int = 0
+    peak_size: int = 0
+    peak_blocks: int = 0
+    top_sites: list[tuple[str, int, int]] = field(default_factory=list)
+    table_sizes: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def blocks_per_node(self) -> float:
+        return self.peak_blocks / (self.num_nodes or 1)
+
+
+def get_retained_size(obj, seen: set = None) -> int:
+    """
+    Determines the size of an object and everything it references that has not been seen,
+    following containers, instance dicts and slots. Classes, modules and functions are not followed.
+    :param obj: an object
+    :param seen: the ids of objects already counted
+    :return: the size in bytes
+    """
+    seen = set() if seen is None else seen
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, type(sys), type(get_retained_size))):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        if hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+        for slot in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, slot):
+                stack.append(getattr(obj, slot))
+    return size
+
+
+def get_table_sizes(*owners) -> dict[str, int]:
+    """
+    Determines the retained size of each table held by the given searches or agents.
+    :param owners: searches or agents
+    :return: a dict mapping table names to sizes in bytes
+    """
+    table_sizes = {}
+    for owner in owners:
+        for name in TABLE_ATTRIBUTES:
+            table = getattr(owner, name, None)
+            if table is not None:
+                table_sizes[name] = table_sizes.get(name, 0) + get_retained_size(table)
+    return table_sizes
+
+
+class _PeakSnapshotSampler(threading.Thread):
+    """
+    Periodically snapshots traced memory, keeping the snapshot taken at the highest traced size.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self._stopped = threading.Event()
+        self.peak_size = 0
+        self.snapshot = None
+
+    def run(self):
+        while not self._stopped.wait(SNAPSHOT_INTERVAL):
+            self._sample()
+
+    def _sample(self):
+        size, _ = tracemalloc.get_traced_memory()
+        if size > self.peak_size:
+            self.peak_size = size
+            self.snapshot = tracemalloc.take_snapshot()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        self._sample()
+
+
+def _get_top_sites(snapshot, baseline) -> list[tuple[str, int, int]]:
+    """
+    Gets the allocation sites that grew the most from a baseline snapshot.
+    :return: a list of (site, size in bytes, number of blocks)
+    """
+    snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),
+                                       tracemalloc.Filter(False, threading.__file__)))
+    differences = snapshot.compare_to(baseline, "lineno")
+    return [(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size_diff, stat.count_diff)
+            for stat in differences[:NUM_TOP_SITES] if stat.size_diff > 0]
+
+
+def profile_search(search_type: SearchType, position: Position, depth: int) -> SearchMemoryReport:
+    """
+    Runs a fresh fixed-depth search under tracemalloc.
+    :param search_type: the SearchType to run
+    :param position: the Position to search
+    :param depth: the depth to search to
+    :return: a SearchMemoryReport
+    """
+    search = search_type.create_search()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.take_snapshot()
+        sampler = _PeakSnapshotSampler()
+        tracemalloc.reset_peak()
+        sampler.start()
+        run = search_type.run(position, depth=depth, search=search)
+        sampler.stop()
+        _, peak_size = tracemalloc.get_traced_memory()
+        snapshot = sampler.snapshot or tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    num_baseline_blocks = sum(stat.count for stat in baseline.statistics("filename"))
+    return SearchMemoryReport(
+        name=run.key,
+        num_nodes=run.num_nodes,
+        peak_size=peak_size,
+        peak_blocks=sum(stat.count for stat in snapshot.statistics("filename")) - num_baseline_blocks,
+        top_sites=_get_top_sites(snapshot, baseline),
+        table_sizes=get_table_sizes(search),
+    )
+
+
+@dataclass(frozen=True)
+class PlyMemoryReport:
+    """
+    Models the memory in use after a move of a self-play game.
+    """
+    ply: int
+    traced_size: int
+    table_sizes: dict[str, int]
+
+
+def profile_self_play(layout: BoardLayout, black: PlayerConfig, white: PlayerConfig,
+                      move_limit: int = 40, seed: int = 0) -> list[PlyMemoryReport]:
+    """
+    Plays a headless game under tracemalloc, reporting the memory in use after every move.
+    Memory that keeps growing with each turn beyond the search tables suggests a leak.
+    :return: a list of PlyMemoryReports
+    """
+    reports = []
+
+    def on_move(game, agents):
+        size, _ = tracemalloc.get_traced_memory()
+        owners = [owner for agent in agents.values() for owner in (agent, getattr(agent, "_search", None))]
+        reports.append(PlyMemoryReport(len(reports) + 1, size, get_table_sizes(*owners)))
+
+    tracemalloc.start()
+    try:
+        play_game(layout, black, white, move_limit=move_limit, seed=seed, on_move=on_move)
+    finally:
+        tracemalloc.stop()
+    return reports
@@ -0,0 +1,212 @@
+"""
+Defines micro-benchmarks for the hot paths of move generation, evaluation, hashing and parsing.
+Each benchmark times one operation over every benchmark position and reports the best
+time per call across repeats, so that results are comparable across runs and machines.
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import sys
+from copy import deepcopy
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable
+
+from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.state_generator import StateGenerator
+from agent.zobrist import Zobrist
+from benchmark.positions import Position, load_positions
+from parse.state_parser import StateParser
+from ui.model.heuristic_type import HeuristicType
+
+MIN_RUN_TIME = 0.2
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.1
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """
+    Models the timing of a benchmark.
+    """
+    name: str
+    num_calls: int
+    time_per_call: float
+
+    def to_dict(self) -> dict:
+        return {"num_calls": self.num_calls, "time_per_call": self.time_per_call}
+
+
+def _setup_benchmarks(positions: list[Position]) -> dict[str, tuple[Callable[[], None], int]]:
+    """
+    Creates a closure per benchmark that runs its operation over every position.
+    :param positions: a list of Positions
+    :return: a dict mapping benchmark names to (a closure, the number of calls it makes)
+    """
+    cases = [(position.board, position.player) for position in positions]
+    moves = [StateGenerator.enumerate_board(board, player) for board, player in cases]
+    hashes = [Zobrist.create_board_hash(board) for board, _ in cases]
+    texts = [f"{'b' if player.value == 1 else 'w'}\n{StateParser.convert_board_to_text(board)}"
+             for board, player in cases]
+    temp_board = deepcopy(positions[0].board)
+    num_moves = sum(map(len, moves))
+
+    def enumerate_board():
+        for board, player in cases:
+            StateGenerator.enumerate_board(board, player)
+
+    def generate():
+        for (board, _), board_moves in zip(cases, moves):
+            StateGenerator.generate(board, board_moves)
+
+    def copy_state():
+        for (board, _), board_moves in zip(cases, moves):
+            for _ in board_moves:
+                temp_board.copy_state(board)
+
+    def apply_move():
+        for (board, _), board_moves in zip(cases, moves):
+            for move in board_moves:
+                temp_board.copy_state(board)
+                temp_board.apply_move(move)
+
+    def is_valid_move():
+        for (board, player), board_moves in zip(cases, moves):
+            for move in board_moves:
+                board.is_valid_move(move, player)
+
+    def create_board_hash():
+        for board, _ in cases:
+            Zobrist.create_board_hash(board)
+
+    def update_board_hash():
+        for (board, _), board_moves, board_hash in zip(cases, moves, hashes):
+            for move in board_moves:
+                Zobrist.update_board_hash(board_hash, board, move)
+
+    def convert_board_to_text():
+        for board, _ in cases:
+            StateParser.convert_board_to_text(board)
+
+    def convert_text_to_state():
+        for text in texts:
+            StateParser.convert_text_to_state(text)
+
+    turn_count = 0
+    Heuristic.set_turn_count_handler(lambda: turn_count)
+
+    def call_heuristic(heuristic_type):
+        def call():
+            nonlocal turn_count
+            for position in positions:
+                turn_count = position.turn_count
+                heuristic_type.call(position.board, position.player)
+        return call
+
+    benchmarks = {
+        "StateGenerator.enumerate_board": (enumerate_board, len(cases)),
+        "StateGenerator.generate": (generate, len(cases)),
+        "Board.copy_state": (copy_state, num_moves),
+        "Board.apply_move": (apply_move, num_moves),  # includes a copy_state per move
+        "Board.is_valid_move": (is_valid_move, num_moves),
+        "Zobrist.create_board_hash": (create_board_hash, len(cases)),
+        "Zobrist.update_board_hash": (update_board_hash, num_moves),
+        "StateParser.convert_board_to_text": (convert_board_to_text, len(cases)),
+        "StateParser.convert_text_to_state": (convert_text_to_state, len(cases)),
+    }
+    for heuristic_type in HeuristicType:
+        benchmarks[f"HeuristicType.{heuristic_type.name}.call"] = (call_heuristic(heuristic_type), len(cases))
+    return benchmarks
+
+
+def _time(run: Callable[[], None], repeat: int) -> float:
+    """
+    Times a closure, calibrating the number of runs to take at least MIN_RUN_TIME per repeat.
+    :return: the best time per run across repeats, in seconds
+    """
+    number = 1
+    while True:
+        time_start = perf_counter()
+        for _ in range(number):
+            run()
+        time_taken = perf_counter() - time_start
+        if time_taken >= MIN_RUN_TIME:
+            break
+        number *= 2
+
+    best_time = time_taken
+    for _ in range(repeat - 1):
+        time_start = perf_counter()
+        for _ in range(number):
+            run()
+        best_time = min(best_time, perf_counter() - time_start)
+    return best_time / number
+
+
+def run_benchmarks(names: list[str] = None, repeat: int = DEFAULT_REPEAT,
+                   on_result: Callable[[BenchmarkResult], None] = None) -> list[BenchmarkResult]:
+    """
+    Runs the micro-benchmarks over the benchmark positions.
+    :param names: the names of benchmarks to run that contain any of these strs, else all benchmarks
+    :param repeat: the number of timed repeats per benchmark
+    :param on_result: a callback for each result as it completes
+    :return: a list of BenchmarkResults
+    """
+    positions = load_positions()
+    results = []
+    for name, (run, num_calls) in _setup_benchmarks(positions).items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        result = BenchmarkResult(name, num_calls, _time(run, repeat) / num_calls)
+        results.append(result)
+        if on_result:
+            on_result(result)
+    return results
+
+
+def save_results(file_path: str, results: list[BenchmarkResult]):
+    """
+    Saves benchmark results as a JSON baseline.
+    :param file_path: a str path to write to
+    :param results: a list of BenchmarkResults
+    """
+    baseline = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": {result.name: result.to_dict() for result in results},
+    }
+    with open(file_path, mode="w", encoding="utf-8") as file:
+        file.write(json.dumps(baseline, indent=2))
+
+
+def load_results(file_path: str) -> dict[str, BenchmarkResult]:
+    """
+    Loads benchmark results from a JSON baseline.
+    :param file_path: a str path to read from
+    :return: a dict mapping benchmark names to BenchmarkResults
+    """
+    with open(file_path, mode="r", encoding="utf-8") as file:
+        baseline = json.loads(file.read())
+    return {name: BenchmarkResult(name, result["num_calls"], result["time_per_call"])
+            for name, result in baseline["results"].items()}
+
+
+def compare_results(baseline: dict[str, BenchmarkResult], results: list[BenchmarkResult],
+                    threshold: float = DEFAULT_THRESHOLD) -> list[tuple[BenchmarkResult, float, bool]]:
+    """
+    Compares benchmark results against a baseline.
+    :param baseline: a dict mapping benchmark names to BenchmarkResults
+    :param results: a list of BenchmarkResults
+    :param threshold: the relative slowdown beyond which a result is a regression
+    :return: a list of (result, ratio of its time to the baseline's, whether it regressed)
+             for each result that is in the baseline
+    """
+    comparisons = []
+    for result in results:
+        if result.name not in baseline:
+            continue
+        ratio = result.time_per_call / baseline[result.name].time_per_call
+        comparisons.append((result, ratio, ratio > 1 + threshold))
+    return comparisons
@@ -0,0 +1,144 @@
+"""
+Defines the fixed, seeded positions that benchmarks are measured on.
+Positions are taken from the starting layouts and from replaying recorded game histories,
+which are stored in the same format as the App's history dump.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+from copy import deepcopy
+from dataclasses import dataclass
+
+from agent.zobrist import Zobrist
+from core.board import Board
+from core.board_layout import BoardLayout
+from core.color import Color
+from core.move import Move
+from ui.model.game_history import GameHistory, GameHistoryItem
+
+HISTORIES_PATH = os.path.join(os.path.dirname(__file__), "histories")
+BENCHMARK_LAYOUTS = (BoardLayout.STANDARD, BoardLayout.GERMAN_DAISY, BoardLayout.BELGIAN_DAISY)
+PLY_INTERVAL = 5
+# the number of seeds tried per layout for a recorded game that never repeats a position
+MAX_RECORD_ATTEMPTS = 20
+
+
+@dataclass(frozen=True)
+class Position:
+    """
+    Models a benchmark position and the player to move.
+    """
+    name: str
+    board: Board
+    player: Color
+    turn_count: int
+
+
+def load_history(file_path: str) -> tuple[BoardLayout, list[Move]]:
+    """
+    Loads a recorded game history.
+    :param file_path: a str path to a history dump
+    :return: a tuple of (the starting BoardLayout, the list of Moves played)
+    """
+    with open(file_path, mode="r", encoding="utf-8") as file:
+        layout_name, history_str = json.loads(file.read())
+    history = GameHistory.decode(history_str)
+    return BoardLayout[layout_name], [history[i].move for i in range(len(history))]
+
+
+def save_history(file_path: str, layout: BoardLayout, moves: list[Move]):
+    """
+    Saves a game history in the App's history dump format, without move times.
+    :param file_path: a str path to write to
+    :param layout: the starting BoardLayout
+    :param moves: the list of Moves played
+    """
+    history = GameHistory([GameHistoryItem(0, 0, 0, move) for move in moves])
+    with open(file_path, mode="w", encoding="utf-8") as file:
+        file.write(json.dumps([layout.name, str(history)], separators=(",", ":")))
+
+
+def find_repeated_ply(layout: BoardLayout, moves: list[Move]) -> int:
+    """
+    Finds the first ply of a game that repeats an earlier position with the same player to move.
+    :param layout: the starting BoardLayout
+    :param moves: the list of Moves played
+    :return: the repeating ply, else None if the game never repeats a position
+    """
+    board = BoardLayout.setup_board(layout)
+    player = Color.BLACK
+    seen = {(Zobrist.create_board_hash(board), player)}
+    for ply, move in enumerate(moves, start=1):
+        board.apply_move(move)
+        player = Color.next(player)
+        key = (Zobrist.create_board_hash(board), player)
+        if key in seen:
+            return ply
+        seen.add(key)
+    return None
+
+
+def load_positions(ply_interval: int = PLY_INTERVAL) -> list[Position]:
+    """
+    Loads the starting layouts and every `ply_interval`th position of each recorded history.
+    :param ply_interval: the number of plies between sampled history positions
+    :return: a list of Positions
+    :raise ValueError: if a sampled position repeats another, which would count it twice
+    """
+    positions = [Position(layout.name.lower(), BoardLayout.setup_board(layout), Color.BLACK, 0)
+                 for layout in BENCHMARK_LAYOUTS]
+    names = {(Zobrist.create_board_hash(position.board), position.player): position.name
+             for position in positions}
+
+    for file_path in sorted(glob.glob(os.path.join(HISTORIES_PATH, "*.json"))):
+        layout, moves = load_history(file_path)
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        board = BoardLayout.setup_board(layout)
+        player = Color.BLACK
+        for ply, move in enumerate(moves, start=1):
+            board.apply_move(move)
+            player = Color.next(player)
+            if ply % ply_interval == 0:
+                position = Position(f"{name}@{ply}", deepcopy(board), player, ply // 2)
+                key = (Zobrist.create_board_hash(board), player)
+                if key in names:
+                    raise ValueError(f"benchmark position {position.name} repeats {names[key]},"
+                                     " re-record the histories with `py -m benchmark.positions`")
+                names[key] = position.name
+                positions.append(position)
+
+    return positions
+
+
+def record_histories(num_plies: int = 60, seed: int = 0):
+    """
+    Records a seeded self-play game per benchmark layout into the histories directory.
+    Games that repeat a position are replayed with the next seed, as deterministic agents
+    can shuffle back and forth, which would sample the same positions more than once.
+    Only needed to regenerate the histories; recorded histories are replayed as-is.
+    :param num_plies: the number of plies to play per game
+    :param seed: the first seed of the random opening ply
+    :raise RuntimeError: if no seed gives a game without repeats for a layout
+    """
+    from headless.game_runner import PlayerConfig, play_game
+    from ui.model.agent_type import AgentType
+    from ui.model.heuristic_type import HeuristicType
+
+    black = PlayerConfig(AgentType.BRANDON, HeuristicType.BRANDON_OFFENSIVE, time_limit=60, depth=2)
+    white = PlayerConfig(AgentType.BRANDON, HeuristicType.BRANDON_DEFENSIVE, time_limit=60, depth=2)
+    for layout in BENCHMARK_LAYOUTS:
+        for layout_seed in range(seed, seed + MAX_RECORD_ATTEMPTS):
+            result = play_game(layout, black, white, move_limit=num_plies // 2, seed=layout_seed)
+            moves = [Move.decode(move_str) for move_str in result.moves]
+            if find_repeated_ply(layout, moves) is None:
+                break
+        else:
+            raise RuntimeError(f"no game of {layout.name} without repeats in {MAX_RECORD_ATTEMPTS} seeds")
+        save_history(os.path.join(HISTORIES_PATH, f"{layout.name.lower()}.json"), layout, moves)
+
+
+if __name__ == "__main__":
+    record_histories()
@@ -0,0 +1,202 @@
+"""
+Defines end-to-end search benchmarks at fixed depths and fixed time budgets.
+Fixed-depth runs are deterministic, so the total number of nodes they search forms a
+"bench" signature that changes whenever the search behaviour changes.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, asdict
+from enum import Enum
+from threading import Timer
+from time import perf_counter
+
+from agent.brandon.search import Search as BrandonSearch
+from agent.default.search import Search as DefaultSearch
+from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.search_stats import SearchStats
+from benchmark.positions import Position, load_positions
+from ui.model.heuristic_type import HeuristicType
+
+SEARCH_PLY_INTERVAL = 20
+DEFAULT_TIME_LIMITS = (0.5, 2.0)
+
+# the deepest search to start within a time budget
+MAX_TIMED_DEPTH = 16
+
+
+class SearchType(Enum):
+    """
+    The search implementations under benchmark, mapped to the depths they are benchmarked at.
+    The default search copies every board it visits, so it is only benchmarked up to depth 3.
+    """
+    BRANDON = (1, 2, 3, 4)
+    DEFAULT = (1, 2, 3)
+
+    @property
+    def heuristic_type(self) -> HeuristicType:
+        return {
+            SearchType.BRANDON: HeuristicType.BRANDON_OFFENSIVE,
+            SearchType.DEFAULT: HeuristicType.WEIGHTED,
+        }[self]
+
+    def create_search(self, batch_leaves: bool = False):
+        """
+        Creates a search of this type with its benchmark heuristic.
+        :param batch_leaves: whether or not the search evaluates the leaves of a node in one batch
+        :return: a Brandon or default Search
+        """
+        if self is SearchType.BRANDON:
+            search = BrandonSearch(batch_leaves=batch_leaves)
+            search.heuristic = self.heuristic_type
+        else:
+            search = DefaultSearch(batch_leaves=batch_leaves)
+            search.set_heuristic_type(self.heuristic_type)
+        return search
+
+    def run(self, position: Position, depth: int = None, time_limit: float = None, search=None) -> SearchRun:
+        """
+        Runs a search on a position to a fixed depth or within a time budget.
+        :param position: a Position
+        :param depth: the depth to search to
+        :param time_limit: the time in seconds after which the search is stopped
+        :param search: the search to run, else a fresh search from `create_search`
+        :return: a SearchRun
+        """
+        best_move = None
+
+        def set_best_move(move):
+            nonlocal best_move
+            best_move = move
+
+        search = search or self.create_search()
+        if self is SearchType.BRANDON:
+            start = lambda: search.start(position.board, position.player,
+                                         depth=depth or MAX_TIMED_DEPTH, on_find=set_best_move)
+            stop = search.stop
+        else:
+            search.depth_limit = depth or DefaultSearch.DEPTH_LIMIT
+            start = lambda: search.alpha_beta(position.board, position.player, on_find=set_best_move)
+            stop = lambda: setattr(search, "interrupt", True)
+
+        Heuristic.set_turn_count_handler(lambda: position.turn_count)
+        timer = Timer(time_limit, stop) if time_limit else None
+        time_start = perf_counter()
+        if timer:
+            timer.start()
+        start()
+        time_taken = perf_counter() - time_start
+        if timer:
+            timer.cancel()
+
+        return SearchRun(
+            search=self.name,
+            position=position.name,
+            mode=f"depth {depth}" if depth else f"{time_limit:g}s",
+            best_move=str(best_move) if best_move else None,
+            time=time_taken,
+            **asdict(search.stats),
+        )
+
+
+@dataclass
+class SearchRun(SearchStats):
+    """
+    Models the outcome of a benchmarked search on one position.
+    """
+    search: str = None
+    position: str = None
+    mode: str = None
+    best_move: str = None
+    time: float = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.search}/{self.position}/{self.mode}"
+
+    @property
+    def is_fixed_depth(self) -> bool:
+        return self.mode.startswith("depth")
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.num_nodes / (self.time or 1)
+
+
+def run_search_benchmarks(search_types=tuple(SearchType), depths: tuple[int, ...] = None,
+                          time_limits: tuple[float, ...] = DEFAULT_TIME_LIMITS,
+                          on_run: callable = None, batch_leaves: bool = False) -> list[SearchRun]:
+    """
+    Runs each search over the search benchmark positions at fixed depths and time budgets.
+    :param search_types: the SearchTypes to benchmark
+    :param depths: the fixed depths to search to, else the depths of each SearchType
+    :param time_limits: the time budgets in seconds to search within
+    :param on_run: a callback for each SearchRun as it completes
+    :param batch_leaves: whether or not the searches evaluate the leaves of a node in one batch
+    :return: a list of SearchRuns
+    """
+    positions = load_positions(SEARCH_PLY_INTERVAL)
+    runs = []
+    for search_type in search_types:
+        budgets = [{"depth": depth} for depth in depths or search_type.value]
+        budgets += [{"time_limit": time_limit} for time_limit in time_limits]
+        for budget in budgets:
+            for position in positions:
+                run = search_type.run(position, **budget,
+                                      search=search_type.create_search(batch_leaves=batch_leaves))
+                runs.append(run)
+                if on_run:
+                    on_run(run)
+    return runs
+
+
+def get_bench_signature(runs: list[SearchRun]) -> int:
+    """
+    Determines the bench signature of a set of runs: the total nodes of its fixed-depth runs.
+    :param runs: a list of SearchRuns
+    :return: an int
+    """
+    return sum(run.num_nodes for run in runs if run.is_fixed_depth)
+
+
+def get_reference_moves(runs: list[SearchRun]) -> dict[str, str]:
+    """
+    Determines the reference move of each position: the best move of its deepest fixed-depth
+    Brandon search.
+    :param runs: a list of SearchRuns
+    :return: a dict mapping position names to move strs
+    """
+    reference_runs = {}
+    for run in runs:
+        if run.search != SearchType.BRANDON.name or not run.is_fixed_depth:
+            continue
+        depth = int(run.mode.split()[1])
+        if run.position not in reference_runs or depth >= reference_runs[run.position][0]:
+            reference_runs[run.position] = (depth, run.best_move)
+    return {position: move for position, (_, move) in reference_runs.items()}
+
+
+def save_runs(file_path: str, runs: list[SearchRun]):
+    """
+    Saves search runs and their bench signature as a JSON baseline.
+    :param file_path: a str path to write to
+    :param runs: a list of SearchRuns
+    """
+    baseline = {
+        "bench": get_bench_signature(runs),
+        "runs": [asdict(run) for run in runs],
+    }
+    with open(file_path, mode="w", encoding="utf-8") as file:
+        file.write(json.dumps(baseline, indent=2))
+
+
+def load_runs(file_path: str) -> list[SearchRun]:
+    """
+    Loads search runs from a JSON baseline.
+    :param file_path: a str path to read from
+    :return: a list of SearchRuns
+    """
+    with open(file_path, mode="r", encoding="utf-8") as file:
+        baseline = json.loads(file.read())
+    return [SearchRun(**run) for run in baseline["runs"]]
@@ -12,6 +12,37 @@ from core.hex import Hex
 from lib.hex.hex_grid import HexGrid
 
 
+def _setup_cell_tables(size):
+    """
+    Precomputes per-cell lookup tables in board storage coordinates.
+    Used to update incremental evaluation state without allocating cells.
+    :param size: the board size
+    :return: a tuple of (distances, neighbors) in the shape of the board storage, where each
+             distance is the manhattan distance to the board center and each neighbor list
+             holds the in-bounds (r, q) storage indices of that cell's neighbors
+    """
+    grid = HexGrid(size)
+    center = Hex(size - 1, size - 1)
+    distances = []
+    neighbors = []
+    for r, line in enumerate(grid._data):
+        line_distances = []
+        line_neighbors = []
+        for q in range(len(line)):
+            cell = Hex(q + grid.offset(r), r)
+            line_distances.append(int(cell.manhattan(center)))
+            line_neighbors.append(tuple(
+                (n.y, n.x - grid.offset(n.y))
+                    for n in cell.neighbors()
+                    if n in grid
+            ))
+        distances.append(line_distances)
+        neighbors.append(line_neighbors)
+    return distances, neighbors
+
+CELL_DISTANCES, CELL_NEIGHBORS = _setup_cell_tables(BOARD_SIZE)
+
+
 class Board(HexGrid):
     """
     A hex grid specific to the game of Abalone.
@@ -31,6 +62,10 @@ class Board(HexGrid):
         """
         board = Board()
         board._layout = data
+        for line in data:
+            for val in line:
+                if val in (Color.BLACK.value, Color.WHITE.value):
+                    board._layout_counts[val] += 1
         for r, line in enumerate(data):
             for q, val in enumerate(line):
                 q += board.offset(r)  # offset coords - board storage starts at x with size - 1
@@ -47,10 +82,19 @@ class Board(HexGrid):
         """
         super().__init__(size=BOARD_SIZE)
         self._layout = None
+        self._layout_counts = [0, 0, 0]
         self.__items = None
         self.__items_dirty = None
         self.__items_nonempty = None
 
+        # incremental evaluation state, indexed by color value and updated
+        # by delta on every cell assignment
+        self._marble_counts = [0, 0, 0]
+        self._distance_sums = [0, 0, 0]
+        self._adjacency_counts = [0, 0, 0]
+        self._adjacency_squares = [0, 0, 0]
+        self._links = [[0] * len(line) for line in self._data]
+
     @property
     def layout(self) -> list[list[int]]:
         """
@@ -127,30 +171,43 @@ class Board(HexGrid):
 
         return self._is_valid_sidestep_move(move)
 
+    def get_layout_count(self, player: Color) -> int:
+        """
+        :return: Marble count for player in the starting layout.
+        """
+        return self._layout_counts[player.value]
+
     def get_marble_count(self, player: Color) -> int:
         """
         :return: Marble count for player.
         """
-        count = 0
-        for _, color in self.enumerate():
-            if color == player:
-                count += 1
+        return self._marble_counts[player.value]
+
+    def get_distance_sum(self, player: Color) -> int:
+        """
+        :return: Sum of manhattan distances to the board center for player marbles.
+        """
+        return self._distance_sums[player.value]
 
-        return count
+    def get_adjacency_count(self, player: Color) -> int:
+        """
+        :return: Sum of same-color neighbor counts over all player marbles,
+                 i.e. twice the number of adjacent player marble pairs.
+        """
+        return self._adjacency_counts[player.value]
+
+    def get_adjacency_squares(self, player: Color) -> int:
+        """
+        :return: Sum of squared same-color neighbor counts over all player marbles.
+        """
+        return self._adjacency_squares[player.value]
 
     def get_score(self, player: Color) -> int:
         """
         :return: Score for player.
         """
         opponent = Color.next(player)
-
-        layout_count = 0
-        for line in self._layout:
-            for data in line:
-                if data == opponent.value:
-                    layout_count += 1
-
-        return layout_count - self.get_marble_count(opponent)
+        return self._layout_counts[opponent.value] - self._marble_counts[opponent.value]
 
     def get_scores_optimized(self, player: Color, player_count: int, opponent_count: int) -> tuple[int, int]:
         """
@@ -160,18 +217,33 @@ class Board(HexGrid):
         :return: Score for player and opponent player.
         """
         opponent = Color.next(player)
-
-        player_layout_count = 0
-        opponent_layout_count = 0
-        for line in self._layout:
-            for data in line:
-                if data == player.value:
-                    player_layout_count += 1
-                if data == opponent.value:
-                    opponent_layout_count += 1
-
+        player_layout_count = self._layout_counts[player.value]
+        opponent_layout_count = self._layout_counts[opponent.value]
         return opponent_layout_count - opponent_count, player_layout_count - player_count
 
+    def compute_eval_state(self) -> tuple[list[int], list[int], list[int], list[int]]:
+        """
+        Recomputes the incremental evaluation state from scratch.
+        Used to verify the accumulators maintained on each cell assignment.
+        :return: a tuple of (marble counts, distance sums, adjacency counts, adjacency squares),
+                 each a list indexed by color value
+        """
+        marble_counts = [0, 0, 0]
+        distance_sums = [0, 0, 0]
+        adjacency_counts = [0, 0, 0]
+        adjacency_squares = [0, 0, 0]
+        data = self._data
+        for r, line in enumerate(data):
+            for q, color in enumerate(line):
+                if color is None:
+                    continue
+                links = sum(1 for nr, nq in CELL_NEIGHBORS[r][q] if data[nr][nq] == color)
+                marble_counts[color.value] += 1
+                distance_sums[color.value] += CELL_DISTANCES[r][q]
+                adjacency_counts[color.value] += links
+                adjacency_squares[color.value] += links * links
+        return marble_counts, distance_sums, adjacency_counts, adjacency_squares
+
     def apply_move(self, move: Move):
         """
         Applies a move to the board, changing the position of cells.
@@ -294,13 +366,63 @@ class Board(HexGrid):
         # TODO: return a list of comma-separated "pieces", e.g. A1w
         return super().__str__()
 
+    def _remove_marble(self, r, q, color):
+        """
+        Removes the marble at storage index (r, q) from the evaluation state.
+        :precondition: the cell at (r, q) holds a marble of the given color.
+        """
+        i = color.value
+        data = self._data
+        links = self._links
+        cell_links = links[r][q]
+        self._marble_counts[i] -= 1
+        self._distance_sums[i] -= CELL_DISTANCES[r][q]
+        self._adjacency_counts[i] -= 2 * cell_links
+        self._adjacency_squares[i] -= cell_links * cell_links
+        for nr, nq in CELL_NEIGHBORS[r][q]:
+            if data[nr][nq] == color:
+                neighbor_links = links[nr][nq]
+                self._adjacency_squares[i] -= 2 * neighbor_links - 1
+                links[nr][nq] = neighbor_links - 1
+        links[r][q] = 0
+
+    def _add_marble(self, r, q, color):
+        """
+        Adds a marble at storage index (r, q) to the evaluation state.
+        """
+        i = color.value
+        data = self._data
+        links = self._links
+        cell_links = 0
+        for nr, nq in CELL_NEIGHBORS[r][q]:
+            if data[nr][nq] == color:
+                neighbor_links = links[nr][nq]
+                self._adjacency_squares[i] += 2 * neighbor_links + 1
+                links[nr][nq] = neighbor_links + 1
+                cell_links += 1
+        links[r][q] = cell_links
+        self._marble_counts[i] += 1
+        self._distance_sums[i] += CELL_DISTANCES[r][q]
+        self._adjacency_counts[i] += 2 * cell_links
+        self._adjacency_squares[i] += cell_links * cell_links
+
     def __setitem__(self, cell, value):
         """
         Sets the value on the board at position `cell` to `value`.
+        Updates the evaluation state by delta for the cell and its neighbors.
         :param cell: a Hex
         :param value: the value to set
         """
+        previous = self[cell]
         super().__setitem__(cell, value)
+        if previous != value:
+            r = cell.y
+            q = cell.x - self.offset(r)
+            if previous is not None:
+                self._remove_marble(r, q, previous)
+            if value is not None:
+                self._add_marble(r, q, value)
+
         if cell in self:
             # mark enumeration struct as in need of recalculation
 
@@ -316,10 +438,28 @@ class Board(HexGrid):
             # plus delta (+1 if `None`->`not None`, -1 if `not None`->`None`)
             self.__items_nonempty = None
 
+    def set_flat_array(self, values):
+        """
+        Sets every cell from values in storage order, as from `to_flat_array`.
+        Keeps the board's starting layout, so that scores still count from it.
+        :param values: a sequence of ints of domain 0..2
+        """
+        values = iter(values)
+        for r, line in enumerate(self._data):
+            offset = self.offset(r)
+            for q in range(len(line)):
+                value = next(values)
+                self[Hex(q + offset, r)] = Color(value) if value else None
+
     def copy_state(self, board):
         data = self._data
+        links = self._links
         for r, line in enumerate(board._data):
-            for q, val in enumerate(line):
-                data[r][q] = val
+            data[r][:] = line
+            links[r][:] = board._links[r]
+        self._marble_counts[:] = board._marble_counts
+        self._distance_sums[:] = board._distance_sums
+        self._adjacency_counts[:] = board._adjacency_counts
+        self._adjacency_squares[:] = board._adjacency_squares
         self.__items = None
         self.__items_nonempty = None
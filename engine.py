@@ -0,0 +1,42 @@
+"""
+Runs the engine over a text protocol in the style of UCI, on stdin/stdout or a localhost TCP port.
+
+Usage: python engine.py
+       python engine.py --listen 4000
+See headless/engine.py for the commands.
+"""
+
+import sys
+from argparse import ArgumentParser
+
+from headless.engine import DEFAULT_HOST, Engine, EngineServer, silence_logs
+
+
+def _parse_args():
+    parser = ArgumentParser(description="Runs the engine over a UCI-style text protocol.")
+    parser.add_argument("--listen", type=int, metavar="PORT",
+                        help="serve the engine on a TCP port instead of stdin/stdout")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="the address to listen on")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show search logs when listening")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    if args.listen is None:
+        silence_logs()
+        Engine().run(sys.stdin, lambda line: print(line, flush=True))
+        return
+
+    if not args.verbose:
+        silence_logs()
+    with EngineServer((args.host, args.listen)) as server:
+        print(f"engine listening on {args.host}:{server.server_address[1]}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
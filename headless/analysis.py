@@ -0,0 +1,271 @@
+"""
+Defines batch analysis of positions from game histories, game records, state files and position suites.
+
+Each position is searched by Brandon's search with a chosen heuristic at a fixed depth or time,
+reporting the best move, its score and principal variation. Positions from games also report
+the move that was played, its score and the score lost by playing it, for blunder detection.
+Consecutive positions are analyzed in tasks across a process pool, so that the positions of a task
+share a transposition table, and results are streamed as tasks complete.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
+from threading import Event, Thread
+from time import time
+from typing import Iterator
+
+from agent.brandon.search import Search
+from agent.heuristics.heuristic_jonathan import Heuristic
+from core.board import Board
+from core.board_layout import BoardLayout
+from core.color import Color
+from core.move import Move
+from headless.engine import MAX_DEPTH, STOP_INTERVAL, to_score_cp
+from headless.match import init_worker
+from parse.position_parser import PositionParser, PositionRecord, is_same_move
+from parse.state_parser import StateParser
+from store.game_record import RECORD_EXTENSION, GameRecordReader, find_game_records
+from ui.model.game_history import GameHistory
+from ui.model.heuristic_type import HeuristicType
+
+HISTORY_EXTENSION = ".json"
+STATE_EXTENSION = ".input"
+# the number of consecutive positions analyzed per task
+POSITIONS_PER_TASK = 8
+
+
+@dataclass(frozen=True)
+class AnalysisPosition:
+    """
+    Models a position to analyze, in the suite notation so that it is cheap to send to a worker.
+    """
+    source: str
+    index: int
+    position: str
+    turn_count: int = 0
+    played_move: str = None
+    name: str = None
+
+
+@dataclass(frozen=True)
+class AnalysisResult:
+    """
+    Models the analysis of a position. Scores are in centi-units of the heuristic, from the
+    perspective of the player to move.
+    """
+    source: str
+    index: int
+    position: str
+    best_move: str
+    score: int
+    pv: list[str]
+    depth: int
+    nodes: int
+    time: float
+    name: str = None
+    played_move: str = None
+    played_score: int = None
+    loss: int = None
+
+    def to_json(self) -> str:
+        return json.dumps({key: value for key, value in asdict(self).items() if value is not None})
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """
+    Models the outcome of a search of one position, or the best found so far while searching.
+    """
+    move: Move
+    score: float
+    variation: list[Move]
+    depth: int
+    num_nodes: int
+    time: float
+
+
+def analyze_position(search: Search, board: Board, player: Color,
+                     depth: int = None, time_limit: float = None, moves: list[Move] = None,
+                     on_update: callable = None, stop_event: Event = None) -> SearchResult:
+    """
+    Searches a position to a depth, within a time limit, or both.
+    :param search: a Search with its heuristic set
+    :param board: a Board
+    :param player: the Color to move
+    :param depth: the depth to search to, else the search's depth, or as deep as time allows with a time limit
+    :param time_limit: the seconds to search for, else None to search to the depth
+    :param moves: the root Moves to search, else all legal moves
+    :param on_update: a Callable[SearchResult] called with the best result so far on each better move
+    :param stop_event: an Event, or a proxy of one, that stops the search once set
+    :return: a SearchResult, with no move if the player has none
+    """
+    best_move = None
+    time_start = time()
+    num_nodes_start = search.node_count
+
+    def get_result() -> SearchResult:
+        variation = (search.get_principal_variation(board, player, best_move, max_length=search.current_depth)
+                     if best_move else [])
+        return SearchResult(move=best_move, score=search.best_score, variation=variation,
+                            depth=search.current_depth, num_nodes=search.node_count - num_nodes_start,
+                            time=time() - time_start)
+
+    def set_best_move(move):
+        nonlocal best_move
+        best_move = move
+        on_update and on_update(get_result())
+
+    finished = Event()
+    def watch_search():
+        # a stop may land before the search starts, which resets it, so keep stopping until it ends
+        time_end = time_start + time_limit if time_limit else None
+        while not finished.wait(STOP_INTERVAL):
+            if (time_end is not None and time() >= time_end
+                    or stop_event is not None and stop_event.is_set()):
+                search.stop()
+
+    watcher = (Thread(target=watch_search, daemon=True)
+               if time_limit or stop_event is not None
+               else None)
+    watcher and watcher.start()
+    try:
+        search.start(board, player, depth=depth or (MAX_DEPTH if time_limit else None),
+                     on_find=set_best_move, moves=moves)
+    finally:
+        finished.set()
+
+    return get_result()
+
+
+def _analyze_task(positions: list[AnalysisPosition], heuristic_type: HeuristicType,
+                  depth: int, time_limit: float) -> list[AnalysisResult]:
+    """
+    Analyzes the positions of a task in a worker process with one search.
+    """
+    search = Search()
+    search.heuristic = heuristic_type
+    results = []
+    for position in positions:
+        record = PositionParser.convert_text_to_position(position.position)
+        Heuristic.set_turn_count_handler(lambda: position.turn_count)
+        analysis = analyze_position(search, record.board, record.player, depth=depth, time_limit=time_limit)
+        if not analysis.move:
+            continue
+
+        played_score = None
+        loss = None
+        if position.played_move:
+            played_move = Move.decode(position.played_move)
+            # the played move is searched alone to the depth the position was, so that scores compare
+            played_score = (analysis.score
+                            if is_same_move(played_move, analysis.move)
+                            else analyze_position(search, record.board, record.player, depth=analysis.depth,
+                                                  moves=[played_move]).score)
+            loss = to_score_cp(analysis.score) - to_score_cp(played_score)
+            played_score = to_score_cp(played_score)
+
+        results.append(AnalysisResult(
+            source=position.source,
+            index=position.index,
+            position=position.position,
+            best_move=str(analysis.move),
+            score=to_score_cp(analysis.score),
+            pv=[str(move) for move in analysis.variation],
+            depth=analysis.depth,
+            nodes=analysis.num_nodes,
+            time=round(analysis.time, 3),
+            name=position.name,
+            played_move=position.played_move,
+            played_score=played_score,
+            loss=loss,
+        ))
+    return results
+
+
+def _encode_position(board: Board, player: Color) -> str:
+    return PositionParser.convert_position_to_text(PositionRecord(board=board, player=player))
+
+
+def _load_history_positions(source: str, layout: BoardLayout, moves: list[Move]) -> list[AnalysisPosition]:
+    """
+    Replays a game, taking the position before each move.
+    """
+    board = Board.create_from_data(layout.value)
+    player = Color.BLACK
+    positions = []
+    for ply, move in enumerate(moves):
+        positions.append(AnalysisPosition(source=source, index=ply, position=_encode_position(board, player),
+                                          turn_count=ply // 2, played_move=str(move)))
+        board.apply_move(move)
+        player = Color.next(player)
+    return positions
+
+
+def _split_tasks(positions: list[AnalysisPosition]) -> Iterator[list[AnalysisPosition]]:
+    for start in range(0, len(positions), POSITIONS_PER_TASK):
+        yield positions[start:start + POSITIONS_PER_TASK]
+
+
+def load_analysis_tasks(path: str) -> Iterator[list[AnalysisPosition]]:
+    """
+    Loads the positions of a file or directory as analysis tasks of consecutive positions.
+    Directories are searched for game records.
+    Files are read by extension: `.agr` game records, `.json` history dumps as written by the App,
+    `.input` state files in the Test<#>.input notation, and otherwise position suites.
+    :param path: a str path
+    :return: an iterator of lists of AnalysisPositions
+    """
+    if os.path.isdir(path):
+        for record_path in find_game_records(path):
+            yield from load_analysis_tasks(record_path)
+        return
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == RECORD_EXTENSION:
+        with GameRecordReader(path) as reader:
+            yield from _split_tasks(_load_history_positions(path, reader.layout, [ply.move for ply in reader]))
+    elif extension == HISTORY_EXTENSION:
+        with open(path, mode="r", encoding="utf-8") as file:
+            layout_name, history_str, *_ = json.loads(file.read())
+        history = GameHistory.decode(history_str)
+        yield from _split_tasks(_load_history_positions(path, BoardLayout[layout_name],
+                                                        [item.move for item in history]))
+    elif extension == STATE_EXTENSION:
+        with open(path, mode="r", encoding="utf-8") as file:
+            layout, player = StateParser.convert_text_to_state(file.read())
+        yield [AnalysisPosition(source=path, index=0,
+                                position=_encode_position(Board.create_from_data(layout), Color(player)))]
+    else:
+        records = PositionParser.read_suite(path)
+        positions = [AnalysisPosition(source=path, index=index, name=record.id,
+                                      position=_encode_position(record.board, record.player))
+                     for index, record in enumerate(records)]
+        yield from _split_tasks(positions)
+
+
+def analyze_paths(paths: list[str], heuristic_type: HeuristicType, depth: int = None, time_limit: float = None,
+                  num_workers: int = None, verbose: bool = False) -> Iterator[AnalysisResult]:
+    """
+    Analyzes the positions of files and directories across a process pool.
+    :param paths: str paths per `load_analysis_tasks`
+    :param heuristic_type: the HeuristicType to search with
+    :param depth: the depth to search each position to
+    :param time_limit: the seconds to search each position for
+    :param num_workers: the number of worker processes, else one per CPU
+    :return: an iterator of AnalysisResults in completion order, a task's results together in order
+    """
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             initializer=init_worker, initargs=(verbose,)) as executor:
+        futures = [executor.submit(_analyze_task, positions, heuristic_type, depth, time_limit)
+                   for path in paths
+                   for positions in load_analysis_tasks(path)]
+        try:
+            for future in as_completed(futures):
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,195 @@
+"""
+Defines an asyncio facade over Brandon's search, so that services can await searches of many
+positions from one event loop instead of bridging agent callbacks through a polled queue.
+
+Searches run in an executor: a thread pool by default, or a process pool so that searches run
+in parallel beyond the GIL. Each worker thread or process keeps one Search per heuristic, so its
+tables stay warm across the searches it runs. Better moves are streamed back to the event loop as
+they are found, and cancelling the awaiting task stops the search in its worker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from copy import deepcopy
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from threading import Event, local
+from typing import AsyncIterator
+
+from agent.brandon.search import Search
+from agent.heuristics.heuristic_jonathan import Heuristic
+from core.board import Board
+from core.color import Color
+from headless.analysis import SearchResult, analyze_position
+from headless.engine import MAX_DEPTH, SearchLimits
+from ui.model.heuristic_type import HeuristicType
+
+# the seconds to wait for a stopped search to return
+STOP_TIMEOUT = 5
+
+# the state of a worker thread, or of the main thread of a worker process
+_worker_state = local()
+
+
+def _get_worker_turn_count() -> int:
+    return getattr(_worker_state, "turn_count", 0)
+
+
+def _get_worker_search(heuristic_type: HeuristicType) -> Search:
+    """
+    Gets the Search of the current worker for a heuristic, creating it on first use.
+    """
+    searches = getattr(_worker_state, "searches", None)
+    if searches is None:
+        searches = _worker_state.searches = {}
+    if heuristic_type not in searches:
+        search = Search()
+        search.heuristic = heuristic_type
+        searches[heuristic_type] = search
+    return searches[heuristic_type]
+
+
+def _run_search(board: Board, player: Color, heuristic_type: HeuristicType, limits: SearchLimits,
+                turn_count: int, on_update: callable, stop_event: Event) -> SearchResult:
+    """
+    Searches a position in a worker thread or process.
+    :param on_update: a Callable[SearchResult] called with each better move, followed by None once done
+    :param stop_event: an Event, or a proxy of one, that stops the search once set
+    """
+    _worker_state.turn_count = turn_count
+    Heuristic.set_turn_count_handler(_get_worker_turn_count)
+    try:
+        search = _get_worker_search(heuristic_type)
+        return analyze_position(search, board, player,
+                                depth=limits.depth or (MAX_DEPTH if limits.infinite else None),
+                                time_limit=None if limits.infinite else limits.movetime,
+                                on_update=on_update, stop_event=stop_event)
+    finally:
+        on_update(None)
+
+
+class AsyncSearcher:
+    """
+    Searches positions in an executor on behalf of an event loop.
+    """
+
+    def __init__(self, heuristic_type: HeuristicType = HeuristicType.BRANDON_OFFENSIVE,
+                 executor: Executor = None):
+        """
+        :param heuristic_type: the HeuristicType to search with
+        :param executor: a ThreadPoolExecutor or ProcessPoolExecutor to search in, which the caller
+            shuts down, else a thread pool of one worker owned by the searcher
+        """
+        self.heuristic_type = heuristic_type
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        # a manager serves the queues and events shared with worker processes
+        self._manager = None
+        # the stop events of the searches in flight, by their executor futures
+        self._searches = {}
+
+    async def __aenter__(self) -> AsyncSearcher:
+        return self
+
+    async def __aexit__(self, *_):
+        await asyncio.to_thread(self.close)
+
+    def close(self):
+        """
+        Stops the searches in flight and waits for them to return, then shuts down the searcher's
+        own executor and its manager, if any. Blocks, so call it off the event loop while searching.
+        """
+        searches = dict(self._searches)
+        for stop_event in searches.values():
+            stop_event.set()
+        # workers poll their stop events through the manager, so it outlives them
+        wait(searches, timeout=STOP_TIMEOUT)
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._manager:
+            self._manager.shutdown()
+            self._manager = None
+
+    async def search(self, board: Board, player: Color, limits: SearchLimits = None,
+                     turn_count: int = 0) -> SearchResult:
+        """
+        Searches a position. Cancelling the awaiting task stops the search.
+        :param board: a Board
+        :param player: the Color to move
+        :param limits: the SearchLimits, else the search's default depth; infinite searches run until cancelled
+            or exhausted, as they are at once in positions without contact
+        :param turn_count: the turn count of the player to move, for heuristics that weigh the game stage
+        :return: a SearchResult, with no move if the player has none
+        """
+        result = None
+        updates = self.iter_search(board, player, limits, turn_count)
+        try:
+            async for result in updates:
+                pass
+        finally:
+            await updates.aclose()
+        return result
+
+    async def iter_search(self, board: Board, player: Color, limits: SearchLimits = None,
+                          turn_count: int = 0) -> AsyncIterator[SearchResult]:
+        """
+        Searches a position, yielding a SearchResult each time a better move is found and the
+        final SearchResult last. Closing the iterator or cancelling its task stops the search.
+        :param board: a Board, which is copied to the worker and not modified
+        :param player: the Color to move
+        :param limits: the SearchLimits, else the search's default depth; infinite searches run until cancelled
+            or exhausted, as they are at once in positions without contact
+        :param turn_count: the turn count of the player to move, for heuristics that weigh the game stage
+        :return: an async iterator of SearchResults
+        """
+        loop = asyncio.get_running_loop()
+        limits = limits or SearchLimits()
+        updates = asyncio.Queue()
+
+        if isinstance(self._executor, ProcessPoolExecutor):
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            worker_updates = self._manager.Queue()
+            stop_event = self._manager.Event()
+            on_update = worker_updates.put
+        else:
+            worker_updates = None
+            stop_event = Event()
+            board = deepcopy(board)
+            on_update = lambda result: loop.call_soon_threadsafe(updates.put_nowait, result)
+
+        search_future = self._executor.submit(_run_search, board, player, self.heuristic_type,
+                                              limits, turn_count, on_update, stop_event)
+        self._searches[search_future] = stop_event
+        search_future.add_done_callback(lambda search_future: self._searches.pop(search_future, None))
+        future = asyncio.wrap_future(search_future)
+        relay = (loop.create_task(self._relay_updates(worker_updates, updates))
+                 if worker_updates is not None
+                 else None)
+        try:
+            while (update := await updates.get()) is not None:
+                yield update
+            yield await future
+        finally:
+            if not future.done():
+                stop_event.set()
+                # wait for the worker, so that its result is retrieved and the manager outlives its search
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), STOP_TIMEOUT)
+                except Exception:
+                    pass
+            if relay and not relay.done():
+                relay.cancel()
+
+    @staticmethod
+    async def _relay_updates(worker_updates, updates: asyncio.Queue):
+        """
+        Relays the updates of a worker process from its managed queue to the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            update = await loop.run_in_executor(None, worker_updates.get)
+            updates.put_nowait(update)
+            if update is None:
+                break
@@ -0,0 +1,84 @@
+"""
+Contains Elo rating math for comparing agent configurations.
+"""
+
+from math import log, log10, sqrt, inf
+
+
+def elo_from_score(score: float) -> float:
+    """
+    Converts an expected score into an Elo difference.
+    :param score: a float between 0 and 1 denoting the average points per game
+    :return: a float, infinite for a score of 0 or 1
+    """
+    if score <= 0:
+        return -inf
+    if score >= 1:
+        return inf
+    return 400 * log10(score / (1 - score))
+
+
+def elo_interval(wins: int, draws: int, losses: int, z: float = 1.96) -> tuple[float, float, float]:
+    """
+    Estimates the Elo difference of a win/draw/loss record and its confidence interval.
+    :param wins: an int
+    :param draws: an int
+    :param losses: an int
+    :param z: the standard score of the confidence interval (1.96 for 95%)
+    :return: a tuple of (elo, lower bound, upper bound)
+    """
+    num_games = wins + draws + losses
+    if not num_games:
+        return 0, -inf, inf
+
+    score = (wins + draws / 2) / num_games
+    variance = (wins * (1 - score) ** 2
+                + draws * (0.5 - score) ** 2
+                + losses * (0 - score) ** 2) / num_games
+    margin = z * sqrt(variance / num_games)
+    return elo_from_score(score), elo_from_score(score - margin), elo_from_score(score + margin)
+
+
+def score_from_elo(elo: float) -> float:
+    """
+    Converts an Elo difference into an expected score.
+    :param elo: a float
+    :return: a float between 0 and 1 denoting the expected points per game
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def sprt_bounds(alpha: float, beta: float) -> tuple[float, float]:
+    """
+    Determines the log-likelihood ratio bounds of a sequential probability ratio test.
+    :param alpha: the probability of accepting elo1 when elo0 holds (false positive rate)
+    :param beta: the probability of accepting elo0 when elo1 holds (false negative rate)
+    :return: a tuple of (lower bound, upper bound)
+    """
+    return log(beta / (1 - alpha)), log((1 - beta) / alpha)
+
+
+def sprt_llr(wins: int, draws: int, losses: int, elo0: float, elo1: float) -> float:
+    """
+    Estimates the log-likelihood ratio of elo1 over elo0 for a win/draw/loss record
+    using the normal approximation of the generalized SPRT.
+    :param wins: an int
+    :param draws: an int
+    :param losses: an int
+    :param elo0: the Elo difference of the null hypothesis
+    :param elo1: the Elo difference of the alternative hypothesis
+    :return: a float, 0 while the record has no variance
+    """
+    num_games = wins + draws + losses
+    if not num_games:
+        return 0
+
+    score = (wins + draws / 2) / num_games
+    variance = (wins * (1 - score) ** 2
+                + draws * (0.5 - score) ** 2
+                + losses * (0 - score) ** 2) / num_games
+    if not variance:
+        return 0
+
+    score0, score1 = score_from_elo(elo0), score_from_elo(elo1)
+    return num_games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
@@ -0,0 +1,376 @@
+"""
+Defines a resident engine that plays Abalone over a line-based text protocol in the style of UCI,
+so that tools and tournament managers can drive the search without the GUI.
+
+The engine reads one command per line and writes one response per line:
+- uci: lists the engine's id and options, then `uciok`
+- isready: answers `readyok`
+- setoption name <Heuristic|Depth|SymmetricHashing> value <value>
+- ucinewgame: resets the position to the standard layout, keeping the search tables warm
+- position startpos|layout <LAYOUT>|state <b|w> <cells> [moves <move> ...]: sets up a position from
+  a BoardLayout name or the test.board cells of StateParser, then applies moves in `(NW, C5, E5)` notation
+- go [depth <plies>] [movetime <ms>] [infinite] [ponder]: searches the position, writing
+  `info depth <d> score cp <score> nodes <n> nps <n> time <ms> pv <move> ...` lines as better moves
+  are found and `bestmove <move> [ponder <move>]` once done
+- stop: stops the search, which then writes its best move
+- ponderhit: the predicted move was played, so the ponder search continues under its limits
+- quit: ends the session
+Searches without a limit run to the Depth option. Infinite and ponder searches write their best
+move only once stopped, or once a ponder hit lets them finish. A search stopped before finding
+a move plays the first legal move, and `bestmove (none)` is written if there is none.
+"""
+
+from __future__ import annotations
+
+import re
+import socketserver
+from copy import deepcopy
+from dataclasses import dataclass
+from math import isfinite
+from threading import Event, Lock, Thread, Timer
+from time import time
+from typing import Iterable
+
+from agent.brandon.search import Search
+from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.profiler import SearchProfiler
+from agent.state_generator import StateGenerator
+from core.board import Board
+from core.board_layout import BoardLayout
+from core.color import Color
+from core.move import Move
+from parse.state_parser import StateParser
+from ui.model.heuristic_type import HeuristicType
+from ui.debug import Debug, DebugType
+
+ENGINE_NAME = "COMP3981-Team4"
+ENGINE_AUTHOR = "Team 4"
+DEFAULT_HOST = "127.0.0.1"
+
+# the depth searched to when only a time limit bounds a search
+MAX_DEPTH = 64
+# the score reported for won positions, in centi-units of the heuristic
+WIN_SCORE_CP = 100000
+# the seconds between stop requests while waiting for a search thread to stop
+STOP_INTERVAL = 0.01
+
+MOVE_PATTERN = re.compile(r"\([^)]*\)")
+
+
+@dataclass
+class SearchLimits:
+    """
+    Models the limits of a `go` command.
+    """
+    depth: int = None
+    movetime: float = None  # in seconds
+    infinite: bool = False
+    ponder: bool = False
+
+    @staticmethod
+    def parse(tokens: list[str]) -> SearchLimits:
+        """
+        Parses the arguments of a `go` command.
+        :param tokens: a list of strs, e.g. ["depth", "3", "movetime", "5000"]
+        :return: a SearchLimits
+        :raise ValueError: if a limit is unknown or has no valid value
+        """
+        limits = SearchLimits()
+        tokens = iter(tokens)
+        for token in tokens:
+            if token == "depth":
+                limits.depth = int(next(tokens, ""))
+            elif token == "movetime":
+                limits.movetime = int(next(tokens, "")) / 1000
+            elif token == "infinite":
+                limits.infinite = True
+            elif token == "ponder":
+                limits.ponder = True
+            else:
+                raise ValueError(f"unknown limit {token}")
+        return limits
+
+
+def parse_moves(text: str) -> list[Move]:
+    """
+    Parses a sequence of moves, e.g. "(NW, C5, E5) (SE, I5)".
+    :param text: a str of moves in `Move.decode` notation
+    :return: a list of Moves
+    """
+    return [Move.decode(move_str) for move_str in MOVE_PATTERN.findall(text)]
+
+
+def to_score_cp(score: float) -> int:
+    """
+    Converts a heuristic score to centi-units, clamping won and lost positions.
+    :param score: a float
+    :return: an int
+    """
+    if not isfinite(score):
+        return WIN_SCORE_CP if score > 0 else -WIN_SCORE_CP
+    return max(-WIN_SCORE_CP, min(WIN_SCORE_CP, round(score * 100)))
+
+
+class Engine:
+    """
+    An engine session around a single Search, whose tables persist across positions and games.
+    Searches run on a worker thread so that commands such as `stop` are read while searching.
+    """
+
+    def __init__(self):
+        self._search = Search()
+        self._search.heuristic = HeuristicType.BRANDON_OFFENSIVE
+        self._write_lock = Lock()
+        self._output = print
+        self._board = Board.create_from_data(BoardLayout.STANDARD.value)
+        self._player = Color.BLACK
+        self._num_plies = 0
+
+        self._thread = None
+        self._timer = None
+        self._search_id = 0
+        self._limits = None
+        self._released = Event()
+        self._time_start = 0
+        self._nodes_start = 0
+        self._best_move = None
+        Heuristic.set_turn_count_handler(lambda: self._num_plies // 2)
+
+    def run(self, lines: Iterable[str], output: callable = print):
+        """
+        Runs commands until `quit` or the end of the input, then stops any search.
+        :param lines: an iterable of command strs
+        :param output: a Callable[str] writing a response line
+        """
+        self._output = output
+        try:
+            for line in lines:
+                if not self.handle(line):
+                    break
+        finally:
+            self._stop_search()
+
+    def handle(self, line: str) -> bool:
+        """
+        Runs a command.
+        :param line: a command str
+        :return: a bool denoting whether the session continues
+        """
+        command, _, args = line.strip().partition(" ")
+        args = args.strip()
+        try:
+            if command == "quit":
+                return False
+            elif command == "uci":
+                self._write_id()
+            elif command == "isready":
+                self._write("readyok")
+            elif command == "setoption":
+                self._set_option(args)
+            elif command == "ucinewgame":
+                self._stop_search()
+                self._set_position(Board.create_from_data(BoardLayout.STANDARD.value), Color.BLACK, "")
+            elif command == "position":
+                self._stop_search()
+                self._handle_position(args)
+            elif command == "go":
+                self._go(SearchLimits.parse(args.split()))
+            elif command == "stop":
+                self._stop_search()
+            elif command == "ponderhit":
+                self._ponder_hit()
+            elif command:
+                self._write(f"info string unknown command {command}")
+        except (KeyError, ValueError, IndexError) as error:
+            self._write(f"info string error in {command}: {error}")
+        return True
+
+    def _write(self, line: str):
+        with self._write_lock:
+            self._output(line)
+
+    def _write_id(self):
+        self._write(f"id name {ENGINE_NAME}")
+        self._write(f"id author {ENGINE_AUTHOR}")
+        self._write("option name Heuristic type combo default "
+                    f"{self._search.heuristic.name} "
+                    + " ".join(f"var {heuristic_type.name}" for heuristic_type in HeuristicType))
+        self._write(f"option name Depth type spin default {self._search.depth} min 1 max {MAX_DEPTH}")
+        self._write("option name SymmetricHashing type check default "
+                    f"{str(self._search.symmetric).lower()}")
+        self._write("uciok")
+
+    def _set_option(self, args: str):
+        """
+        Sets an option from `name <name> value <value>`.
+        """
+        name, _, value = args.removeprefix("name ").partition(" value ")
+        name = name.strip().lower()
+        value = value.strip()
+        self._stop_search()
+        if name == "heuristic":
+            self._search.heuristic = HeuristicType[value.upper()]
+        elif name == "depth":
+            self._search.depth = max(1, min(MAX_DEPTH, int(value)))
+        elif name == "symmetrichashing":
+            self._search.symmetric = value.lower() == "true"
+        else:
+            raise ValueError(f"unknown option {name}")
+
+    def _handle_position(self, args: str):
+        """
+        Sets up a position from `startpos`, `layout <LAYOUT>` or `state <b|w> <cells>`, then applies any moves.
+        """
+        position, _, moves_text = args.partition("moves")
+        kind, *fields = position.split()
+        if kind == "startpos":
+            board, player = Board.create_from_data(BoardLayout.STANDARD.value), Color.BLACK
+        elif kind == "layout":
+            board, player = Board.create_from_data(BoardLayout[fields[0].upper()].value), Color.BLACK
+        elif kind == "state":
+            player_text, cells_text = fields
+            layout, player = StateParser.convert_text_to_state(f"{player_text}\n{cells_text}")
+            board, player = Board.create_from_data(layout), Color(player)
+        else:
+            raise ValueError(f"unknown position {kind}")
+        self._set_position(board, player, moves_text)
+
+    def _set_position(self, board: Board, player: Color, moves_text: str):
+        num_plies = 0
+        for move in parse_moves(moves_text):
+            if not board.is_valid_move(move, player):
+                self._write(f"info string illegal move {move}, ignoring it and the moves after it")
+                break
+            board.apply_move(move)
+            player = Color.next(player)
+            num_plies += 1
+
+        self._board = board
+        self._player = player
+        self._num_plies = num_plies
+
+    def _go(self, limits: SearchLimits):
+        self._stop_search()
+        self._search_id += 1
+        self._limits = limits
+        self._released.clear()
+        self._best_move = None
+        self._time_start = time()
+        self._nodes_start = self._search.node_count
+
+        depth = limits.depth or (MAX_DEPTH if limits.movetime or limits.infinite else self._search.depth)
+        self._thread = Thread(target=self._run_search,
+                              args=(deepcopy(self._board), self._player, depth),
+                              daemon=True)
+        self._thread.start()
+        if not limits.ponder:
+            self._start_timer()
+
+    def _start_timer(self):
+        if self._limits.movetime is None:
+            return
+        self._timer = Timer(self._limits.movetime, self._expire, args=(self._search_id,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _expire(self, search_id: int):
+        """
+        Stops the search when its time is up, unless it has been superseded.
+        """
+        if search_id == self._search_id:
+            self._search.stop()
+
+    def _ponder_hit(self):
+        if not self._limits or not self._limits.ponder:
+            return
+        self._limits.ponder = False
+        self._start_timer()
+        if not self._limits.infinite:
+            self._released.set()
+
+    def _stop_search(self):
+        """
+        Stops the search, if any, and waits for it to write its best move.
+        """
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._thread is None:
+            return
+        self._released.set()
+        # a stop may land before the thread starts searching, which resets it, so repeat it
+        while self._thread.is_alive():
+            self._search.stop()
+            self._thread.join(STOP_INTERVAL)
+        self._thread = None
+
+    def _run_search(self, board: Board, player: Color, depth: int):
+        with SearchProfiler.profile("engine"):
+            self._search.start(board, player, depth=depth,
+                               on_find=lambda move: self._report_move(board, player, move))
+
+        # infinite and ponder searches hold their best move until stopped or hit
+        if self._limits.infinite or self._limits.ponder:
+            self._released.wait()
+
+        # a search stopped before finding a move plays the first legal move
+        if not self._best_move:
+            moves = StateGenerator.enumerate_board(board, player)
+            if not moves:
+                self._write("bestmove (none)")
+                return
+            self._best_move = moves[0]
+
+        variation = self._search.get_principal_variation(board, player, self._best_move, max_length=2)
+        ponder_str = f" ponder {variation[1]}" if len(variation) > 1 else ""
+        self._write(f"bestmove {self._best_move}{ponder_str}")
+
+    def _report_move(self, board: Board, player: Color, move: Move):
+        """
+        Writes an info line for a new best move.
+        """
+        self._best_move = move
+        search = self._search
+        time_taken = time() - self._time_start
+        num_nodes = search.node_count - self._nodes_start
+        variation = search.get_principal_variation(board, player, move, max_length=search.current_depth)
+        self._write(f"info depth {search.current_depth}"
+                    f" score cp {to_score_cp(search.best_score)}"
+                    f" nodes {num_nodes}"
+                    f" nps {int(num_nodes / (time_taken or 1e-3))}"
+                    f" time {int(time_taken * 1000)}"
+                    f" pv {' '.join(map(str, variation))}")
+
+
+class _EngineRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Runs an engine session over a TCP connection with the server's engine.
+    """
+
+    def handle(self):
+        def output(line: str):
+            self.wfile.write(f"{line}\n".encode())
+            self.wfile.flush()
+
+        lines = (line.decode(errors="replace") for line in self.rfile)
+        self.server.engine.run(lines, output)
+
+
+class EngineServer(socketserver.TCPServer):
+    """
+    Serves one engine to one TCP connection at a time, keeping its tables across connections.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple[str, int], engine: Engine = None):
+        super().__init__(address, _EngineRequestHandler)
+        self.engine = engine or Engine()
+
+
+def silence_logs():
+    """
+    Silences all logging, which would otherwise interleave with protocol output on stdout.
+    """
+    for debug_type in DebugType:
+        Debug.ACTIVE_DEBUG_TYPES[debug_type] = False
@@ -0,0 +1,187 @@
+"""
+Defines a headless game runner for playing agents against each other without the GUI.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+from threading import Event
+from time import time, sleep
+
+from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.state_generator import StateGenerator
+from core.board_layout import BoardLayout
+from core.color import Color
+from core.constants import WIN_SCORE
+from core.game import Game
+from ui.model.agent_type import AgentType
+from ui.model.heuristic_type import HeuristicType
+from ui.debug import Debug, DebugType
+
+
+@dataclass(frozen=True)
+class PlayerConfig:
+    """
+    Models an agent configuration taking part in headless games.
+    """
+    agent_type: AgentType = AgentType.BRANDON
+    heuristic_type: HeuristicType = HeuristicType.BRANDON_OFFENSIVE
+    time_limit: float = 10.0
+    depth: int = None
+
+    @staticmethod
+    def parse(config_str: str) -> PlayerConfig:
+        """
+        Parses a player config from `AGENT[:HEURISTIC[:TIME[:DEPTH]]]` notation,
+        e.g. `BRANDON_PONDERER:DYNAMIC:5:3`.
+        :param config_str: a str of enum names and numbers
+        :return: a PlayerConfig
+        """
+        fields = config_str.split(":")
+        parsers = (
+            ("agent_type", lambda name: AgentType[name.upper()]),
+            ("heuristic_type", lambda name: HeuristicType[name.upper()]),
+            ("time_limit", float),
+            ("depth", int),
+        )
+        return PlayerConfig(**{key: parse(value)
+                               for (key, parse), value in zip(parsers, fields) if value})
+
+    def __str__(self):
+        depth_str = f":{self.depth}" if self.depth else ""
+        return f"{self.agent_type.name}:{self.heuristic_type.name}:{self.time_limit:g}{depth_str}"
+
+    def create_agent(self):
+        """
+        Creates and configures an agent for this config.
+        :return: a BaseAgent
+        """
+        agent = self.agent_type.create()
+        agent.set_heuristic_type(self.heuristic_type)
+        if self.depth:
+            agent.set_depth_limit(self.depth)
+        return agent
+
+
+@dataclass
+class PlayerStats:
+    """
+    Models the search statistics of one side of a headless game.
+    """
+    num_moves: int = 0
+    search_time: float = 0
+    num_nodes: int = 0
+
+    def add(self, other: PlayerStats):
+        """
+        Accumulates another set of stats into these stats.
+        :param other: a PlayerStats
+        """
+        self.num_moves += other.num_moves
+        self.search_time += other.search_time
+        self.num_nodes += other.num_nodes
+
+    @property
+    def time_per_move(self) -> float:
+        return self.search_time / (self.num_moves or 1)
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.num_nodes / (self.search_time or 1)
+
+
+@dataclass
+class GameResult:
+    """
+    Models the outcome of a headless game.
+    """
+    layout: BoardLayout
+    winner: Color = None
+    scores: dict[Color, int] = field(default_factory=dict)
+    moves: list[str] = field(default_factory=list)
+    stats: dict[Color, PlayerStats] = field(default_factory=dict)
+
+    @property
+    def num_plies(self) -> int:
+        return len(self.moves)
+
+
+def find_agent_move(agent, board, player, time_limit):
+    """
+    Runs an agent on the given board until it completes or runs out of time.
+    :return: a tuple of (the best move found or None, the time taken)
+    """
+    best_move = None
+    completed = Event()
+
+    def set_best_move(move):
+        nonlocal best_move
+        best_move = move
+
+    time_start = time()
+    agent.start(board, player, on_find=set_best_move, on_complete=completed.set)
+    completed.wait(time_limit)
+    agent.stop()
+    while agent.is_searching:
+        sleep(0.001)
+
+    return best_move, time() - time_start
+
+
+def play_game(layout: BoardLayout, black: PlayerConfig, white: PlayerConfig,
+              move_limit: int = 40, num_random_plies: int = 1, seed: int = None,
+              on_move: callable = None) -> GameResult:
+    """
+    Plays a game between two agent configurations, mirroring the game end conditions of the App.
+    Pondering is not used so that neither side competes with the other for the CPU.
+    :param layout: the BoardLayout to start from
+    :param black: the PlayerConfig for the first player
+    :param white: the PlayerConfig for the second player
+    :param move_limit: the number of moves per player before the game ends
+    :param num_random_plies: the number of random opening plies, as the App plays one for computers
+    :param seed: a random seed for the opening plies
+    :param on_move: a Callable[Game, dict[Color, BaseAgent]] called after each move
+    :return: a GameResult
+    """
+    rng = random.Random(seed)
+    game = Game(starting_layout=layout)
+    configs = {Color.BLACK: black, Color.WHITE: white}
+    agents = {color: config.create_agent() for color, config in configs.items()}
+    result = GameResult(layout=layout, stats={color: PlayerStats() for color in Color})
+    turn_counts = {color: 0 for color in Color}
+    Heuristic.set_turn_count_handler(lambda: turn_counts[game.turn])
+
+    while (turn_counts[game.turn] < move_limit
+           and game.board.get_score(Color.next(game.turn)) < WIN_SCORE):
+        player = game.turn
+        moves = StateGenerator.enumerate_board(game.board, player)
+        if not moves:
+            break
+
+        if result.num_plies < num_random_plies:
+            move = rng.choice(moves)
+        else:
+            agent = agents[player]
+            num_nodes = agent.node_count
+            move, time_taken = find_agent_move(agent, game.board, player, configs[player].time_limit)
+            stats = result.stats[player]
+            stats.num_moves += 1
+            stats.search_time += time_taken
+            stats.num_nodes += agent.node_count - num_nodes
+
+            if not move:
+                Debug.log(f"Warning: {configs[player]} found no move, playing a random move", DebugType.Warning)
+                move = rng.choice(moves)
+
+        game.apply_move(move)
+        turn_counts[player] += 1
+        result.moves.append(str(move))
+        if on_move:
+            on_move(game, agents)
+
+    result.scores = {color: game.board.get_score(color) for color in Color}
+    if result.scores[Color.BLACK] != result.scores[Color.WHITE]:
+        result.winner = max(Color, key=lambda color: result.scores[color])
+    return result
+
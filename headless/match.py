@@ -0,0 +1,124 @@
+"""
+Defines match scheduling for playing many headless games across worker processes.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from core.board_layout import BoardLayout
+from core.color import Color
+from headless.game_runner import GameResult, PlayerConfig, PlayerStats, play_game
+from headless.elo import elo_interval
+from ui.debug import Debug, DebugType
+
+MATCH_LAYOUTS = (BoardLayout.STANDARD, BoardLayout.GERMAN_DAISY, BoardLayout.BELGIAN_DAISY)
+
+
+@dataclass(frozen=True)
+class GameSpec:
+    """
+    Models a scheduled game between the two configs of a match.
+    Games are scheduled in pairs that share a layout and opening but swap colors.
+    """
+    index: int
+    layout: BoardLayout
+    swapped: bool
+    seed: int
+
+    @staticmethod
+    def schedule(start: int, num_games: int, layouts=MATCH_LAYOUTS, seed: int = 0) -> list[GameSpec]:
+        """
+        Schedules games `start` through `start + num_games`, cycling layouts every color-swapped pair.
+        :return: a list of GameSpecs
+        """
+        return [GameSpec(index=i,
+                         layout=layouts[i // 2 % len(layouts)],
+                         swapped=i % 2 == 1,
+                         seed=seed + i // 2)
+                for i in range(start, start + num_games)]
+
+
+@dataclass
+class MatchResult:
+    """
+    Aggregates game results from the perspective of the first config of a match.
+    """
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    stats: tuple[PlayerStats, PlayerStats] = field(default_factory=lambda: (PlayerStats(), PlayerStats()))
+
+    @property
+    def num_games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    def add(self, spec: GameSpec, result: GameResult):
+        """
+        Adds the result of a scheduled game to the match.
+        :param spec: the GameSpec that was played
+        :param result: the GameResult of the game
+        """
+        color_a = Color.WHITE if spec.swapped else Color.BLACK
+        if result.winner is None:
+            self.draws += 1
+        elif result.winner == color_a:
+            self.wins += 1
+        else:
+            self.losses += 1
+
+        self.stats[0].add(result.stats[color_a])
+        self.stats[1].add(result.stats[Color.next(color_a)])
+
+    def elo(self) -> tuple[float, float, float]:
+        """
+        :return: a tuple of (elo, lower bound, upper bound) per `elo_interval`
+        """
+        return elo_interval(self.wins, self.draws, self.losses)
+
+
+def init_worker(verbose: bool):
+    """
+    Silences search logging in worker processes unless verbose.
+    """
+    if not verbose:
+        for debug_type in DebugType:
+            Debug.ACTIVE_DEBUG_TYPES[debug_type] = debug_type is DebugType.Warning
+
+
+def _play_scheduled_game(config_a: PlayerConfig, config_b: PlayerConfig, spec: GameSpec,
+                         move_limit: int) -> tuple[GameSpec, GameResult]:
+    """
+    Plays a scheduled game in a worker process.
+    """
+    black, white = (config_b, config_a) if spec.swapped else (config_a, config_b)
+    return spec, play_game(spec.layout, black, white, move_limit=move_limit, seed=spec.seed)
+
+
+def play_games(config_a: PlayerConfig, config_b: PlayerConfig, specs: list[GameSpec],
+               num_workers: int = None, move_limit: int = 40,
+               verbose: bool = False) -> Iterator[tuple[GameSpec, GameResult]]:
+    """
+    Plays scheduled games between two configs across a process pool.
+    :param num_workers: the number of worker processes, else one per CPU
+    :return: an iterator of (GameSpec, GameResult) in order of completion
+    """
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             initializer=init_worker, initargs=(verbose,)) as executor:
+        futures = [executor.submit(_play_scheduled_game, config_a, config_b, spec, move_limit)
+                   for spec in specs]
+        for future in _as_completed(futures):
+            yield future.result()
+
+
+def _as_completed(futures):
+    """
+    Yields futures as they complete, cancelling the rest if the consumer stops early.
+    """
+    try:
+        yield from as_completed(futures)
+    finally:
+        for future in futures:
+            future.cancel()
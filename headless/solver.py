@@ -0,0 +1,189 @@
+"""
+Defines a runner that measures how many positions of a suite an agent configuration solves.
+Run as a module to regenerate the tactics suite from seeded random playouts.
+"""
+
+from __future__ import annotations
+
+import random
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import Iterator
+
+from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.state_generator import StateGenerator
+from core.board import Board
+from core.color import Color
+from core.move import Move
+from headless.game_runner import PlayerConfig, find_agent_move
+from headless.match import MATCH_LAYOUTS, init_worker
+from parse.position_parser import PositionParser, PositionRecord
+
+TACTICS_SUITE_PATH = "suites/tactics.apd"
+# the most best moves a tactical position may list, so that finding one is a test
+MAX_KEY_MOVES = 3
+
+
+@dataclass(frozen=True)
+class SolveResult:
+    """
+    Models the outcome of an agent configuration on a suite position.
+    """
+    index: int
+    name: str
+    config: str
+    move: str
+    solved: bool
+    time: float
+
+
+def solve_position(position: PositionRecord, config: PlayerConfig) -> tuple[bool, Move, float]:
+    """
+    Runs an agent configuration on a position within its time limit.
+    Positions expected to eject within n moves are played out for n moves of the side to move,
+    with the same configuration replying for the opponent.
+    :param position: a PositionRecord
+    :param config: the PlayerConfig to solve with
+    :return: a tuple of (whether the position was solved, the first move played, the time taken)
+    """
+    Heuristic.set_turn_count_handler(lambda: 0)
+    agent = config.create_agent()
+    first_move, time_taken = find_agent_move(agent, position.board, position.player, config.time_limit)
+    if not position.is_solved_by(first_move) or not position.ejects_in:
+        return position.is_solved_by(first_move), first_move, time_taken
+
+    board = deepcopy(position.board)
+    player = position.player
+    move = first_move
+    for num_moves in range(1, position.ejects_in + 1):
+        score = board.get_score(player)
+        board.apply_move(move)
+        if board.get_score(player) > score:
+            return True, first_move, time_taken
+        if num_moves == position.ejects_in:
+            break
+
+        reply, _ = find_agent_move(agent, board, Color.next(player), config.time_limit)
+        if not reply:
+            break
+        board.apply_move(reply)
+        move, _ = find_agent_move(agent, board, player, config.time_limit)
+        if not move:
+            break
+
+    return False, first_move, time_taken
+
+
+def _solve_scheduled_position(index: int, position_text: str, config: PlayerConfig) -> SolveResult:
+    """
+    Solves a suite position in a worker process.
+    """
+    position = PositionParser.convert_text_to_position(position_text)
+    solved, move, time_taken = solve_position(position, config)
+    return SolveResult(index=index, name=position.id or str(index + 1), config=str(config),
+                       move=str(move) if move else None, solved=solved, time=time_taken)
+
+
+def solve_suite(suite_path: str, configs: list[PlayerConfig], num_workers: int = None,
+                verbose: bool = False) -> Iterator[SolveResult]:
+    """
+    Runs each agent configuration on every position of a suite across a process pool.
+    :param suite_path: a str path to a suite file
+    :param configs: the PlayerConfigs to solve with
+    :param num_workers: the number of worker processes, else one per CPU
+    :return: an iterator of SolveResults in suite order, configs first
+    """
+    positions = PositionParser.read_suite(suite_path)
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             initializer=init_worker, initargs=(verbose,)) as executor:
+        futures = [executor.submit(_solve_scheduled_position, index,
+                                   PositionParser.convert_position_to_text(position), config)
+                   for index, position in enumerate(positions)
+                   for config in configs]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def _get_ejecting_moves(board: Board, player: Color, moves: list[Move]) -> list[Move]:
+    """
+    Finds the moves that eject an opponent marble.
+    """
+    ejecting_moves = []
+    for move in moves:
+        if move.is_sumito(board):
+            next_board = deepcopy(board)
+            next_board.apply_move(move)
+            if next_board.get_score(player) > board.get_score(player):
+                ejecting_moves.append(move)
+    return ejecting_moves
+
+
+def _can_eject(board: Board, player: Color) -> bool:
+    return bool(_get_ejecting_moves(board, player, StateGenerator.enumerate_board(board, player)))
+
+
+def find_tactical_positions(num_positions: int, seed: int = 0, max_plies: int = 150) -> list[PositionRecord]:
+    """
+    Finds tactical positions in seeded random playouts: positions where the side to move
+    can eject a marble with few of its moves, and positions where only a few of its moves keep
+    the opponent from ejecting a marble. At most one position of each kind is taken per playout.
+    :param num_positions: the number of positions of each kind to find
+    :param seed: a random seed for the playouts
+    :param max_plies: the length of each playout
+    :return: a list of PositionRecords
+    """
+    rng = random.Random(seed)
+    eject_positions = []
+    defend_positions = []
+    while len(eject_positions) < num_positions or len(defend_positions) < num_positions:
+        layout = rng.choice(MATCH_LAYOUTS)
+        board = Board.create_from_data(layout.value)
+        player = Color.BLACK
+        needs_eject = len(eject_positions) < num_positions
+        needs_defend = len(defend_positions) < num_positions
+        for _ in range(max_plies):
+            moves = StateGenerator.enumerate_board(board, player)
+            if not moves:
+                break
+
+            ejecting_moves = _get_ejecting_moves(board, player, moves)
+            if needs_eject and ejecting_moves and len(ejecting_moves) <= MAX_KEY_MOVES:
+                needs_eject = False
+                eject_positions.append(PositionRecord(
+                    board=deepcopy(board), player=player, id=f"eject-{len(eject_positions) + 1:02}",
+                    best_moves=ejecting_moves, ejects_in=1))
+            elif needs_defend and not ejecting_moves and _can_eject(board, Color.next(player)):
+                # nearly every move loses a marble under a threat, so the few that do not are listed
+                saving_moves = []
+                for move in moves:
+                    next_board = deepcopy(board)
+                    next_board.apply_move(move)
+                    if not _can_eject(next_board, Color.next(player)):
+                        saving_moves.append(move)
+                        if len(saving_moves) > MAX_KEY_MOVES:
+                            break
+                if 0 < len(saving_moves) <= MAX_KEY_MOVES:
+                    needs_defend = False
+                    defend_positions.append(PositionRecord(
+                        board=deepcopy(board), player=player, id=f"defend-{len(defend_positions) + 1:02}",
+                        best_moves=saving_moves))
+
+            board.apply_move(rng.choice(moves))
+            player = Color.next(player)
+
+            if board.get_score(Color.BLACK) >= 3 or board.get_score(Color.WHITE) >= 3:
+                break
+
+    return eject_positions + defend_positions
+
+
+if __name__ == "__main__":
+    PositionParser.write_suite(TACTICS_SUITE_PATH, find_tactical_positions(12),
+                               header="Tactical positions found in seeded random playouts by headless.solver.\n"
+                                      "eject-*: the side to move can eject a marble.\n"
+                                      "defend-*: the side to move must find one of the few moves that keep the opponent from ejecting a marble.")
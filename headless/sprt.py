@@ -0,0 +1,211 @@
+"""
+Defines sequential probability ratio testing (SPRT) for headless matches.
+An SPRT plays games in batches until the log-likelihood ratio of two Elo
+hypotheses crosses a bound, rather than playing a fixed number of games.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from enum import Enum, auto
+from typing import Iterator
+
+from core.board_layout import BoardLayout
+from core.color import Color
+from headless.elo import sprt_bounds, sprt_llr
+from headless.game_runner import GameResult, PlayerConfig, PlayerStats
+from headless.match import MATCH_LAYOUTS, GameSpec, MatchResult, play_games
+
+
+class SprtStatus(Enum):
+    """
+    The state of a sequential probability ratio test.
+    """
+    CONTINUE = auto()
+    ACCEPT_H0 = auto()
+    ACCEPT_H1 = auto()
+
+
+@dataclass(frozen=True)
+class SprtTest:
+    """
+    Models the hypotheses of an SPRT, from the perspective of the first config of a match:
+    H0 states that it is elo0 stronger and H1 that it is elo1 stronger.
+    """
+    elo0: float = 0
+    elo1: float = 10
+    alpha: float = 0.05
+    beta: float = 0.05
+
+    @property
+    def bounds(self) -> tuple[float, float]:
+        """
+        :return: a tuple of (lower bound, upper bound) on the log-likelihood ratio
+        """
+        return sprt_bounds(self.alpha, self.beta)
+
+    def llr(self, match: MatchResult) -> float:
+        """
+        Determines the log-likelihood ratio of H1 over H0 for the given match.
+        :param match: a MatchResult
+        :return: a float
+        """
+        return sprt_llr(match.wins, match.draws, match.losses, self.elo0, self.elo1)
+
+    def status(self, match: MatchResult) -> SprtStatus:
+        """
+        Determines whether the given match accepts a hypothesis.
+        :param match: a MatchResult
+        :return: an SprtStatus
+        """
+        lower, upper = self.bounds
+        llr = self.llr(match)
+        if llr <= lower:
+            return SprtStatus.ACCEPT_H0
+        if llr >= upper:
+            return SprtStatus.ACCEPT_H1
+        return SprtStatus.CONTINUE
+
+
+@dataclass
+class SprtRun:
+    """
+    Runs an SPRT between two configs, recording each game to a JSON lines file as it completes.
+    The first line of the file records the run settings; a run resumed from an existing file
+    must use the same settings, and only plays the games missing from it.
+    """
+    config_a: PlayerConfig
+    config_b: PlayerConfig
+    test: SprtTest
+    file_path: str
+    layouts: tuple[BoardLayout, ...] = MATCH_LAYOUTS
+    seed: int = 0
+    move_limit: int = 40
+    match: MatchResult = field(default_factory=MatchResult)
+    completed: set[int] = field(default_factory=set)
+
+    @property
+    def header(self) -> dict:
+        """
+        :return: a dict of the settings that a resumed run must share
+        """
+        return {
+            "config_a": str(self.config_a),
+            "config_b": str(self.config_b),
+            "elo0": self.test.elo0,
+            "elo1": self.test.elo1,
+            "alpha": self.test.alpha,
+            "beta": self.test.beta,
+            "layouts": [layout.name for layout in self.layouts],
+            "seed": self.seed,
+            "move_limit": self.move_limit,
+        }
+
+    def load(self):
+        """
+        Loads the games recorded by a previous run of this test, else starts a new results file.
+        :raise ValueError: if the results file was written with different settings
+        """
+        if not os.path.exists(self.file_path) or not os.path.getsize(self.file_path):
+            with open(self.file_path, mode="w", encoding="utf-8") as file:
+                file.write(json.dumps(self.header) + "\n")
+            return
+
+        with open(self.file_path, mode="rb+") as file:
+            header = json.loads(file.readline())
+            if header != self.header:
+                raise ValueError(f"Results file {self.file_path} was written with different settings: {header}")
+
+            # the end of the last complete record, past which a killed run may have left a partial line
+            end = file.tell()
+            while line := file.readline():
+                if not line.endswith(b"\n"):
+                    break
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    spec, result = _decode_record(record)
+                    if spec.index not in self.completed:
+                        self.completed.add(spec.index)
+                        self.match.add(spec, result)
+                end = file.tell()
+
+            # drop the partial line, so that resumed runs append whole records after the last one
+            file.truncate(end)
+
+    def _schedule(self, num_games: int) -> list[GameSpec]:
+        """
+        Schedules the next games not yet recorded, lowest index first.
+        :param num_games: the number of games to schedule
+        :return: a list of GameSpecs
+        """
+        specs = []
+        index = 0
+        while len(specs) < num_games:
+            if index not in self.completed:
+                specs += GameSpec.schedule(index, 1, layouts=self.layouts, seed=self.seed)
+            index += 1
+        return specs
+
+    def run(self, max_games: int, batch_size: int, num_workers: int = None,
+            verbose: bool = False) -> Iterator[tuple[GameSpec, GameResult, SprtStatus]]:
+        """
+        Plays batches of games until a hypothesis is accepted or `max_games` have been played.
+        Games of a batch still in progress when a bound is crossed are discarded.
+        :param max_games: the maximum number of games across all runs of this test
+        :param batch_size: the number of games scheduled to the process pool at a time
+        :param num_workers: the number of worker processes, else one per CPU
+        :return: an iterator of (GameSpec, GameResult, SprtStatus) in order of completion
+        """
+        status = self.test.status(self.match)
+        with open(self.file_path, mode="a", encoding="utf-8") as file:
+            while status is SprtStatus.CONTINUE and self.match.num_games < max_games:
+                specs = self._schedule(min(batch_size, max_games - self.match.num_games))
+                for spec, result in play_games(self.config_a, self.config_b, specs,
+                                               num_workers=num_workers, move_limit=self.move_limit,
+                                               verbose=verbose):
+                    file.write(json.dumps(_encode_record(spec, result)) + "\n")
+                    file.flush()
+                    self.completed.add(spec.index)
+                    self.match.add(spec, result)
+                    status = self.test.status(self.match)
+                    yield spec, result, status
+                    if status is not SprtStatus.CONTINUE:
+                        break
+
+
+def _encode_record(spec: GameSpec, result: GameResult) -> dict:
+    """
+    Encodes a played game as a JSON-serializable dict.
+    """
+    return {
+        "index": spec.index,
+        "layout": spec.layout.name,
+        "swapped": spec.swapped,
+        "seed": spec.seed,
+        "winner": result.winner.name if result.winner else None,
+        "scores": {color.name: score for color, score in result.scores.items()},
+        "moves": result.moves,
+        "stats": {color.name: [stats.num_moves, stats.search_time, stats.num_nodes]
+                  for color, stats in result.stats.items()},
+    }
+
+
+def _decode_record(record: dict) -> tuple[GameSpec, GameResult]:
+    """
+    Decodes a played game from a dict written by `_encode_record`.
+    """
+    layout = BoardLayout[record["layout"]]
+    spec = GameSpec(index=record["index"], layout=layout, swapped=record["swapped"], seed=record["seed"])
+    result = GameResult(
+        layout=layout,
+        winner=Color[record["winner"]] if record["winner"] else None,
+        scores={Color[name]: score for name, score in record["scores"].items()},
+        moves=record["moves"],
+        stats={Color[name]: PlayerStats(*stats) for name, stats in record["stats"].items()},
+    )
+    return spec, result
@@ -2,9 +2,18 @@ from queue import Queue
 
 
 class Dispatcher(Queue):
+    def __init__(self, on_put: callable = None):
+        super().__init__()
+        self._on_put = on_put
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        if self._on_put:
+            self._on_put()
+
     def dispatch(self):
         while not self.empty():
             self.get()()
 
     def clear(self):
-        self.queue.clear()
\ No newline at end of file
+        self.queue.clear()
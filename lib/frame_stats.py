@@ -0,0 +1,42 @@
+from collections import deque
+from math import ceil
+
+# the number of most recent frames kept
+FRAME_WINDOW = 1000
+
+
+class FrameStats:
+    """
+    Keeps the most recent frame times, in seconds, for percentiles that expose jank.
+    """
+
+    def __init__(self, size: int = FRAME_WINDOW):
+        self._frame_times = deque(maxlen=size)
+        self.num_frames = 0
+
+    def __len__(self):
+        return len(self._frame_times)
+
+    def record(self, frame_time: float):
+        self._frame_times.append(frame_time)
+        self.num_frames += 1
+
+    def get_percentile(self, percent: float) -> float:
+        """
+        Gets a nearest-rank percentile of the recent frame times.
+        :param percent: a float in [0, 100]
+        :return: a float in seconds, else 0 if no frames were recorded
+        """
+        if not self._frame_times:
+            return 0
+        frame_times = sorted(self._frame_times)
+        return frame_times[max(ceil(percent / 100 * len(frame_times)) - 1, 0)]
+
+    def __str__(self):
+        if not self._frame_times:
+            return "none recorded"
+        mean = sum(self._frame_times) / len(self._frame_times)
+        return (f"{self.num_frames} recorded, mean {mean * 1000:.1f}ms,"
+                f" p50 {self.get_percentile(50) * 1000:.1f}ms,"
+                f" p99 {self.get_percentile(99) * 1000:.1f}ms,"
+                f" max {max(self._frame_times) * 1000:.1f}ms")
@@ -49,6 +49,14 @@ class HexGrid:
 
         return data
 
+    def to_flat_array(self):
+        """
+        Flattens the grid into a single list of values in storage order.
+        Empty cells are 0, and other values are stored by their `value`.
+        :return: a list of length equal to the number of cells
+        """
+        return [cell.value if cell else 0 for row in self._data for cell in row]
+
     @property
     def height(self):
         """
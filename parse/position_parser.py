@@ -0,0 +1,145 @@
+"""
+This module contains methods to read and write Abalone position suites.
+
+A suite is a text file with one position per line, modelled on chess's EPD format:
+
+    C5b,D5b,E5b,F5w,G5w w; id "push-01"; bm (NW, C5, E5); ejects 1
+
+The first field is the occupied cells in StateParser's test.board notation followed by
+the side to move (b or w). It is followed by any of these semicolon-separated operations:
+- id "<name>": the name of the position
+- bm <move>[ | <move>...]: the best moves, one of which must be played to solve the position
+- am <move>[ | <move>...]: the moves to avoid, none of which may be played to solve the position
+- ejects <n>: the side to move ejects a marble within its next n moves
+Blank lines and lines starting with # are ignored.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from core.board import Board
+from core.color import Color
+from core.move import Move
+from parse.state_parser import StateParser
+
+MOVE_SEPARATOR = " | "
+
+
+@dataclass
+class PositionRecord:
+    """
+    Models a position of a suite and its expected outcome.
+    """
+    board: Board
+    player: Color
+    id: str = None
+    best_moves: list[Move] = field(default_factory=list)
+    avoid_moves: list[Move] = field(default_factory=list)
+    ejects_in: int = None
+
+    @property
+    def name(self) -> str:
+        return self.id or StateParser.convert_board_to_text(self.board)
+
+    def is_solved_by(self, move: Move) -> bool:
+        """
+        Determines if a move satisfies the best and avoid move annotations of this position.
+        Positions without either annotation are solved by any move.
+        :param move: a Move, or None if no move was found
+        :return: a bool
+        """
+        if not move:
+            return False
+        if self.best_moves and not any(is_same_move(move, best_move) for best_move in self.best_moves):
+            return False
+        return not any(is_same_move(move, avoid_move) for avoid_move in self.avoid_moves)
+
+
+def is_same_move(move: Move, other: Move) -> bool:
+    """
+    Determines if two moves select the same marbles in the same direction.
+    :param move: a Move
+    :param other: a Move
+    :return: a bool
+    """
+    return move.direction == other.direction and move.selection == other.selection
+
+
+class PositionParser:
+    """
+    This class contains the methods to parse position suites into position records and vice versa.
+    """
+
+    @staticmethod
+    def convert_text_to_position(text: str) -> PositionRecord:
+        """
+        Converts a position line into a position record.
+        :param text: a str in the suite notation
+        :return: a PositionRecord
+        :raise ValueError: if the line has an unknown operation
+        """
+        state_text, *operations = [part.strip() for part in text.strip().split(";")]
+        cells_text, player_text = state_text.rsplit(" ", 1)
+        layout, player = StateParser.convert_text_to_state(f"{player_text}\n{cells_text}")
+        position = PositionRecord(board=Board.create_from_data(layout), player=Color(player))
+
+        for operation in operations:
+            if not operation:
+                continue
+            opcode, _, operand = operation.partition(" ")
+            if opcode == "id":
+                position.id = operand.strip('"')
+            elif opcode == "bm":
+                position.best_moves = [Move.decode(move_str) for move_str in operand.split(MOVE_SEPARATOR)]
+            elif opcode == "am":
+                position.avoid_moves = [Move.decode(move_str) for move_str in operand.split(MOVE_SEPARATOR)]
+            elif opcode == "ejects":
+                position.ejects_in = int(operand)
+            else:
+                raise ValueError(f"Unknown position operation: {opcode}")
+
+        return position
+
+    @staticmethod
+    def convert_position_to_text(position: PositionRecord) -> str:
+        """
+        Converts a position record into a position line.
+        :param position: a PositionRecord
+        :return: a str in the suite notation
+        """
+        player_text = "b" if position.player == Color.BLACK else "w"
+        fields = [f"{StateParser.convert_board_to_text(position.board)} {player_text}"]
+        if position.id:
+            fields.append(f'id "{position.id}"')
+        if position.best_moves:
+            fields.append(f"bm {MOVE_SEPARATOR.join(map(str, position.best_moves))}")
+        if position.avoid_moves:
+            fields.append(f"am {MOVE_SEPARATOR.join(map(str, position.avoid_moves))}")
+        if position.ejects_in:
+            fields.append(f"ejects {position.ejects_in}")
+        return "; ".join(fields)
+
+    @classmethod
+    def read_suite(cls, file_path: str) -> list[PositionRecord]:
+        """
+        Reads the positions of a suite file.
+        :param file_path: a str path to a suite file
+        :return: a list of PositionRecords
+        """
+        with open(file_path, mode="r", encoding="utf-8") as file:
+            return [cls.convert_text_to_position(line) for line in file
+                    if line.strip() and not line.startswith("#")]
+
+    @classmethod
+    def write_suite(cls, file_path: str, positions: list[PositionRecord], header: str = None):
+        """
+        Writes positions to a suite file.
+        :param file_path: a str path to write to
+        :param positions: a list of PositionRecords
+        :param header: a comment to write at the top of the file
+        """
+        with open(file_path, mode="w", encoding="utf-8") as file:
+            if header:
+                file.writelines(f"# {line}\n" for line in header.splitlines())
+            file.writelines(cls.convert_position_to_text(position) + "\n" for position in positions)
@@ -1,7 +1,49 @@
 """This module contains methods to read parse input/output files containing current board states."""
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
 from core.board import Board
 from core.color import Color
+from core.constants import BOARD_SIZE
+from core.hex import Hex
 from core.move import Move
+from lib.hex.hex_grid import HexGrid
+
+COLOR_TEXTS = {Color.BLACK: "b", Color.WHITE: "w"}
+TEXT_COLORS = {"b": Color.BLACK.value, "w": Color.WHITE.value}
+
+
+def _setup_cell_tables(size):
+    """
+    Precomputes the notation of every cell in board storage coordinates.
+    :param size: the board size
+    :return: a tuple of (canonical rows, cell indices, piece ranks) where canonical rows lists
+             (r, ((q, black piece text, white piece text), ...)) in the test.board order (rows A to I,
+             columns ascending), cell indices maps cell texts such as "A1" to (r, q) and piece ranks
+             maps piece texts such as "A1b" to their position in the test.board order
+    """
+    grid = HexGrid(size)
+    canonical_rows = []
+    cell_indices = {}
+    for r in reversed(range(grid.height)):
+        cells = []
+        for q in range(grid.width(r)):
+            cell_text = str(Hex(q + grid.offset(r), r))
+            cell_indices[cell_text] = (r, q)
+            cells.append((q, cell_text + COLOR_TEXTS[Color.BLACK], cell_text + COLOR_TEXTS[Color.WHITE]))
+        canonical_rows.append((r, tuple(cells)))
+
+    piece_ranks = {}
+    for color_index in (1, 2):
+        for _, cells in canonical_rows:
+            for cell in cells:
+                piece_ranks[cell[color_index]] = len(piece_ranks)
+    return tuple(canonical_rows), cell_indices, piece_ranks
+
+
+CANONICAL_ROWS, CELL_INDICES, PIECE_RANKS = _setup_cell_tables(BOARD_SIZE)
+EMPTY_LAYOUT = tuple((0,) * len(line) for line in HexGrid.generate_empty(BOARD_SIZE))
 
 
 class StateParser:
@@ -11,19 +53,7 @@ class StateParser:
     """
     @staticmethod
     def get_empty_board():
-        empty_board_layout = \
-            [
-                [0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 0]
-            ]
-        return empty_board_layout
+        return [list(line) for line in EMPTY_LAYOUT]
 
     # Keep for testing translate_board_to_text.
     test_output_board_layout = \
@@ -48,41 +78,56 @@ class StateParser:
         """
         board = cls.get_empty_board()
         data = text.rstrip()
-        turn_color = (data[0])
-        if turn_color == 'b':
-            turn_color = 1
-        else:
-            turn_color = 2
-        untranslated_list = data[2:].split(",")
-        for string in untranslated_list:
-            translated = cls._translate_text_to_board(string)
-            board[translated[0]][translated[1] - 1] = translated[2]
-
-        return board, int(turn_color)
+        cell_indices = CELL_INDICES
+        black = TEXT_COLORS["b"]
+        white = TEXT_COLORS["w"]
+        for piece in data[2:].split(","):
+            r, q = cell_indices[piece[:2]]
+            board[r][q] = black if piece[2] == "b" else white
+
+        return board, black if data[0] == "b" else white
 
     @classmethod
-    def convert_board_to_text(cls, board: Board) -> str:
+    def convert_texts_to_states(cls, texts: Iterable[str]) -> Iterator[tuple[list[list[int]], int]]:
+        """
+        Converts many Test.input agent representations, e.g. the lines of several files.
+        :param texts: an iterable of strings containing Test.input agent representations
+        :return: an iterator of tuples containing our agent representations
+        """
+        return map(cls.convert_text_to_state, texts)
+
+    @staticmethod
+    def convert_board_to_text(board: Board) -> str:
         """
         Given a board representation, return a string containing all the occupied cells.
+        Pieces are written in the test.board order: black then white, rows A to I, columns ascending.
         :param board: a board in our agent representation
         :return: a string containing the agent representation in the test.board notation
         """
+        data = board._data
+        black = Color.BLACK
+        white = Color.WHITE
+        black_pieces = []
+        white_pieces = []
+        for r, cells in CANONICAL_ROWS:
+            line = data[r]
+            for q, black_piece, white_piece in cells:
+                color = line[q]
+                if color is black:
+                    black_pieces.append(black_piece)
+                elif color is white:
+                    white_pieces.append(white_piece)
+        black_pieces += white_pieces
+        return ",".join(black_pieces)
 
-        temp_positions = ""
-
-        current_state = Board.enumerate(board)
-        for marbles, colour in current_state:
-            if colour is not None:
-                if colour == Color.BLACK:
-                    player = "b"
-                else:
-                    player = "w"
-                temp_positions += str(marbles) + player + ", "
-        positions_list = temp_positions.split(" ")
-        positions_list.sort()
-        string_positions = "".join(map(str, positions_list))
-
-        return cls._sort_text(string_positions[:(len(string_positions) - 1)])
+    @classmethod
+    def convert_boards_to_texts(cls, boards: Iterable[Board]) -> Iterator[str]:
+        """
+        Converts many boards to the test.board notation, e.g. all boards generated from a position.
+        :param boards: an iterable of boards in our agent representation
+        :return: an iterator of strings in the test.board notation
+        """
+        return map(cls.convert_board_to_text, boards)
 
     @staticmethod
     def convert_move_to_text(move: Move) -> str:
@@ -92,35 +137,6 @@ class StateParser:
         """
         return str(move)
 
-    @staticmethod
-    def _translate_text_to_board(string):
-        """
-        Translates a single piece from Test.input into our own piece notation.
-        :param string: a string containing information from Test.input
-        :return:
-        """
-        mapping = {
-            "A": 8,
-            "B": 7,
-            "C": 6,
-            "D": 5,
-            "E": 4,
-            "F": 3,
-            "G": 2,
-            "H": 1,
-            "I": 0,
-        }
-
-        if ord(string[0]) > ord('E'):
-            position = int(string[1]) - int(ord(string[0]) - ord('E'))
-        else:
-            position = int(string[1])
-        if string[2] == "b":
-            colour = 1
-        else:
-            colour = 2
-        return [mapping[string[0]], position, colour]
-
     @staticmethod
     def _sort_text(string):
         """
@@ -128,29 +144,4 @@ class StateParser:
         :param string: a string of unsorted pieces
         :return: a string of sorted pieces
         """
-        list_text = string.split(",")
-        # assigns certain attributes with a higher place value to sort them.
-        value = {
-            "b": 1000,
-            "w": 100,
-            "A": 90,
-            "B": 80,
-            "C": 70,
-            "D": 60,
-            "E": 50,
-            "F": 40,
-            "G": 30,
-            "H": 20,
-            "I": 10,
-        }
-        sorted_dict = {}
-        positions = []
-        for text in list_text:
-            position = int(value[text[0]]) + 10-int(text[1]) + int(value[text[2]])
-            positions.append(position)
-            sorted_dict[position] = text
-        positions.sort(reverse=True)
-        concat = ""
-        for pos in positions:
-            concat += sorted_dict[pos] + ","
-        return concat[:-1]
+        return ",".join(sorted(string.split(","), key=PIECE_RANKS.__getitem__))
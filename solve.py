@@ -0,0 +1,41 @@
+"""
+Measures how many positions of a suite each agent configuration solves.
+
+Usage: python solve.py suites/tactics.apd BRANDON:BRANDON_OFFENSIVE:2 DEFAULT:WEIGHTED:2 --workers 4
+where each config is written as AGENT[:HEURISTIC[:TIME[:DEPTH]]] and TIME is the per-position budget.
+"""
+
+from argparse import ArgumentParser
+
+from headless.game_runner import PlayerConfig
+from headless.solver import TACTICS_SUITE_PATH, solve_suite
+
+
+def _parse_args():
+    parser = ArgumentParser(description="Runs agent configurations on a suite of positions.")
+    parser.add_argument("suite", help=f"a position suite file, e.g. {TACTICS_SUITE_PATH}")
+    parser.add_argument("configs", nargs="+", type=PlayerConfig.parse, help="AGENT[:HEURISTIC[:TIME[:DEPTH]]]")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show search logs")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    num_solved = {str(config): 0 for config in args.configs}
+    num_positions = 0
+
+    for result in solve_suite(args.suite, args.configs, num_workers=args.workers, verbose=args.verbose):
+        num_positions = max(num_positions, result.index + 1)
+        num_solved[result.config] += result.solved
+        print(f"{result.name:<12} {result.config:<36} {'solved' if result.solved else 'FAILED':<6}"
+              f" {result.time:>6.2f}s  {result.move}")
+
+    print()
+    for config, count in num_solved.items():
+        print(f"{config}: solved {count}/{num_positions}")
+
+
+if __name__ == "__main__":
+    main()
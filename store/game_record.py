@@ -0,0 +1,306 @@
+"""
+Defines a compact binary, append-only format for game records and a memory-mapped reader.
+
+A record file holds one game:
+- a header: the magic bytes, the format version, the index of the starting BoardLayout
+  and a length-prefixed JSON object describing the game config
+- one fixed-width record per ply: the packed move, the flags, the search depth, the
+  evaluation, the move start and end times and the time spent paused
+
+Plies are appended as they are played, so a record cut short by a crash loses at most
+its last, partial ply, which readers ignore. Run as a module to summarize a directory
+of records.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+from dataclasses import dataclass, field
+from itertools import count
+from typing import Iterator, NamedTuple
+
+from core.board_layout import BoardLayout
+from core.move import Move
+from store.packing import pack_move, unpack_move
+from ui.model.game_history import GameHistory, GameHistoryItem
+
+RECORD_EXTENSION = ".agr"
+MAGIC = b"AGR\x00"
+VERSION = 1
+
+HEADER_FORMAT = struct.Struct("<4sHBI")
+PLY_FORMAT = struct.Struct("<HBBfddf")
+
+LAYOUTS = list(BoardLayout)
+
+# ply flags
+HAS_SCORE = 1
+HAS_DEPTH = 2
+
+
+class PlyRecord(NamedTuple):
+    """
+    Models a ply of a game record as stored, without decoding its move.
+    """
+    packed_move: int
+    flags: int
+    depth: int
+    score: float
+    time_start: float
+    time_end: float
+    paused_duration: float
+
+    @property
+    def move(self) -> Move:
+        return unpack_move(self.packed_move)
+
+    @property
+    def time_taken(self) -> float:
+        return self.time_end - self.time_start - max(self.paused_duration, 0)
+
+    def get_score(self) -> float:
+        return self.score if self.flags & HAS_SCORE else None
+
+    def get_depth(self) -> int:
+        return self.depth if self.flags & HAS_DEPTH else None
+
+
+@dataclass(frozen=True)
+class GameRecordHeader:
+    """
+    Models the header of a game record.
+    """
+    layout: BoardLayout
+    config: dict = field(default_factory=dict)
+
+    def encode(self) -> bytes:
+        config_bytes = json.dumps(self.config, separators=(",", ":")).encode("utf-8")
+        return HEADER_FORMAT.pack(MAGIC, VERSION, LAYOUTS.index(self.layout), len(config_bytes)) + config_bytes
+
+    @staticmethod
+    def decode(buffer) -> tuple[GameRecordHeader, int]:
+        """
+        Decodes a header from the start of a buffer.
+        Raises ValueError if the buffer does not start with a header.
+        :param buffer: a bytes-like object
+        :return: a tuple of (the GameRecordHeader, the size of the header in bytes)
+        """
+        if len(buffer) < HEADER_FORMAT.size:
+            raise ValueError("game record header is truncated")
+        magic, version, layout_index, config_size = HEADER_FORMAT.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} game record")
+
+        header_size = HEADER_FORMAT.size + config_size
+        if len(buffer) < header_size:
+            raise ValueError("game record header is truncated")
+        config = json.loads(bytes(buffer[HEADER_FORMAT.size:header_size]).decode("utf-8"))
+        return GameRecordHeader(LAYOUTS[layout_index], config), header_size
+
+
+class GameRecordWriter:
+    """
+    Appends plies to a game record, creating it with a header if it does not exist.
+    """
+
+    def __init__(self, file_path: str, header: GameRecordHeader):
+        """
+        Opens a game record for appending, dropping any partial ply left by an interrupted write.
+        Raises ValueError if the file is a record of a different game.
+        :param file_path: a str path
+        :param header: the GameRecordHeader of the game
+        """
+        if os.path.exists(file_path) and os.path.getsize(file_path):
+            with GameRecordReader(file_path) as reader:
+                if reader.header != header:
+                    raise ValueError(f"{file_path} is a record of a different game")
+                size = reader.size
+            os.truncate(file_path, size)
+
+        self.file_path = file_path
+        header_bytes = header.encode()
+        self._plies_offset = len(header_bytes)
+        self._file = open(file_path, mode="ab")
+        if self._file.tell() == 0:
+            self._file.write(header_bytes)
+            self._file.flush()
+
+    def append(self, item: GameHistoryItem, score: float = None, depth: int = None):
+        """
+        Appends a ply to the record.
+        :param item: the GameHistoryItem of the ply
+        :param score: the evaluation of the move, if known
+        :param depth: the depth the move was searched to, if known
+        """
+        flags = (HAS_SCORE if score is not None else 0) | (HAS_DEPTH if depth is not None else 0)
+        self._file.write(PLY_FORMAT.pack(pack_move(item.move), flags, depth or 0, score or 0,
+                                         item.time_start or 0, item.time_end or 0, item.paused_duration or 0))
+        self._file.flush()
+
+    def truncate(self, num_plies: int):
+        """
+        Drops the plies past the given number, such as those of undone moves.
+        :param num_plies: the number of plies to keep
+        """
+        self._file.truncate(self._plies_offset + num_plies * PLY_FORMAT.size)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def create_game_record(dir_path: str, name: str, header: GameRecordHeader) -> GameRecordWriter:
+    """
+    Creates a new game record in a directory, numbering its name after any records that hold it.
+    :param dir_path: a str path to an existing directory
+    :param name: the name of the record, without extension
+    :param header: the GameRecordHeader of the game
+    :return: a GameRecordWriter
+    """
+    for index in count(1):
+        file_name = f"{name}-{index}" if index > 1 else name
+        file_path = os.path.join(dir_path, file_name + RECORD_EXTENSION)
+        try:
+            # claims the name, so that games ending at the same time never share a record
+            open(file_path, mode="xb").close()
+        except FileExistsError:
+            continue
+        return GameRecordWriter(file_path, header)
+
+
+def write_game_history(file_path: str, layout: BoardLayout, history: GameHistory, config: dict = None):
+    """
+    Writes a complete game to a new game record.
+    :param file_path: a str path
+    :param layout: the starting BoardLayout
+    :param history: the GameHistory of the game
+    :param config: a JSON-serializable dict describing the game config
+    """
+    if os.path.exists(file_path):
+        os.remove(file_path)
+    with GameRecordWriter(file_path, GameRecordHeader(layout, config or {})) as writer:
+        for item in history:
+            writer.append(item)
+
+
+class GameRecordReader:
+    """
+    Reads a game record through a memory map, unpacking plies only as they are accessed.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Opens a game record for reading.
+        Raises ValueError if the file is not a game record.
+        :param file_path: a str path
+        """
+        self.file_path = file_path
+        with open(file_path, mode="rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.header, self._plies_offset = GameRecordHeader.decode(self._buffer)
+        except ValueError:
+            self._buffer.close()
+            raise
+
+    @property
+    def layout(self) -> BoardLayout:
+        return self.header.layout
+
+    def __len__(self):
+        return (len(self._buffer) - self._plies_offset) // PLY_FORMAT.size
+
+    @property
+    def size(self) -> int:
+        """
+        Determines the size of the record in bytes, excluding any partial ply.
+        :return: an int
+        """
+        return self._plies_offset + len(self) * PLY_FORMAT.size
+
+    def __getitem__(self, index: int) -> PlyRecord:
+        """
+        Unpacks the ply at the given index.
+        :param index: an int
+        :return: a PlyRecord
+        """
+        num_plies = len(self)
+        if index < 0:
+            index += num_plies
+        if not 0 <= index < num_plies:
+            raise IndexError(f"ply index {index} out of range")
+        return PlyRecord._make(PLY_FORMAT.unpack_from(self._buffer, self._plies_offset + index * PLY_FORMAT.size))
+
+    def __iter__(self) -> Iterator[PlyRecord]:
+        return map(PlyRecord._make, self.iter_raw())
+
+    def iter_raw(self) -> Iterator[tuple]:
+        """
+        Iterates over the plies as plain tuples in PlyRecord field order, the cheapest way to scan.
+        :return: an iterator of tuples
+        """
+        # iterates over a copy, as an unfinished iterator over a view of the map would keep it from closing
+        return PLY_FORMAT.iter_unpack(self._buffer[self._plies_offset:self.size])
+
+    def to_game_history(self) -> GameHistory:
+        """
+        Decodes the record into a GameHistory.
+        :return: a GameHistory
+        """
+        return GameHistory([GameHistoryItem(ply.time_start, ply.time_end, ply.paused_duration, ply.move)
+                            for ply in self])
+
+    def close(self):
+        self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def find_game_records(path: str) -> list[str]:
+    """
+    Finds the game records in a directory and its subdirectories.
+    :param path: a str path to a directory, or to a single record
+    :return: a sorted list of str paths
+    """
+    if not os.path.isdir(path):
+        return [path]
+    return sorted(os.path.join(dir_path, file_name)
+                  for dir_path, _, file_names in os.walk(path)
+                  for file_name in file_names if file_name.endswith(RECORD_EXTENSION))
+
+
+def iter_game_records(paths: list[str]) -> Iterator[GameRecordReader]:
+    """
+    Opens each game record in turn, closing it when the next is requested.
+    :param paths: str paths to records or directories of records
+    :return: an iterator of GameRecordReaders
+    """
+    for path in paths:
+        for file_path in find_game_records(path):
+            with GameRecordReader(file_path) as reader:
+                yield reader
+
+
+if __name__ == "__main__":
+    num_games = 0
+    num_plies = 0
+    time_taken = 0
+    for reader in iter_game_records(sys.argv[1:] or ["."]):
+        num_games += 1
+        for _, _, _, _, time_start, time_end, paused_duration in reader.iter_raw():
+            num_plies += 1
+            time_taken += time_end - time_start - max(paused_duration, 0)
+    print(f"{num_games} games, {num_plies} plies, {time_taken / (num_plies or 1):.2f}s per move")
@@ -0,0 +1,256 @@
+"""
+Defines an opening book of weighted moves for the first plies of each BoardLayout.
+
+A book file holds a header (the magic bytes, the format version, the flags and the number of
+entries) followed by fixed-width entries of (position hash, packed move, weight), sorted by
+position hash. A position may have several entries; probes binary-search for the first and pick
+among them at random, in proportion to their weights. A symmetric book keys positions by their
+canonical hashes and holds moves in the frame of the canonical image, so that one entry serves
+every symmetric and color-swapped image of its position.
+
+Run as a module to build a book from fixed-depth searches and self-play statistics.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import random
+import struct
+from collections import defaultdict
+from copy import deepcopy
+from typing import Iterable
+
+from agent.brandon.search import Search
+from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.state_generator import StateGenerator
+from agent.zobrist import Zobrist
+from agent.zobrist.symmetry import invert_symmetry, transform_move
+from core.board import Board
+from core.board_layout import BoardLayout
+from core.color import Color
+from core.move import Move
+from headless.game_runner import PlayerConfig
+from headless.match import MATCH_LAYOUTS, GameSpec, init_worker, play_games
+from store.packing import pack_move, unpack_move
+from ui.constants import OPENING_BOOK_PATH
+from ui.model.heuristic_type import HeuristicType
+
+MAGIC = b"ABK\x00"
+VERSION = 1
+
+HEADER_FORMAT = struct.Struct("<4sHHI")
+ENTRY_FORMAT = struct.Struct("<QHH")
+MAX_WEIGHT = 0xFFFF
+
+# header flags
+SYMMETRIC = 1
+
+
+def _hash_position(board: Board, player: Color, symmetric: bool) -> tuple[int, int]:
+    """
+    Hashes a position for a book.
+    :return: a tuple of (the position hash, the symmetry mapping the position to the frame of its moves)
+    """
+    if symmetric:
+        return Zobrist.create_canonical_position_hash(board, player)
+    return Zobrist.create_position_hash(board, player), 0
+
+
+class OpeningBook:
+    """
+    A read-only opening book, held in memory as a sorted array of entries.
+    """
+
+    def __init__(self, file_path: str, seed: int = None):
+        """
+        Loads an opening book.
+        Raises ValueError if the file is not an opening book.
+        :param file_path: a str path
+        :param seed: a random seed for choosing between book moves
+        """
+        self.file_path = file_path
+        with open(file_path, mode="rb") as file:
+            buffer = file.read()
+        magic, version, flags, num_entries = HEADER_FORMAT.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{file_path} is not a version {VERSION} opening book")
+        self.symmetric = bool(flags & SYMMETRIC)
+
+        entries = list(ENTRY_FORMAT.iter_unpack(
+            buffer[HEADER_FORMAT.size:HEADER_FORMAT.size + num_entries * ENTRY_FORMAT.size]))
+        self._keys = [key for key, _, _ in entries]
+        self._moves = [packed_move for _, packed_move, _ in entries]
+        self._weights = [weight for _, _, weight in entries]
+        self._rng = random.Random(seed)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get_moves(self, board: Board, player: Color) -> list[tuple[Move, int]]:
+        """
+        Looks up the book moves of a position, dropping any that are illegal in it,
+        as entries of other positions that share its hash would be.
+        :param board: a Board
+        :param player: the Color to move
+        :return: a list of (Move, weight)
+        """
+        key, symmetry = _hash_position(board, player, self.symmetric)
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_right(self._keys, key, lo=start)
+        moves = []
+        for index in range(start, end):
+            move = unpack_move(self._moves[index])
+            if symmetry:
+                move = transform_move(move, invert_symmetry(symmetry))
+            if move.get_player(board) == player and board.is_valid_move(move, player):
+                moves.append((move, self._weights[index]))
+        return moves
+
+    def probe(self, board: Board, player: Color) -> Move:
+        """
+        Chooses a book move for a position at random, in proportion to the weights of its moves.
+        :param board: a Board
+        :param player: the Color to move
+        :return: a Move, else None if the position is out of book
+        """
+        moves = [(move, weight) for move, weight in self.get_moves(board, player) if weight]
+        if not moves:
+            return None
+        return self._rng.choices([move for move, _ in moves], weights=[weight for _, weight in moves])[0]
+
+
+class OpeningBookBuilder:
+    """
+    Accumulates weighted book moves and writes them as a book file.
+    """
+
+    def __init__(self, symmetric: bool = False):
+        """
+        :param symmetric: whether or not to build a symmetric book
+        """
+        self.symmetric = symmetric
+        # maps position hashes to packed moves to weights
+        self._positions = defaultdict(lambda: defaultdict(int))
+
+    @property
+    def num_positions(self) -> int:
+        return len(self._positions)
+
+    def add_move(self, board: Board, player: Color, move: Move, weight: int):
+        """
+        Adds weight to a move of a position.
+        """
+        key, symmetry = _hash_position(board, player, self.symmetric)
+        self._positions[key][pack_move(transform_move(move, symmetry) if symmetry else move)] += weight
+
+    def add_searched_moves(self, layouts: Iterable[BoardLayout], num_plies: int, depth: int, width: int,
+                           heuristic_type: HeuristicType = HeuristicType.BRANDON_OFFENSIVE):
+        """
+        Expands the first plies from each layout, scoring every move of each position with a search
+        of its reply and adding the best `width` moves, weighted by rank. Each book move is expanded
+        in turn, so the book covers the replies to every line it plays. A symmetric book expands
+        one image of each position.
+        :param layouts: the BoardLayouts to start from
+        :param num_plies: the number of plies to expand
+        :param depth: the depth to score moves at, counting the move itself
+        :param width: the number of moves to keep per position
+        """
+        search = Search()
+        search.heuristic = heuristic_type
+        Heuristic.set_turn_count_handler(lambda: 0)
+
+        for layout in layouts:
+            frontier = [BoardLayout.setup_board(layout)]
+            player = Color.BLACK
+            for _ in range(num_plies):
+                next_frontier = {}
+                for board in frontier:
+                    for rank, move in enumerate(self._find_best_moves(search, board, player, depth, width)):
+                        self.add_move(board, player, move, weight=width - rank)
+                        next_board = deepcopy(board)
+                        next_board.apply_move(move)
+                        next_key, _ = _hash_position(next_board, Color.next(player), self.symmetric)
+                        next_frontier.setdefault(next_key, next_board)
+                frontier = list(next_frontier.values())
+                player = Color.next(player)
+
+    @staticmethod
+    def _find_best_moves(search: Search, board: Board, player: Color, depth: int, width: int) -> list[Move]:
+        """
+        Scores each move of a position by the negated score of the opponent's best reply.
+        :return: the best `width` Moves, best first
+        """
+        move_scores = []
+        temp_board = deepcopy(board)
+        for move in StateGenerator.enumerate_board(board, player):
+            temp_board.apply_move(move)
+            if depth > 1:
+                search.start(temp_board, Color.next(player), depth=depth - 1)
+                move_score = -search.best_score
+            else:
+                move_score = search.heuristic.call(temp_board, player)
+            move_scores.append((move_score, move))
+            temp_board.copy_state(board)
+
+        move_scores.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in move_scores[:width]]
+
+    def add_game(self, layout: BoardLayout, moves: Iterable[Move], winner: Color, num_plies: int):
+        """
+        Adds the opening moves of a game, weighted by the outcome for the player who made them:
+        2 for a win, 1 for a draw and 0 for a loss.
+        :param layout: the starting BoardLayout
+        :param moves: the Moves of the game
+        :param winner: the winning Color, else None for a draw
+        :param num_plies: the number of opening plies to add
+        """
+        board = BoardLayout.setup_board(layout)
+        player = Color.BLACK
+        for _, move in zip(range(num_plies), moves):
+            self.add_move(board, player, move, weight=1 if winner is None else 2 * (winner == player))
+            board.apply_move(move)
+            player = Color.next(player)
+
+    def write(self, file_path: str):
+        """
+        Writes the book, sorted by position hash.
+        :param file_path: a str path
+        """
+        entries = sorted((key, packed_move, min(weight, MAX_WEIGHT))
+                         for key, moves in self._positions.items()
+                         for packed_move, weight in moves.items())
+        with open(file_path, mode="wb") as file:
+            file.write(HEADER_FORMAT.pack(MAGIC, VERSION, SYMMETRIC if self.symmetric else 0, len(entries)))
+            file.writelines(ENTRY_FORMAT.pack(*entry) for entry in entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds an opening book.")
+    parser.add_argument("book", nargs="?", default=OPENING_BOOK_PATH, help=f"the book file (default: {OPENING_BOOK_PATH})")
+    parser.add_argument("--layouts", nargs="+", default=[layout.name for layout in MATCH_LAYOUTS],
+                        help="the layouts to build the book for (default: the match layouts)")
+    parser.add_argument("--plies", type=int, default=4, help="the number of plies to expand (default: 4)")
+    parser.add_argument("--depth", type=int, default=2, help="the depth to score moves at (default: 2)")
+    parser.add_argument("--width", type=int, default=3, help="the number of moves per position (default: 3)")
+    parser.add_argument("--self-play", nargs=2, metavar="CONFIG",
+                        help="agent configurations whose games add weight to the moves they play")
+    parser.add_argument("--games", type=int, default=24, help="the number of self-play games (default: 24)")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--symmetric", action="store_true",
+                        help="share entries between symmetric and color-swapped positions")
+    args = parser.parse_args()
+    init_worker(verbose=False)
+
+    layouts = [BoardLayout[name.upper()] for name in args.layouts]
+    builder = OpeningBookBuilder(symmetric=args.symmetric)
+    builder.add_searched_moves(layouts, args.plies, args.depth, args.width)
+
+    if args.self_play:
+        config_a, config_b = map(PlayerConfig.parse, args.self_play)
+        specs = GameSpec.schedule(0, args.games, layouts=tuple(layouts))
+        for _, result in play_games(config_a, config_b, specs, num_workers=args.workers):
+            builder.add_game(result.layout, map(Move.decode, result.moves), result.winner, args.plies)
+
+    builder.write(args.book)
+    print(f"{builder.num_positions} positions written to {args.book}")
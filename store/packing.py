@@ -0,0 +1,109 @@
+"""
+Defines compact encodings of cells, moves and positions for the on-disk stores.
+Cells are numbered in board storage order, from the top-left cell (I5) to the bottom-right cell (A5).
+"""
+
+from __future__ import annotations
+
+from core.board import Board
+from core.color import Color
+from core.constants import BOARD_SIZE
+from core.hex import Hex, HexDirection
+from core.move import Move
+from core.selection import Selection
+from lib.hex.hex_grid import HexGrid
+
+
+def _setup_cells(size) -> list[Hex]:
+    """
+    Lists the cells of a board in storage order.
+    :param size: the board size
+    :return: a list of Hexes
+    """
+    grid = HexGrid(size)
+    return [Hex(q + grid.offset(r), r) for r in range(grid.height) for q in range(grid.width(r))]
+
+
+CELLS = _setup_cells(BOARD_SIZE)
+CELL_INDICES = {(cell.x, cell.y): index for index, cell in enumerate(CELLS)}
+DIRECTIONS = list(HexDirection)
+DIRECTION_INDICES = {direction: index for index, direction in enumerate(DIRECTIONS)}
+
+CELL_BITS = 6
+DIRECTION_SHIFT = CELL_BITS * 2
+CELL_MASK = (1 << CELL_BITS) - 1
+
+
+def pack_move(move: Move) -> int:
+    """
+    Packs a move into 15 bits: the start cell, the end cell and the direction.
+    :param move: a Move
+    :return: an int
+    """
+    start = move.selection.start
+    end = move.selection.get_head()
+    return (CELL_INDICES[start.x, start.y]
+            | CELL_INDICES[end.x, end.y] << CELL_BITS
+            | DIRECTION_INDICES[move.direction] << DIRECTION_SHIFT)
+
+
+def unpack_move(packed_move: int) -> Move:
+    """
+    Unpacks a move packed by `pack_move`.
+    :param packed_move: an int
+    :return: a Move
+    """
+    start = CELLS[packed_move & CELL_MASK]
+    end = CELLS[packed_move >> CELL_BITS & CELL_MASK]
+    return Move(selection=Selection(start, end), direction=DIRECTIONS[packed_move >> DIRECTION_SHIFT])
+
+
+POSITION_SIZE = 16
+PLAYER_SHIFT = POSITION_SIZE * 8 - 1
+
+
+def pack_position(board: Board, player: Color) -> bytes:
+    """
+    Packs a board and the player to move into 16 bytes: 2 bits per cell in storage order,
+    and the player in the top bit.
+    :param board: a Board
+    :param player: the Color to move
+    :return: a bytes object
+    """
+    return pack_cell_values(board.to_flat_array(), player)
+
+
+def pack_cell_values(values: list[int], player: Color) -> bytes:
+    """
+    Packs cell values in storage order, as from `Board.to_flat_array`, and the player to move.
+    :param values: a list of ints of domain 0..2
+    :param player: the Color to move
+    :return: a bytes object
+    """
+    packed_position = (player == Color.WHITE) << PLAYER_SHIFT
+    for index, value in enumerate(values):
+        packed_position |= value << index * 2
+    return packed_position.to_bytes(POSITION_SIZE, "little")
+
+
+def unpack_position(packed_position: bytes) -> tuple[list[list[int]], Color]:
+    """
+    Unpacks a position packed by `pack_position`.
+    :param packed_position: a bytes object
+    :return: a tuple of (the board data in the shape of BoardLayout values, the Color to move)
+    """
+    values, player = unpack_cell_values(packed_position)
+    values = iter(values)
+    data = [[next(values) for _ in line] for line in HexGrid.generate_empty(BOARD_SIZE)]
+    return data, player
+
+
+def unpack_cell_values(packed_position: bytes) -> tuple[list[int], Color]:
+    """
+    Unpacks a position packed by `pack_position` into cell values in storage order.
+    :param packed_position: a bytes object
+    :return: a tuple of (a list of ints of domain 0..2, the Color to move)
+    """
+    packed_position = int.from_bytes(packed_position, "little")
+    values = [packed_position >> index * 2 & 3 for index in range(len(CELLS))]
+    return values, Color.WHITE if packed_position >> PLAYER_SHIFT else Color.BLACK
@@ -0,0 +1,495 @@
+"""
+Defines an on-disk position database indexed by Zobrist hash.
+
+The database is a file of fixed-width records sorted by position hash:
+- a header: the magic bytes, the format version, the flags and the number of records
+- a fanout table counting the records at or below each 16-bit hash prefix, which narrows
+  each probe to a handful of records
+- one record per position: the hash, the packed position, the visit count, the game results,
+  the best known move with the depth it was searched to, and its evaluation
+
+A symmetric database keys each position by its canonical hash, the least hash of its
+symmetric and color-swapped images, and stores the position, its results and its best move
+in the frame of that image, so that equivalent positions share a record.
+
+The file is memory-mapped and binary-searched. Updates collect in an in-memory write buffer
+that is merged into the file once it grows past its limit or the database is closed, copying
+unchanged runs of records as they are.
+
+Run as a module to populate a database from game records, self-play and analysis.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from agent.brandon.search import Search
+from agent.heuristics.heuristic_jonathan import Heuristic
+from agent.zobrist import Zobrist
+from agent.zobrist.symmetry import invert_symmetry, transform_cell_values, transform_move, transform_player
+from core.board import Board
+from core.board_layout import BoardLayout
+from core.color import Color
+from core.move import Move
+from headless.game_runner import PlayerConfig
+from headless.match import GameSpec, init_worker, play_games
+from store.game_record import GameRecordReader, iter_game_records
+from store.packing import (pack_cell_values, pack_move, pack_position, unpack_cell_values, unpack_move,
+                           unpack_position)
+from ui.model.heuristic_type import HeuristicType
+
+MAGIC = b"APDB"
+VERSION = 1
+
+HEADER_FORMAT = struct.Struct("<4sHHQ")
+FANOUT_BITS = 16
+FANOUT_SIZE = 1 << FANOUT_BITS
+FANOUT_FORMAT = struct.Struct(f"<{FANOUT_SIZE}I")
+KEY_FORMAT = struct.Struct("<Q")
+RECORD_FORMAT = struct.Struct("<Q16sIIIIHBxf")
+RECORDS_OFFSET = HEADER_FORMAT.size + FANOUT_FORMAT.size
+
+KEY_BITS = KEY_FORMAT.size * 8
+NO_MOVE = 0xFFFF
+DEFAULT_BUFFER_SIZE = 100_000
+COPY_CHUNK_SIZE = 1 << 24
+
+# header flags
+SYMMETRIC = 1
+
+
+@dataclass
+class PositionEntry:
+    """
+    Models what is known about a position.
+    """
+    key: int
+    position: bytes
+    num_visits: int = 0
+    num_black_wins: int = 0
+    num_white_wins: int = 0
+    num_draws: int = 0
+    best_move: int = NO_MOVE
+    depth: int = 0
+    evaluation: float = 0.0
+
+    @property
+    def player(self) -> Color:
+        return unpack_position(self.position)[1]
+
+    def get_best_move(self) -> Move:
+        """
+        Gets the best known move of the position.
+        :return: a Move, else None if the position has not been analyzed
+        """
+        return unpack_move(self.best_move) if self.best_move != NO_MOVE else None
+
+    def get_score(self, player: Color) -> float:
+        """
+        Determines the share of games through this position won by a player, counting draws as half.
+        :param player: a Color
+        :return: a float between 0 and 1
+        """
+        num_wins = self.num_black_wins if player == Color.BLACK else self.num_white_wins
+        return (num_wins + self.num_draws / 2) / (self.num_visits or 1)
+
+    def add_result(self, winner: Color):
+        """
+        Counts a visit by a game with the given outcome.
+        :param winner: the winning Color, else None for a draw
+        """
+        self.num_visits += 1
+        if winner == Color.BLACK:
+            self.num_black_wins += 1
+        elif winner == Color.WHITE:
+            self.num_white_wins += 1
+        else:
+            self.num_draws += 1
+
+    def transform(self, symmetry: int) -> PositionEntry:
+        """
+        Maps the entry through a position symmetry, swapping the results of each color if it swaps colors.
+        :param symmetry: a position symmetry index
+        :return: a PositionEntry
+        """
+        values, player = unpack_cell_values(self.position)
+        num_black_wins, num_white_wins = self.num_black_wins, self.num_white_wins
+        if transform_player(player, symmetry) != player:
+            num_black_wins, num_white_wins = num_white_wins, num_black_wins
+        best_move = self.get_best_move()
+        return PositionEntry(
+            key=self.key,
+            position=pack_cell_values(transform_cell_values(values, symmetry), transform_player(player, symmetry)),
+            num_visits=self.num_visits,
+            num_black_wins=num_black_wins,
+            num_white_wins=num_white_wins,
+            num_draws=self.num_draws,
+            best_move=pack_move(transform_move(best_move, symmetry)) if best_move else NO_MOVE,
+            depth=self.depth,
+            evaluation=self.evaluation,
+        )
+
+    def encode(self) -> bytes:
+        return RECORD_FORMAT.pack(self.key, self.position, self.num_visits, self.num_black_wins,
+                                  self.num_white_wins, self.num_draws, self.best_move, self.depth,
+                                  self.evaluation)
+
+    @staticmethod
+    def decode(buffer, offset: int = 0) -> PositionEntry:
+        return PositionEntry(*RECORD_FORMAT.unpack_from(buffer, offset))
+
+
+class PositionDB:
+    """
+    A position database backed by a sorted, memory-mapped record file and an in-memory write buffer.
+    """
+
+    def __init__(self, file_path: str, max_buffer_size: int = DEFAULT_BUFFER_SIZE, symmetric: bool = False):
+        """
+        Opens a position database, which is created on the first merge if it does not exist.
+        Raises ValueError if the file is not a position database.
+        :param file_path: a str path
+        :param max_buffer_size: the number of buffered positions after which the buffer is merged
+        :param symmetric: whether or not a new database shares records between equivalent positions;
+                          an existing database keeps the setting it was created with
+        """
+        self.file_path = file_path
+        self.max_buffer_size = max_buffer_size
+        self.symmetric = symmetric
+        self._buffer = {}
+        self._num_new_positions = 0
+        self._map = None
+        self._num_records = 0
+        self._fanout = (0,) * FANOUT_SIZE
+        self._open()
+
+    def _open(self):
+        if not os.path.exists(self.file_path):
+            return
+
+        if os.path.getsize(self.file_path) < RECORDS_OFFSET:
+            raise ValueError(f"{self.file_path} is not a version {VERSION} position database")
+
+        with open(self.file_path, mode="rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, flags, self._num_records = HEADER_FORMAT.unpack_from(self._map)
+        if (magic != MAGIC or version != VERSION
+                or len(self._map) < RECORDS_OFFSET + self._num_records * RECORD_FORMAT.size):
+            self._map.close()
+            self._map = None
+            raise ValueError(f"{self.file_path} is not a version {VERSION} position database")
+        self.symmetric = bool(flags & SYMMETRIC)
+        self._fanout = FANOUT_FORMAT.unpack_from(self._map, HEADER_FORMAT.size)
+
+    def __len__(self):
+        return self._num_records + self._num_new_positions
+
+    def _find_index(self, key: int) -> int:
+        """
+        Finds the index of the first record with a hash not below the given hash.
+        :param key: a position hash
+        :return: an int
+        """
+        prefix = key >> KEY_BITS - FANOUT_BITS
+        low = self._fanout[prefix - 1] if prefix else 0
+        high = self._fanout[prefix]
+        buffer = self._map
+        unpack_key = KEY_FORMAT.unpack_from
+        record_size = RECORD_FORMAT.size
+        while low < high:
+            middle = (low + high) // 2
+            if unpack_key(buffer, RECORDS_OFFSET + middle * record_size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _read_entry(self, key: int) -> PositionEntry:
+        """
+        Reads the record of a position hash from the file.
+        :return: a PositionEntry, else None
+        """
+        if not self._num_records:
+            return None
+        index = self._find_index(key)
+        if index == self._num_records:
+            return None
+        offset = RECORDS_OFFSET + index * RECORD_FORMAT.size
+        if KEY_FORMAT.unpack_from(self._map, offset)[0] != key:
+            return None
+        return PositionEntry.decode(self._map, offset)
+
+    def probe_key(self, key: int) -> PositionEntry:
+        """
+        Looks up a position by hash.
+        :param key: a position hash from `Zobrist.create_position_hash`
+        :return: a PositionEntry, else None
+        """
+        entry = self._buffer.get(key)
+        return entry if entry is not None else self._read_entry(key)
+
+    def _hash_position(self, board: Board, player: Color) -> tuple[int, int, bytes]:
+        """
+        Hashes and packs a position in the frame its record is stored in.
+        :return: a tuple of (the position hash, the symmetry mapping the position to the frame of its record,
+                 the packed position in that frame)
+        """
+        if not self.symmetric:
+            return Zobrist.create_position_hash(board, player), 0, pack_position(board, player)
+
+        key, symmetry = Zobrist.create_canonical_position_hash(board, player)
+        values = transform_cell_values(board.to_flat_array(), symmetry)
+        return key, symmetry, pack_cell_values(values, transform_player(player, symmetry))
+
+    def probe(self, board: Board, player: Color) -> PositionEntry:
+        """
+        Looks up a position, rejecting entries of other positions that share its hash.
+        :param board: a Board
+        :param player: the Color to move
+        :return: a PositionEntry in the frame of the given position, else None
+        """
+        key, symmetry, position = self._hash_position(board, player)
+        entry = self.probe_key(key)
+        if entry is None or entry.position != position:
+            return None
+        return entry.transform(invert_symmetry(symmetry)) if symmetry else entry
+
+    def _get_buffered_entry(self, board: Board, player: Color) -> tuple[PositionEntry, int]:
+        """
+        Gets the entry of a position for updating, copying it into the write buffer.
+        :return: a tuple of (the PositionEntry, the symmetry mapping the position to the frame of the entry)
+        """
+        key, symmetry, position = self._hash_position(board, player)
+        entry = self._buffer.get(key)
+        if entry is None:
+            entry = self._read_entry(key)
+            if entry is None:
+                entry = PositionEntry(key, position)
+                self._num_new_positions += 1
+            self._buffer[key] = entry
+        return entry, symmetry
+
+    def _update_buffer(self):
+        if len(self._buffer) >= self.max_buffer_size:
+            self.merge()
+
+    def add_result(self, board: Board, player: Color, winner: Color):
+        """
+        Counts a visit to a position by a game with the given outcome.
+        :param board: a Board
+        :param player: the Color to move
+        :param winner: the winning Color, else None for a draw
+        """
+        entry, symmetry = self._get_buffered_entry(board, player)
+        entry.add_result(transform_player(winner, symmetry) if winner else None)
+        self._update_buffer()
+
+    def set_best_move(self, board: Board, player: Color, move: Move, depth: int, evaluation: float = 0.0):
+        """
+        Records the best move of a position, unless a deeper search has already been recorded.
+        :param board: a Board
+        :param player: the Color to move
+        :param move: the best Move
+        :param depth: the depth the move was searched to
+        :param evaluation: the evaluation of the move for the player to move
+        """
+        entry, symmetry = self._get_buffered_entry(board, player)
+        if depth >= entry.depth:
+            entry.best_move = pack_move(transform_move(move, symmetry) if symmetry else move)
+            entry.depth = min(depth, 0xFF)
+            entry.evaluation = evaluation
+        self._update_buffer()
+
+    def add_game(self, layout: BoardLayout, moves: Iterable[Move], winner: Color):
+        """
+        Counts a visit to every position of a game, from the starting layout with black to move.
+        :param layout: the starting BoardLayout
+        :param moves: the Moves of the game
+        :param winner: the winning Color, else None for a draw
+        """
+        board = BoardLayout.setup_board(layout)
+        player = Color.BLACK
+        for move in moves:
+            self.add_result(board, player, winner)
+            board.apply_move(move)
+            player = Color.next(player)
+        self.add_result(board, player, winner)
+
+    def add_game_record(self, reader: GameRecordReader):
+        """
+        Counts a visit to every position of a game record, the winner being the player with the higher score.
+        :param reader: a GameRecordReader
+        """
+        moves = [ply.move for ply in reader]
+        board = BoardLayout.setup_board(reader.layout)
+        for move in moves:
+            board.apply_move(move)
+        scores = {color: board.get_score(color) for color in Color}
+        winner = (max(Color, key=scores.get)
+                  if scores[Color.BLACK] != scores[Color.WHITE]
+                  else None)
+        self.add_game(reader.layout, moves, winner)
+
+    def iter_entries(self) -> Iterator[PositionEntry]:
+        """
+        Iterates over every position, including buffered updates, in no particular order.
+        :return: an iterator of PositionEntries
+        """
+        for index in range(self._num_records):
+            entry = PositionEntry.decode(self._map, RECORDS_OFFSET + index * RECORD_FORMAT.size)
+            yield self._buffer.get(entry.key, entry)
+        for key, entry in list(self._buffer.items()):
+            if self._read_entry(key) is None:
+                yield entry
+
+    def merge(self):
+        """
+        Merges the write buffer into the file, replacing the file when the merge is complete.
+        """
+        if not self._buffer:
+            return
+
+        entries = sorted(self._buffer.values(), key=lambda entry: entry.key)
+        num_records = self._num_records + self._num_new_positions
+
+        fanout_counts = [0] * FANOUT_SIZE
+        for entry in entries:
+            if self._read_entry(entry.key) is None:
+                fanout_counts[entry.key >> KEY_BITS - FANOUT_BITS] += 1
+        fanout = []
+        num_new_records = 0
+        for count, num_records_below in zip(fanout_counts, self._fanout):
+            num_new_records += count
+            fanout.append(num_records_below + num_new_records)
+
+        temp_path = f"{self.file_path}.merge"
+        with open(temp_path, mode="wb") as file:
+            file.write(HEADER_FORMAT.pack(MAGIC, VERSION, SYMMETRIC if self.symmetric else 0, num_records))
+            file.write(FANOUT_FORMAT.pack(*fanout))
+            index = 0
+            for entry in entries:
+                next_index = self._find_index(entry.key) if self._num_records else 0
+                self._copy_records(file, index, next_index)
+                index = next_index
+                if index < self._num_records and KEY_FORMAT.unpack_from(
+                        self._map, RECORDS_OFFSET + index * RECORD_FORMAT.size)[0] == entry.key:
+                    index += 1
+                file.write(entry.encode())
+            self._copy_records(file, index, self._num_records)
+
+        self._close_map()
+        os.replace(temp_path, self.file_path)
+        self._buffer.clear()
+        self._num_new_positions = 0
+        self._open()
+
+    def _copy_records(self, file, start: int, end: int):
+        """
+        Copies a run of records from the current file as they are.
+        """
+        start = RECORDS_OFFSET + start * RECORD_FORMAT.size
+        end = RECORDS_OFFSET + end * RECORD_FORMAT.size
+        with memoryview(self._map) if self._map else memoryview(b"") as view:
+            for chunk_start in range(start, end, COPY_CHUNK_SIZE):
+                file.write(view[chunk_start:min(chunk_start + COPY_CHUNK_SIZE, end)])
+
+    def _close_map(self):
+        if self._map:
+            self._map.close()
+            self._map = None
+        self._num_records = 0
+        self._fanout = (0,) * FANOUT_SIZE
+
+    def close(self):
+        """
+        Merges any buffered updates and closes the database.
+        """
+        self.merge()
+        self._close_map()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def analyze_positions(position_db: PositionDB, depth: int, min_visits: int = 2,
+                      heuristic_type: HeuristicType = HeuristicType.BRANDON_OFFENSIVE) -> int:
+    """
+    Searches the positions visited at least `min_visits` times to a fixed depth,
+    recording their best moves. Positions already searched as deep are skipped.
+    :return: the number of positions analyzed
+    """
+    entries = [entry for entry in position_db.iter_entries()
+               if entry.num_visits >= min_visits and entry.depth < depth]
+    Heuristic.set_turn_count_handler(lambda: 0)
+    search = Search()
+    search.heuristic = heuristic_type
+    for entry in entries:
+        data, player = unpack_position(entry.position)
+        board = Board.create_from_data(data)
+        best_move = None
+
+        def set_best_move(move):
+            nonlocal best_move
+            best_move = move
+
+        search.start(board, player, depth=depth, on_find=set_best_move)
+        if best_move:
+            evaluation = search.best_score if math.isfinite(search.best_score) else 0.0
+            position_db.set_best_move(board, player, best_move, depth, evaluation)
+    return len(entries)
+
+
+def _add_self_play(position_db: PositionDB, config_strs: list[str], num_games: int, num_workers: int,
+                   move_limit: int):
+    config_a, config_b = map(PlayerConfig.parse, config_strs)
+    specs = GameSpec.schedule(0, num_games)
+    for spec, result in play_games(config_a, config_b, specs, num_workers=num_workers, move_limit=move_limit):
+        position_db.add_game(result.layout, map(Move.decode, result.moves), result.winner)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Populates a position database.")
+    parser.add_argument("database", help="the position database file")
+    parser.add_argument("--records", nargs="+", default=[], metavar="PATH",
+                        help="game records, or directories of game records, to add")
+    parser.add_argument("--self-play", nargs=2, metavar="CONFIG",
+                        help="agent configurations to play against each other, e.g. BRANDON:BRANDON_OFFENSIVE:2")
+    parser.add_argument("--games", type=int, default=12, help="the number of self-play games (default: 12)")
+    parser.add_argument("--move-limit", type=int, default=40, help="moves per player per game (default: 40)")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--analyze", type=int, metavar="DEPTH",
+                        help="search positions to a depth to find their best moves")
+    parser.add_argument("--min-visits", type=int, default=2,
+                        help="the visits a position needs to be analyzed (default: 2)")
+    parser.add_argument("--symmetric", action="store_true",
+                        help="share records between symmetric and color-swapped positions in a new database")
+    args = parser.parse_args()
+    init_worker(verbose=False)
+
+    with PositionDB(args.database, symmetric=args.symmetric) as db:
+        num_records = 0
+        for reader in iter_game_records(args.records):
+            db.add_game_record(reader)
+            num_records += 1
+        if num_records:
+            print(f"Added {num_records} game records")
+
+        if args.self_play:
+            _add_self_play(db, args.self_play, args.games, args.workers, args.move_limit)
+            print(f"Added {args.games} self-play games")
+
+        if args.analyze:
+            db.merge()
+            print(f"Analyzed {analyze_positions(db, args.analyze, args.min_visits)} positions")
+
+        db.merge()
+        print(f"{len(db)} positions in {args.database}")
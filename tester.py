@@ -1,111 +1,352 @@
 from __future__ import absolute_import
 
-from os.path import splitext
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from multiprocessing import freeze_support
+from os.path import basename, dirname, isdir, join, normpath, relpath, splitext, sep
+from time import perf_counter
 
 from agent.state_generator import StateGenerator
 from core.color import Color
 from lib.file_handler import FileHandler
-from parse import state_parser
+from parse.state_parser import StateParser
 from core.board import Board
 
+import argparse
+import glob
 import re
 import os
 import sys
 
+OUTPUT_DIR = "dist"
+INPUT_PATTERN = "*.input"
+OUTPUT_EXTENSIONS = (".move", ".board")
+WRITE_BUFFER_SIZE = 1 << 16
+READ_BUFFER_SIZE = 1 << 16
+
+
+def _test_file_worker(filepath, name, output_dir):
+    """
+    Tests a file in a worker process.
+    :return: a tuple of (filepath, the number of moves generated, the time taken)
+    """
+    time_start = perf_counter()
+    num_moves = Tester().test_file(filepath, name, output_dir)
+    return filepath, num_moves, perf_counter() - time_start
+
+
+@dataclass
+class FileComparison:
+    """
+    Models the differences between an output file and the file it is compared to, as line numbers.
+    """
+    input_filepath: str
+    compare_filepath: str
+    missing: list = field(default_factory=list)
+    extra: list = field(default_factory=list)
+    input_duplicates: list = field(default_factory=list)
+    compare_duplicates: list = field(default_factory=list)
+
+    @property
+    def is_match(self):
+        return not (self.missing or self.extra or self.input_duplicates or self.compare_duplicates)
+
+    @property
+    def summary(self):
+        if self.is_match:
+            return "match"
+        return (F"{len(self.missing)} missing, {len(self.extra)} extra, "
+                F"{len(self.input_duplicates) + len(self.compare_duplicates)} duplicate row(s)")
+
 
 class Tester:
     """
     This class contains the methods needed to read input from test files and
     generates files of all possible moves and their resulting board states.
     """
-    def run_tests(self):
+
+    @staticmethod
+    def _expand_path(path):
+        """
+        Expands a path into the input files it names, each with the folder its subfolders are relative to.
+        :return: a list of tuples of (file path, base folder path, else None for a file named directly)
+        """
+        if isdir(path):
+            filepaths = sorted(glob.glob(join(path, "**", INPUT_PATTERN), recursive=True))
+            return [(filepath, path) for filepath in filepaths]
+        if glob.has_magic(path):
+            # the folders before the first pattern component are the base of the matches
+            parts = normpath(path).split(sep)
+            num_base_parts = next(i for i, part in enumerate(parts) if glob.has_magic(part))
+            base_dir = sep.join(parts[:num_base_parts]) or "."
+            return [(filepath, base_dir) for filepath in sorted(glob.glob(path, recursive=True))]
+        return [(path, None)]
+
+    @classmethod
+    def find_input_files(cls, paths):
+        """
+        Expands paths to directories and glob patterns into the input files they contain.
+        Directories are searched recursively for `*.input` files.
+        :param paths: a list of strings containing file paths, directory paths or glob patterns
+        :return: a list of strings containing file paths, in the given order without duplicates
+        """
+        return list(dict.fromkeys(filepath for path in paths for filepath, _ in cls._expand_path(path)))
+
+    @classmethod
+    def get_output_names(cls, paths):
+        """
+        Gets the output names of the input files of paths. Files found in directories or by glob
+        patterns keep their subfolders relative to the directory or the pattern's base folder,
+        so that same-named files in different folders do not overwrite each other.
+        :param paths: a list of strings containing file paths, directory paths or glob patterns
+        :return: a dict of output names, e.g. sub/Test1, by file path, in the given order
+        :raise ValueError: if two input files would share output files
+        """
+        output_names = {}
+        filepaths_by_name = {}
+        for path in paths:
+            for filepath, base_dir in cls._expand_path(path):
+                if filepath in output_names:
+                    continue
+                name = cls.get_output_name(filepath)
+                if base_dir is not None:
+                    name = normpath(join(relpath(dirname(filepath), base_dir), name))
+                if name in filepaths_by_name:
+                    raise ValueError(F"{filepath} and {filepaths_by_name[name]} would both write {name} outputs")
+                output_names[filepath] = name
+                filepaths_by_name[name] = filepath
+        return output_names
+
+    @staticmethod
+    def get_output_name(filepath):
+        """
+        Gets the name of the output files of an input file: Test<#> for Test<#>.input, else the file's name.
+        :param filepath: a string containing file path name
+        :return: a string
+        """
+        path, _ = splitext(basename(filepath))
+        number = re.search("\\d+$", path)
+        return F"Test{number.group()}" if number else path
+
+    def run_tests(self, paths=None, num_workers=None, output_dir=OUTPUT_DIR):
         """
         Creates output folder, finds and tests each test.input file.
+        Multiple files are tested in parallel across a process pool.
+        :param paths: a list of file paths, directory paths or glob patterns, else the command line arguments
+        :param num_workers: the number of worker processes, else one per CPU
+        :param output_dir: a string containing the output folder path
         :return: none
         """
-        if not os.path.exists("dist"):
-            os.makedirs("dist")
-        filepath = sys.argv[1:]
         try:
-            for file in filepath:
-                path, ext = splitext(file)
-                number = re.search("\\d+$", path).group()
-                self.test_file(F"{path}{ext}", number)
+            output_names = self.get_output_names(sys.argv[1:] if paths is None else paths)
+        except ValueError as error:
+            print(F"Conflicting inputs: {error}")
+            return
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        filepaths = list(output_names)
+        time_start = perf_counter()
+
+        try:
+            if len(filepaths) <= 1 or num_workers == 1:
+                results = (_test_file_worker(filepath, output_names[filepath], output_dir)
+                           for filepath in filepaths)
+                for result in results:
+                    self._print_result(*result)
+            else:
+                with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                    futures = [executor.submit(_test_file_worker, filepath, output_names[filepath], output_dir)
+                               for filepath in filepaths]
+                    for future in as_completed(futures):
+                        self._print_result(*future.result())
         except FileNotFoundError:
             print("Test<#>.input file(s) not found.")
+            return
+
+        print(F"Tested {len(filepaths)} file(s) in {perf_counter() - time_start:.2f}s")
+
+    @staticmethod
+    def _print_result(filepath, num_moves, time_taken):
+        print(F"{filepath}: {num_moves} moves in {time_taken * 1000:.1f}ms")
 
-    def test_file(self, filepath, number):
+    def test_file(self, filepath, name, output_dir=OUTPUT_DIR):
         """
         Reads a text file and generates all moves and their resulting board states and writes them to output files.
         :param filepath: a String containing path of file
-        :param number: an int representing the current test<#>.input
-        :return: none
+        :param name: a string naming the output files, e.g. Test<#> for the current test<#>.input,
+                     optionally under subfolders of the output folder
+        :param output_dir: a string containing the output folder path
+        :return: the number of moves generated
         """
         text = FileHandler.read_file(filepath)
+        os.makedirs(dirname(join(output_dir, name)), exist_ok=True)
 
-        state, player = state_parser.StateParser().convert_text_to_state(text)
+        state, player = StateParser.convert_text_to_state(text)
 
         board = Board.create_from_data(state)
 
         possible_moves = StateGenerator.enumerate_board(board, Color(player))
         possible_boards = StateGenerator.generate(board, possible_moves)
 
-        self.write_move_file(possible_moves, number)
-        self.write_board_file(possible_boards, number)
+        self.write_move_file(possible_moves, join(output_dir, F"{name}.move"))
+        self.write_board_file(possible_boards, join(output_dir, F"{name}.board"))
+        return len(possible_moves)
 
-    def write_move_file(self, possible_moves, number):
+    @staticmethod
+    def write_move_file(possible_moves, filepath):
         """
         Writes the list of moves into an output file.
         :param possible_moves: list of possible moves
-        :param number: an int representing the current test<#>.input
+        :param filepath: a string containing the output file path
         :return: none
         """
-        text = ""
-        for move in possible_moves:
-            text += F"{state_parser.StateParser().convert_move_to_text(move)}\n"
+        with open(filepath, mode="w", buffering=WRITE_BUFFER_SIZE) as file:
+            file.writelines(F"{StateParser.convert_move_to_text(move)}\n" for move in possible_moves)
 
-        FileHandler.write_file(F"dist/Test{str(number)}.move", text)
+    @staticmethod
+    def write_board_file(possible_boards, filepath):
+        """
+        Writes the list of boards into an output file.
+        :param possible_boards: list of possible boards
+        :param filepath: a string containing the output file path
+        :return: none
+        """
+        with open(filepath, mode="w", buffering=WRITE_BUFFER_SIZE) as file:
+            file.writelines(F"{text}\n" for text in StateParser.convert_boards_to_texts(possible_boards))
 
-    def write_board_file(self, possible_boards, number):
+    @staticmethod
+    def canonicalize_line(line):
+        """
+        Converts a line of an output file to a canonical form, so that boards listing the same
+        pieces in a different order are equal.
+        :param line: a string containing a move or a board
+        :return: a string
         """
-            Writes the list of boards into an output file.
-            :param possible_boards: list of possible boards
-            :param number: an int representing the current test<#>.input
-            :return: none
-            """
-        text = ""
-        for board in possible_boards:
-            text += F"{state_parser.StateParser().convert_board_to_text(board)}\n"
+        line = line.strip()
+        if not line or line.startswith("("):
+            return line
+        return StateParser._sort_text(line)
 
-        FileHandler.write_file(F"dist/Test{str(number)}.board", text)
+    @classmethod
+    def _read_canonical_lines(cls, filepath):
+        """
+        Streams the canonical lines of a file.
+        :return: an iterator of tuples of (line number, canonical line)
+        """
+        with open(filepath, buffering=READ_BUFFER_SIZE) as file:
+            for line_number, line in enumerate(file, start=1):
+                yield line_number, cls.canonicalize_line(line)
 
-    def compare_files(self, input_filepath, compare_filepath):
+    def compare_files(self, input_filepath, compare_filepath, verbose=True):
         """
-        Compares 2 files containing lines of possible boards.
+        Compares 2 files containing lines of possible moves or boards, regardless of line order.
+        The file to be compared is indexed by canonical line and the input file is streamed against it.
         :param input_filepath: a string containing file path name
         :param compare_filepath: a string containing file path name to be compared
-        :return: none
+        :param verbose: whether to print each mismatched row
+        :return: a FileComparison
+        """
+        comparison = FileComparison(input_filepath, compare_filepath)
+
+        # maps each canonical line to its unmatched line numbers in the compared file
+        compare_index = defaultdict(deque)
+        for line_number, line in self._read_canonical_lines(compare_filepath):
+            if compare_index.get(line):
+                comparison.compare_duplicates.append(line_number)
+            compare_index[line].append(line_number)
+
+        input_lines = set()
+        for line_number, line in self._read_canonical_lines(input_filepath):
+            if line in input_lines:
+                comparison.input_duplicates.append(line_number)
+            input_lines.add(line)
+
+            line_numbers = compare_index.get(line)
+            if line_numbers:
+                line_numbers.popleft()
+            else:
+                comparison.missing.append(line_number)
+
+        comparison.extra = sorted(line_number for line_numbers in compare_index.values()
+                                  for line_number in line_numbers)
+
+        if verbose:
+            self._print_comparison(comparison)
+        return comparison
+
+    @staticmethod
+    def _print_comparison(comparison):
+        print(F"Comparing Files: {comparison.input_filepath} => {comparison.compare_filepath}")
+        for line_number in comparison.missing:
+            print(F"Unable to find match for row: {line_number}")
+        for line_number in comparison.extra:
+            print(F"Extra row in compared file: {line_number}")
+        for line_number in comparison.input_duplicates:
+            print(F"Duplicate row: {line_number}")
+        for line_number in comparison.compare_duplicates:
+            print(F"Duplicate row in compared file: {line_number}")
+        print(F"Comparison Complete: {comparison.summary}")
+
+    def compare_dirs(self, input_dir, compare_dir, verbose=False):
+        """
+        Compares the .move and .board files of 2 output folders, e.g. two dist/ folders.
+        :param input_dir: a string containing the output folder path
+        :param compare_dir: a string containing the output folder path to be compared
+        :param verbose: whether to print each mismatched row
+        :return: a tuple of (a list of FileComparisons of the files found in both folders,
+                 a sorted list of the names of files found in only one folder)
         """
-        input_data = FileHandler.read_file(input_filepath).splitlines()
-        compare_data = FileHandler.read_file(compare_filepath).splitlines()
+        input_names = self._find_output_files(input_dir)
+        compare_names = self._find_output_files(compare_dir)
+        print(F"Comparing Folders: {input_dir} => {compare_dir}")
 
-        print(F"Comparing Files: {input_filepath} => {compare_filepath}")
+        for name in sorted(input_names - compare_names):
+            print(F"Missing file in compared folder: {name}")
+        for name in sorted(compare_names - input_names):
+            print(F"Extra file in compared folder: {name}")
+        unpaired_names = sorted(input_names ^ compare_names)
 
-        for i in range(0, len(input_data)):
-            found = False
-            for compare_line in compare_data:
-                if input_data[i] == compare_line:
-                    found = True
-                    break
+        comparisons = []
+        for name in sorted(input_names & compare_names):
+            comparison = self.compare_files(join(input_dir, name), join(compare_dir, name), verbose)
+            if not verbose:
+                print(F"{name}: {comparison.summary}")
+            comparisons.append(comparison)
 
-            if not found:
-                print(F"Unable to find match for row: {i + 1}")
+        num_matches = sum(comparison.is_match for comparison in comparisons)
+        print(F"Folder Comparison Complete: {num_matches}/{len(comparisons)} files match, "
+              F"{len(unpaired_names)} unpaired file(s)")
+        return comparisons, unpaired_names
 
-        print(F"Comparison Complete")
+    @staticmethod
+    def _find_output_files(dirpath):
+        """
+        Finds the output files of a folder and its subfolders, as paths relative to the folder.
+        """
+        return {relpath(join(parent, name), dirpath)
+                for parent, _, names in os.walk(dirpath)
+                for name in names if name.endswith(OUTPUT_EXTENSIONS)}
 
 
 if __name__ == "__main__":
+    freeze_support()
+    parser = argparse.ArgumentParser(description="Generates the moves and boards of Test<#>.input files.")
+    parser.add_argument("paths", nargs="*", help="input files, directories of input files or glob patterns")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("-o", "--output", default=OUTPUT_DIR, help=F"output folder (default: {OUTPUT_DIR})")
+    parser.add_argument("-c", "--compare", nargs=2, metavar=("PATH", "COMPARE_PATH"),
+                        help="compare 2 output files or folders instead of generating output")
+    args = parser.parse_args()
+
+    if args.compare:
+        if isdir(args.compare[0]):
+            comparisons, unpaired_names = Tester().compare_dirs(*args.compare)
+        else:
+            comparisons, unpaired_names = [Tester().compare_files(*args.compare)], []
+        sys.exit(0 if all(comparison.is_match for comparison in comparisons) and not unpaired_names else 1)
+
     print("Program Started")
     app = Tester()
-    app.run_tests()
-    print("Program Completed: Output files generated in 'dist' folder.")
+    app.run_tests(args.paths, num_workers=args.workers, output_dir=args.output)
+    print(F"Program Completed: Output files generated in '{args.output}' folder.")
@@ -5,24 +5,29 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from datetime import timedelta
-from time import sleep
+from time import strftime
 import json
+import os
 import traceback
 
 from agent.heuristics.heuristic_jonathan import Heuristic
 from agent.state_generator import StateGenerator
 from agent.ponderer import PonderingAgent
+from agent.profiler import SearchProfiler
 from core.color import Color
 from core.move import Move
 from core.player_type import PlayerType
 from core.board_layout import BoardLayout
 from lib.dispatcher import Dispatcher
+from store.game_record import GameRecordHeader, create_game_record
+from store.opening_book import OpeningBook
+from store.position_db import PositionDB
 from ui.model.game_history import GameHistory
 from ui.model.model import Model, GameHistoryItem
 from ui.view.view import View
 from ui.model.config import Config
 from ui.debug import Debug, DebugType
-from ui.constants import FPS, DEBUG_FILEPATH, DEBUG_LOADS_ON_START
+from ui.constants import DEBUG_FILEPATH, DEBUG_LOADS_ON_START
 
 if TYPE_CHECKING:
     from core.hex import Hex
@@ -42,7 +47,11 @@ class App:
         self._model = Model()
         self._view = View()
         self._agents = {}
-        self._update_dispatcher = Dispatcher()
+        self._update_dispatcher = Dispatcher(on_put=self._view.wake)
+        self._opening_book = None
+        self._position_db = None
+        self._game_record = None
+        self._num_recorded_plies = 0
         self.paused = False
         self.allow_move = True
 
@@ -52,14 +61,23 @@ class App:
         """
         config = self._model.config
 
+        self._close_game_record()
+        self._close_agents()
         self._agents = {
-            Color.BLACK: config.agent_type_p1.create() if config.player_type_p1 is PlayerType.COMPUTER else None,
-            Color.WHITE: config.agent_type_p2.create() if config.player_type_p2 is PlayerType.COMPUTER else None,
+            color: config.get_player_agent_type(color).create(out_of_process=config.agent_processes)
+                if config.get_player_type(color) is PlayerType.COMPUTER
+                else None
+            for color in (Color.BLACK, Color.WHITE)
         }
 
         self._apply_heuristic_config(config)
+        self._apply_hashing_config(config)
+        self._apply_batching_config(config)
+        self._apply_opening_book_config(config)
+        self._apply_position_db_config(config)
+        SearchProfiler.set_output_dir(config.profile_dir)
         if config.get_player_type(self._model.game_turn) == PlayerType.COMPUTER:
-            self._apply_random_move()
+            self._apply_opening_move()
 
     def _stop_game(self):
         if self.paused:
@@ -76,10 +94,14 @@ class App:
         self._model.toggle_pause()
         self._toggle_agents_paused()
         self._view.render(self._model)
+        if not self.paused:
+            # updates queued while paused are only dispatched once woken
+            self._view.wake()
 
     def _undo(self):
         self._stop_game()
         next_item = self._model.undo()
+        self._record_game()
         self._view.clear_game_board()
         self._view.render(self._model)
         self._apply_undo_item(next_item)
@@ -113,6 +135,50 @@ class App:
         elif time_p2 < time_p1:
             print(F"{Color.WHITE} has the best aggregate time: {time_p2:.2f} seconds")
 
+        self._close_game_record()
+
+    def _record_game(self):
+        """
+        Brings the game record in line with the history, if an archive directory is configured.
+        Plies are appended as they are played and dropped as they are undone, so that a game
+        that is reset or cut short by a crash keeps the plies played before it.
+        """
+        config = self._model.config
+        history = self._model.history
+        if not config.archive_dir or not (self._game_record or len(history)):
+            return
+
+        if not self._game_record:
+            os.makedirs(config.archive_dir, exist_ok=True)
+            game_config = {color.name: {
+                "player_type": config.get_player_type(color).name,
+                "agent_type": config.get_player_agent_type(color).name,
+                "heuristic_type": config.get_player_heuristic_type(color).name,
+                "time_limit": config.get_player_time_limit(color),
+            } for color in Color}
+            game_config["move_limit"] = config.move_limit
+            self._game_record = create_game_record(config.archive_dir,
+                                                   F"{strftime('%Y%m%d-%H%M%S')}-{config.layout.name.lower()}",
+                                                   GameRecordHeader(config.layout, game_config))
+            Debug.log(F"Archiving game to {self._game_record.file_path}", DebugType.Game)
+
+        if len(history) < self._num_recorded_plies:
+            self._game_record.truncate(len(history))
+            self._num_recorded_plies = len(history)
+        while self._num_recorded_plies < len(history):
+            self._game_record.append(history[self._num_recorded_plies])
+            self._num_recorded_plies += 1
+
+    def _close_game_record(self):
+        """
+        Closes the record of the current game, if any, so that the next game starts a new one.
+        """
+        if self._game_record:
+            self._game_record.close()
+            Debug.log(F"Game archived to {self._game_record.file_path}", DebugType.Game)
+        self._game_record = None
+        self._num_recorded_plies = 0
+
     def _set_timeout_move(self, move: Move):
         """
         Sets the timeout move for current player.
@@ -193,10 +259,11 @@ class App:
 
         next_agent.ponder(board=self._model.game_board, player=player_color)
 
-    def _apply_move(self, move: Move):
+    def _apply_move(self, move: Move, redo: bool = False):
         """
         Applies the given move to the game board, updating both the model and view accordingly.
         :param move: the Move to apply
+        :param redo: whether the move replays the next undone move
         :return: None
         """
         if not self.allow_move:
@@ -217,7 +284,8 @@ class App:
         self._view.apply_move(move,
                               board=self._model.game_board,
                               on_end=lambda: self._update_dispatcher.put(self._advance_turn))
-        self._model.apply_move(move)
+        self._model.apply_move(move, redo=redo)
+        self._record_game()
         self._update_dispatcher.put(lambda: self._view.render(self._model))
 
     def _apply_random_move(self):
@@ -227,6 +295,18 @@ class App:
         move = StateGenerator.generate_random_move(self._model.game_board, self._model.game_turn)
         self._apply_move(move)
 
+    def _apply_opening_move(self):
+        """
+        Applies a move from the opening book for current player, else a random move.
+        """
+        move = (self._opening_book.probe(self._model.game_board, self._model.game_turn)
+                if self._opening_book
+                else None)
+        if move:
+            self._apply_move(move)
+        else:
+            self._apply_random_move()
+
     def _apply_timeout_move(self):
         """
         Applies the currently set timeout move for current player.
@@ -247,6 +327,48 @@ class App:
         self._view.apply_config(config)
         self._view.render(self._model)
 
+    def _apply_position_db_config(self, config: Config):
+        """
+        Opens the configured position database, if any, for agents to probe before searching.
+        """
+        if not self._position_db or self._position_db.file_path != config.position_db_path:
+            if self._position_db:
+                self._position_db.close()
+            self._position_db = PositionDB(config.position_db_path) if config.position_db_path else None
+
+        for agent in self._agents.values():
+            if agent:
+                agent.set_position_db(self._position_db)
+
+    def _apply_opening_book_config(self, config: Config):
+        """
+        Loads the configured opening book, if it exists, for agents to play from before searching.
+        """
+        if not self._opening_book or self._opening_book.file_path != config.opening_book_path:
+            self._opening_book = (OpeningBook(config.opening_book_path)
+                                  if config.opening_book_path and os.path.exists(config.opening_book_path)
+                                  else None)
+
+        for agent in self._agents.values():
+            if agent:
+                agent.set_opening_book(self._opening_book)
+
+    def _apply_hashing_config(self, config: Config):
+        """
+        Sets whether agent tables share entries between symmetric images of a board.
+        """
+        for agent in self._agents.values():
+            if agent:
+                agent.set_symmetric_hashing(config.symmetric_hashing)
+
+    def _apply_batching_config(self, config: Config):
+        """
+        Sets whether agent searches evaluate the leaves of a node in one batch.
+        """
+        for agent in self._agents.values():
+            if agent:
+                agent.set_batch_leaves(config.batch_leaves)
+
     def _apply_heuristic_config(self, config: Config = None):
         config = config or self._model.game_config
         for color, agent in self._agents.items():
@@ -257,9 +379,8 @@ class App:
         if not item or not item.move:
             self._apply_random_move()
             return
-        self._apply_move(item.move)
-        self._model.history.pop()
-        self._model.history.append(item)
+        # the model redoes the item, keeping its timings
+        self._apply_move(item.move, redo=True)
 
     def _dispatch(self, action: callable, *args: list, **kwargs: dict):
         """
@@ -283,24 +404,24 @@ class App:
 
     def _update(self):
         """
-        Updates the application by one tick.
+        Dispatches the updates queued by agents, timers and animations, unless paused.
+        Called on the view thread each time the dispatcher wakes the view.
         :return: None
         """
-        # STUB(agent): async agent move requests may be called from here
-        self._view.update()
         if self.paused:
             return
         self._update_dispatcher.dispatch()
 
     def _run_main_loop(self):
         """
-        Runs the main loop of the application.
+        Runs the main loop of the application until the window is closed.
+        The loop idles between input events, animation frames and queued updates.
         :return: None
         """
         self._view.render(self._model)
-        while not self._view.done:
-            self._update()
-            sleep(1 / FPS)
+        self._view.run(on_wake=self._update)
+        Debug.log(F"Frame times: {self._view.frame_stats}", DebugType.Game)
+        Debug.log(F"Update latencies: {self._view.wake_stats}", DebugType.Game)
 
     def run_game(self):
         """
@@ -341,13 +462,17 @@ class App:
         try:
             self._start_game()
             self._run_main_loop()
-            self._stop_agents()
+            self._close_agents()
         finally:
+            self._close_game_record()
             self._write_history_dump()
 
     def _stop_agents(self):
         self._rally_agents(lambda agent: agent.stop())
 
+    def _close_agents(self):
+        self._rally_agents(lambda agent: agent.close())
+
     def _notify_agents(self, move):
         self._rally_agents(lambda agent: agent.apply_move(move))
 
@@ -370,9 +495,9 @@ class App:
             return
 
         try:
-            starting_layout_str, game_history_str = json.loads(file_buffer)
+            starting_layout_str, game_history_str, *checkpoints_data = json.loads(file_buffer)
             starting_layout = BoardLayout[starting_layout_str]
-            game_history = GameHistory.decode(game_history_str)
+            game_history = GameHistory.decode(game_history_str, *checkpoints_data)
             self._load_game_state(starting_layout, game_history)
             Debug.log("Previous data dump loaded successfully", DebugType.Game)
         except Exception:
@@ -382,7 +507,8 @@ class App:
     def _write_history_dump(self):
         starting_layout = self._model.config.layout.name
         game_history = self._model.history
-        file_buffer = json.dumps([starting_layout, str(game_history)], separators=(",", ":"))
+        file_buffer = json.dumps([starting_layout, str(game_history), game_history.encode_checkpoints()],
+                                 separators=(",", ":"))
         with open(DEBUG_FILEPATH, mode="w", encoding="utf-8") as file:
             file.write(file_buffer)
 
@@ -16,5 +16,6 @@ BOARD_HEIGHT = BOARD_CELL_SIZE * BOARD_MAX_COLS * 7 / 8
 DEBUG = True
 DEBUG_LOADS_ON_START = DEBUG
 DEBUG_FILEPATH = "debug.json"
+OPENING_BOOK_PATH = "books/opening.abk"
 
 DEFAULT_THEME = ThemeLibrary.DEFAULT
@@ -3,6 +3,8 @@ from enum import Enum
 from agent.default.agent import DefaultAgent
 from agent.brandon.agent import BrandonAgent
 from agent.brandon.agent_ponder import BrandonPonderer
+from agent.ponderer import PonderingAgent
+from agent.remote import RemoteAgent, RemotePonderingAgent
 
 
 class AgentType(Enum):
@@ -10,12 +12,19 @@ class AgentType(Enum):
     BRANDON = "2-ply negascout"
     BRANDON_PONDERER = "Ponderer"
 
-    def create(self):
+    def create(self, out_of_process: bool = False):
         """
         Creates an agent from the given enum.
+        :param out_of_process: whether to run the agent in a worker process
         """
-        return {
+        agent_class = {
             AgentType.DEFAULT: DefaultAgent,
             AgentType.BRANDON: BrandonAgent,
             AgentType.BRANDON_PONDERER: BrandonPonderer,
-        }[self]()
+        }[self]
+
+        if not out_of_process:
+            return agent_class()
+        if issubclass(agent_class, PonderingAgent):
+            return RemotePonderingAgent(agent_class)
+        return RemoteAgent(agent_class)
@@ -1,11 +1,16 @@
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
+from agent.profiler import PROFILE_ENV_VAR
 from core.board_layout import BoardLayout
 from core.color import Color
 from core.player_type import PlayerType
 from ui.model.heuristic_type import HeuristicType
 from ui.model.agent_type import AgentType
 from ui.view.colors.themes import Theme
-from ui.constants import DEFAULT_THEME
+from ui.constants import DEFAULT_THEME, OPENING_BOOK_PATH
+
+ARCHIVE_ENV_VAR = "ABALONE_ARCHIVE"
+POSITION_DB_ENV_VAR = "ABALONE_POSITION_DB"
 
 
 @dataclass
@@ -25,6 +30,13 @@ class Config:
     agent_type_p1: AgentType = AgentType.BRANDON
     agent_type_p2: AgentType = AgentType.BRANDON_PONDERER
     theme: Theme = DEFAULT_THEME
+    profile_dir: str = field(default_factory=lambda: os.environ.get(PROFILE_ENV_VAR))
+    archive_dir: str = field(default_factory=lambda: os.environ.get(ARCHIVE_ENV_VAR))
+    position_db_path: str = field(default_factory=lambda: os.environ.get(POSITION_DB_ENV_VAR))
+    opening_book_path: str = OPENING_BOOK_PATH
+    symmetric_hashing: bool = False
+    batch_leaves: bool = False
+    agent_processes: bool = False
 
     @classmethod
     def from_default(cls):
@@ -2,10 +2,54 @@
 Generic interface for game history.
 """
 
+from __future__ import annotations
+
 import json
+from dataclasses import dataclass
+from agent.zobrist import Zobrist
+from core.board import Board
 from core.color import Color
 from core.move import Move
 
+# the number of plies between board checkpoints
+CHECKPOINT_INTERVAL = 8
+
+
+@dataclass(frozen=True)
+class GameCheckpoint:
+    """
+    A snapshot of the game board after a ply: its cells, one byte each in storage order,
+    and its Zobrist hash.
+    """
+    ply: int
+    cells: bytes
+    board_hash: int
+
+    @staticmethod
+    def create(ply: int, board: Board) -> GameCheckpoint:
+        return GameCheckpoint(ply, bytes(board.to_flat_array()), Zobrist.create_board_hash(board))
+
+    @staticmethod
+    def decode(checkpoint_data: list) -> GameCheckpoint:
+        ply, cells, board_hash = checkpoint_data
+        return GameCheckpoint(ply, bytes.fromhex(cells), board_hash)
+
+    def encode(self) -> list:
+        return [self.ply, self.cells.hex(), self.board_hash]
+
+    def restore(self, layout: list[list[int]]) -> Board:
+        """
+        Restores the checkpointed board.
+        Raises ValueError if the restored board does not match the checkpoint's hash.
+        :param layout: the starting layout of the game, as BoardLayout values
+        :return: a Board
+        """
+        board = Board.create_from_data(layout)
+        board.set_flat_array(self.cells)
+        if Zobrist.create_board_hash(board) != self.board_hash:
+            raise ValueError(f"checkpoint at ply {self.ply} is corrupted")
+        return board
+
 
 class GameHistoryItem:
     """
@@ -40,12 +84,18 @@ class GameHistory:
     - Total aggregate time for a given player may be determined via the
     summation of all `time_end` - `time_start` deltas
     - "Time-travel" undo logic may be achieved by reconstructing the game board
-    using all moves within history[:-1] starting from the starting layout
-    (i.e. the more space-efficient implementation)
+    from the nearest board checkpoint, stored every CHECKPOINT_INTERVAL plies,
+    and replaying the few moves after it
     """
 
     @staticmethod
-    def decode(history_str):
+    def decode(history_str, checkpoints_data=None):
+        """
+        Decodes a history and its checkpoints.
+        :param history_str: a str from `str(history)`
+        :param checkpoints_data: a list from `encode_checkpoints`, if any
+        :return: a GameHistory
+        """
         history_items = []
         history_data = json.loads(history_str)
 
@@ -53,12 +103,27 @@ class GameHistory:
             history_item_data[-1] = Move.decode(history_item_data[-1])
             history_items.append(GameHistoryItem(*history_item_data))
 
-        return GameHistory(history_items)
+        checkpoints = [GameCheckpoint.decode(checkpoint_data) for checkpoint_data in checkpoints_data or []]
+        return GameHistory(history_items, checkpoints)
 
-    def __init__(self, history=None):
+    def __init__(self, history=None, checkpoints=None):
+        """
+        :param history: a list of GameHistoryItems
+        :param checkpoints: a list of GameCheckpoints of the history, ordered by ply
+        """
         # Initial history items get the initial time to subtract from
         # and calculates time taken for the first move for each player.
-        self._history = history or []
+        self._history = []
+        # undone items, the next to redo last
+        self._redo_items = []
+        # per-player prefix sums of time taken, where [k] is the total of the first k moves,
+        # and each move's rendered history row, in order
+        self._player_total_times = {Color.BLACK: [0], Color.WHITE: [0]}
+        self._player_history_rows = {Color.BLACK: [], Color.WHITE: []}
+        for item in history or []:
+            self._push(item)
+        self._checkpoints = [checkpoint for checkpoint in checkpoints or []
+                             if 0 < checkpoint.ply <= len(self._history)]
 
     def __getitem__(self, index) -> GameHistoryItem:
         """
@@ -78,20 +143,136 @@ class GameHistory:
     def __str__(self):
         return f"[{','.join(map(str, self._history))}]"
 
-    def append(self, item):
+    def append(self, item, board: Board = None):
         """
-        Appends an item to the history stack.
+        Appends an item to the history stack, discarding any undone items.
         :param item: a HistoryItem
+        :param board: the Board after the item's move, checkpointed if the ply is due for a checkpoint
         :return: None
         """
-        self._history.append(item)
+        self._push(item)
+        self._clear_redo_items()
+        if board is not None:
+            self._add_checkpoint(len(self._history), board)
 
     def pop(self):
         """
-        Pops an item off the history stack.
+        Pops an item off the history stack, discarding any undone items.
         :return: a HistoryItem
         """
-        return self._history.pop()
+        item = self._pop_item()
+        self._clear_redo_items()
+        return item
+
+    def undo(self, ply: int):
+        """
+        Undoes the items after a ply, keeping them and their checkpoints to redo.
+        :param ply: the number of items to keep
+        """
+        while len(self._history) > ply:
+            self._redo_items.append(self._pop_item())
+
+    def redo(self) -> GameHistoryItem:
+        """
+        Redoes the next undone item.
+        :return: the GameHistoryItem redone, else None
+        """
+        if not self._redo_items:
+            return None
+        item = self._redo_items.pop()
+        self._push(item)
+        return item
+
+    def get_redo_item(self) -> GameHistoryItem:
+        """
+        Gets the next undone item.
+        :return: a GameHistoryItem, else None
+        """
+        return self._redo_items[-1] if self._redo_items else None
+
+    @property
+    def num_redo_items(self) -> int:
+        return len(self._redo_items)
+
+    def _push(self, item: GameHistoryItem):
+        """
+        Pushes an item onto the history stack, extending its player's time totals and history rows.
+        """
+        player = self.infer_player_turn()
+        total_times = self._player_total_times[player]
+        total_before = total_times[-1]
+        total_after = total_before + item.get_time_taken()
+        total_times.append(total_after)
+
+        history_rows = self._player_history_rows[player]
+        history_rows.append(f"{len(history_rows) + 1}. {item.move}\n"
+                            f"{total_before:.2f} >> {total_after:.2f}\n"
+                            f"{item.get_time_taken():.2f}\n\n")
+        self._history.append(item)
+
+    def _pop_item(self) -> GameHistoryItem:
+        """
+        Pops an item off the history stack, trimming its player's time totals and history rows.
+        """
+        item = self._history.pop()
+        player = self.infer_player_turn()
+        self._player_total_times[player].pop()
+        self._player_history_rows[player].pop()
+        return item
+
+    def _clear_redo_items(self):
+        self._redo_items.clear()
+        num_plies = len(self._history)
+        while self._checkpoints and self._checkpoints[-1].ply > num_plies:
+            self._checkpoints.pop()
+
+    def _add_checkpoint(self, ply: int, board: Board):
+        """
+        Checkpoints the board after a ply if the ply is due for a checkpoint and is past the last one.
+        """
+        if ply % CHECKPOINT_INTERVAL or self._checkpoints and self._checkpoints[-1].ply >= ply:
+            return
+        self._checkpoints.append(GameCheckpoint.create(ply, board))
+
+    def find_checkpoint(self, ply: int) -> GameCheckpoint:
+        """
+        Finds the last checkpoint at or before a ply.
+        :param ply: an int
+        :return: a GameCheckpoint, else None
+        """
+        index = min(ply // CHECKPOINT_INTERVAL, len(self._checkpoints)) - 1
+        while index >= 0 and self._checkpoints[index].ply > ply:
+            index -= 1
+        return self._checkpoints[index] if index >= 0 else None
+
+    def restore_board(self, layout: list[list[int]], ply: int = None) -> Board:
+        """
+        Reconstructs the board after a ply from the nearest checkpoint, replaying the moves after it
+        and checkpointing the plies it replays past the last checkpoint.
+        :param layout: the starting layout of the game, as BoardLayout values
+        :param ply: the number of moves to apply, else the length of the history
+        :return: a Board
+        """
+        ply = len(self._history) if ply is None else ply
+        checkpoint = self.find_checkpoint(ply)
+        try:
+            board = checkpoint.restore(layout) if checkpoint else Board.create_from_data(layout)
+        except ValueError:
+            # drop the corrupted checkpoint and those after it, which the replay restores
+            del self._checkpoints[self._checkpoints.index(checkpoint):]
+            return self.restore_board(layout, ply)
+
+        for index in range(checkpoint.ply if checkpoint else 0, ply):
+            board.apply_move(self._history[index].move)
+            self._add_checkpoint(index + 1, board)
+        return board
+
+    def encode_checkpoints(self) -> list:
+        """
+        Encodes the checkpoints for `decode`.
+        :return: a JSON-serializable list
+        """
+        return [checkpoint.encode() for checkpoint in self._checkpoints]
 
     def infer_player_turn(self) -> Color:
         return Color.BLACK if len(self._history) % 2 == 0 else Color.WHITE
@@ -102,37 +283,34 @@ class GameHistory:
         else:
             return self._history[1::2]
 
+    def get_player_move_count(self, player: Color) -> int:
+        """
+        Gets the number of moves a player has made.
+        :return: an int
+        """
+        return len(self._player_history_rows[player])
+
     def get_player_total_time(self, player: Color, offset: int = 0):
         """
-        Gets the total time for a player.
+        Gets the total time for a player, excluding their last `offset` moves.
         """
-        history = self.get_player_history(player)
-        total_time = 0
-        for i in range(0, len(history) - offset):
-            total_time += history[i].get_time_taken()
+        total_times = self._player_total_times[player]
+        return total_times[max(len(total_times) - 1 - offset, 0)]
 
-        return total_time
+    def get_player_history_rows(self, player: Color) -> list[str]:
+        """
+        Gets the rendered history row of each of a player's moves, oldest first.
+        A row is the same str object for as long as its move stays in the history.
+        :return: a list of Strings
+        """
+        return self._player_history_rows[player]
 
     def get_player_history_string(self, player: Color):
         """
-        Gets a string of complete player history.
+        Gets a string of complete player history, newest move first.
         :return: a String
         """
-        history = self.get_player_history(player)
-        history_string = ""
-        for i in range(0, len(history)):
-            history_item = history[len(history) - i - 1]
-            history_string += \
-                F"{len(history) - i}. {history_item.move}"  \
-                + "\n" \
-                + self.get_player_total_time_string(player, i + 1) \
-                + " >> " \
-                + self.get_player_total_time_string(player, i) \
-                + "\n" \
-                + F"{(history_item.get_time_taken()):.2f}" \
-                + "\n\n"
-
-        return history_string
+        return "".join(reversed(self._player_history_rows[player]))
 
     def get_player_total_time_string(self, player: Color, offset: int = 0):
         """
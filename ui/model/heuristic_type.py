@@ -3,16 +3,56 @@ from __future__ import annotations
 from enum import Enum
 from numbers import Number
 
+from agent.heuristics.batch import evaluate_batch
+from agent.heuristics.features import Feature, compile_evaluator, compile_scheduled_evaluator
 from agent.heuristics.heuristic_jonathan import Heuristic
 from agent.heuristics.heuristic_brandon import (
-    heuristic_offensive as heuristic_brandon_offensive,
-    heuristic_defensive as heuristic_brandon_defensive,
+    WEIGHTS_OFFENSIVE as BRANDON_WEIGHTS_OFFENSIVE,
+    WEIGHTS_DEFENSIVE as BRANDON_WEIGHTS_DEFENSIVE,
+    feature_weights as brandon_feature_weights,
 )
 
 from core.board import Board
 from core.color import Color
 
 
+def _normalized_weights(score, score_opponent, manhattan, manhattan_opponent, adjacency, adjacency_opponent):
+    """
+    Maps the weights of the normalized Jonathan heuristics onto normalized features.
+    """
+    return {
+        Feature.SCORE_NORMALIZED: score,
+        Feature.SCORE_OPPONENT_NORMALIZED: score_opponent,
+        Feature.MANHATTAN_NORMALIZED: manhattan,
+        Feature.MANHATTAN_OPPONENT_NORMALIZED: manhattan_opponent,
+        Feature.ADJACENCY_NORMALIZED: adjacency,
+        Feature.ADJACENCY_OPPONENT_NORMALIZED: adjacency_opponent,
+    }
+
+
+WEIGHTS_WEIGHTED = {
+    Feature.SCORE: Heuristic.WEIGHT_SCORE,
+    Feature.SCORE_OPPONENT: Heuristic.WEIGHT_OPPONENT_SCORE,
+    Feature.MANHATTAN: Heuristic.WEIGHT_MANHATTAN,
+    Feature.MANHATTAN_OPPONENT: Heuristic.WEIGHT_OPPONENT_MANHATTAN,
+    Feature.ADJACENCY: Heuristic.WEIGHT_ADJACENCY,
+    Feature.ADJACENCY_OPPONENT: Heuristic.WEIGHT_OPPONENT_ADJACENCY,
+}
+
+WEIGHTS_WEIGHTED_NORMALIZED = _normalized_weights(
+    Heuristic.WEIGHT_NORMALIZED_SCORE,
+    Heuristic.WEIGHT_NORMALIZED_OPPONENT_SCORE,
+    Heuristic.WEIGHT_NORMALIZED_MANHATTAN,
+    Heuristic.WEIGHT_NORMALIZED_OPPONENT_MANHATTAN,
+    Heuristic.WEIGHT_NORMALIZED_ADJACENCY,
+    Heuristic.WEIGHT_NORMALIZED_OPPONENT_ADJACENCY,
+)
+
+# dynamic weights are precomputed for every clamped turn count
+WEIGHTS_DYNAMIC = [_normalized_weights(*Heuristic.get_dynamic_weights(turn_count))
+                   for turn_count in range(Heuristic.DYNAMIC_TURN_MAX + 1)]
+
+
 class HeuristicType(Enum):
     WEIGHTED_NORMALIZED = "Weighted Normalized"
     WEIGHTED = "Weighted"
@@ -21,10 +61,37 @@ class HeuristicType(Enum):
     BRANDON_DEFENSIVE = "Defensive Brandon"
 
     def call(self, board: Board, player: Color) -> Number:
-        return {
-            HeuristicType.WEIGHTED_NORMALIZED: lambda: Heuristic.weighted_normalized(board, player),
-            HeuristicType.WEIGHTED: lambda: Heuristic.weighted(board, player),
-            HeuristicType.DYNAMIC: lambda: Heuristic.dynamic(board, player),
-            HeuristicType.BRANDON_OFFENSIVE: lambda: heuristic_brandon_offensive(board, player),
-            HeuristicType.BRANDON_DEFENSIVE: lambda: heuristic_brandon_defensive(board, player),
-        }[self]()
+        return _EVALUATORS[self](board, player)
+
+    def get_weights(self) -> dict[Feature, Number]:
+        """
+        Gets the feature weights currently used by this heuristic.
+        :return: a dict mapping features to weights
+        """
+        if self is HeuristicType.DYNAMIC:
+            return WEIGHTS_DYNAMIC[int(Heuristic.get_turn_count())]
+        return _WEIGHTS[self]
+
+    def call_batch(self, encoded, player: Color, layout: Board):
+        """
+        Evaluates many boards at once, per `batch.evaluate_batch`.
+        :param encoded: an (N, 61) int8 array of boards encoded by `batch.encode_boards`
+        :param player: the Color to evaluate for
+        :param layout: a Board sharing the starting layout of the encoded boards
+        :return: an (N,) array of heuristic values
+        """
+        return evaluate_batch(encoded, player, layout, self.get_weights())
+
+
+_WEIGHTS = {
+    HeuristicType.WEIGHTED_NORMALIZED: WEIGHTS_WEIGHTED_NORMALIZED,
+    HeuristicType.WEIGHTED: WEIGHTS_WEIGHTED,
+    HeuristicType.BRANDON_OFFENSIVE: brandon_feature_weights(BRANDON_WEIGHTS_OFFENSIVE),
+    HeuristicType.BRANDON_DEFENSIVE: brandon_feature_weights(BRANDON_WEIGHTS_DEFENSIVE),
+}
+
+_EVALUATORS = {
+    **{heuristic_type: compile_evaluator(weights) for heuristic_type, weights in _WEIGHTS.items()},
+    HeuristicType.DYNAMIC: compile_scheduled_evaluator(WEIGHTS_DYNAMIC,
+                                                       lambda: int(Heuristic.get_turn_count())),
+}
@@ -8,7 +8,6 @@ import time
 from dataclasses import dataclass, field
 from lib.interval_timer import IntervalTimer
 from agent.state_generator import StateGenerator
-from core.board import Board
 from core.color import Color
 from core.constants import WIN_SCORE
 from core.game import Game
@@ -77,7 +76,7 @@ class Model:
         Gets the turn count for a player.
         :return: the turn count
         """
-        return len(self.history.get_player_history(player))
+        return self.history.get_player_move_count(player)
 
     def select_cell(self, cell: Hex):
         """
@@ -129,26 +128,42 @@ class Model:
         return None  # consistency
 
     def undo(self) -> GameHistoryItem:
-        layout = self.game.board.layout
-
-        new_board = Board.create_from_data(layout)
-        new_history = GameHistory()
-
-        for item in self.history[:-2]:
-            new_board.apply_move(item.move)
-            new_history.append(GameHistoryItem(item.time_start, item.time_end, item.paused_duration, item.move))
-
+        """
+        Undoes the last two moves, to be followed by reapplying the first of them.
+        :return: the GameHistoryItem to reapply, else None
+        """
         if len(self.history) > 1:
             next_item = self.history[-2]
         else:
             next_item = None
 
-        self.game.set_board(new_board)
-        self.history = new_history
+        self.jump_to_ply(max(len(self.history) - 2, 0))
+        return next_item
 
-        self.game.set_turn(self.history.infer_player_turn())
+    def redo(self) -> GameHistoryItem:
+        """
+        Redoes the next undone move.
+        :return: the GameHistoryItem redone, else None
+        """
+        item = self.history.redo()
+        if item:
+            self.game.apply_move(item.move)
+        return item
 
-        return next_item
+    def jump_to_ply(self, ply: int):
+        """
+        Moves the game to a ply, undoing moves to move back or redoing undone moves to move forward.
+        The board is restored from the nearest checkpoint, so a jump replays a bounded number of moves.
+        :param ply: the number of moves to have been played, clamped to the moves available
+        """
+        if ply < len(self.history):
+            self.history.undo(max(ply, 0))
+        else:
+            while len(self.history) < ply and self.history.redo():
+                pass
+
+        self.game.set_board(self.history.restore_board(self.game.board.layout))
+        self.game.set_turn(self.history.infer_player_turn())
 
     def load_game_state(self, starting_layout: BoardLayout, game_history: GameHistory):
         """
@@ -156,9 +171,7 @@ class Model:
         :param starting_layout: a BoardLayout
         :param game_history: a GameHistory
         """
-        board = Board.create_from_data(starting_layout.value)
-        for item in game_history:
-            board.apply_move(item.move)
+        board = game_history.restore_board(starting_layout.value)
 
         self.game.set_board(board)
         self.game.set_turn(game_history.infer_player_turn())
@@ -201,16 +214,26 @@ class Model:
         """
         self.config = config
 
-    def apply_move(self, move: Move):
+    def apply_move(self, move: Move, redo: bool = False):
         """
         Applies the given move to the game board.
+        Any other move discards the undone moves, even one that repeats the next of them.
         :param move: the move to apply
+        :param redo: whether the move replays the next undone move, keeping its timings and checkpoint
         """
         self.selection = None
 
         self.stop_timer()
         self.game.apply_move(move)
-        self.history.append(GameHistoryItem(self.move_start_time, time.time(), self.move_paused_duration, move))
+
+        redo_item = self.history.get_redo_item() if redo else None
+        if (redo_item and redo_item.move.selection == move.selection
+                and redo_item.move.direction == move.direction):
+            self.history.redo()
+            return
+
+        self.history.append(GameHistoryItem(self.move_start_time, time.time(), self.move_paused_duration, move),
+                            board=self.game_board)
 
     def next_turn(self, on_timer: callable, on_timeout: callable, on_game_end: callable):
         """
@@ -15,6 +15,9 @@ from ui.view.colors.transform import lighten_color, darken_color
 from ui.view.colors.themes import ThemeLibrary, ThemeColor
 from ui.view.marble import render_marble
 
+# the number of text lines of a history row from `GameHistory.get_player_history_rows`
+HISTORY_ROW_LINES = 4
+
 
 class GameUI:
     """
@@ -61,6 +64,7 @@ class GameUI:
         self._theme = constants.DEFAULT_THEME
         self._history_1 = ""
         self._history_2 = ""
+        self._rendered_history_rows = {}
         self._cached_turn_indicators = {}
         self._cached_score_headings = {}
         self._cached_canvas = None
@@ -102,13 +106,39 @@ class GameUI:
         self._score_2.set(str(model.game_board.get_score(Color.WHITE)))
         self._move_count_1.set(str(model.get_turn_count(Color.BLACK)))
         self._move_count_2.set(str(model.get_turn_count(Color.WHITE)))
-        self._history_1.delete(1.0, tkinter.END)
-        self._history_2.delete(1.0, tkinter.END)
-        self._history_1.insert(tkinter.INSERT, model.history.get_player_history_string(Color.BLACK))
-        self._history_2.insert(tkinter.INSERT, model.history.get_player_history_string(Color.WHITE))
+        self._render_history(self._history_1, Color.BLACK, model.history.get_player_history_rows(Color.BLACK))
+        self._render_history(self._history_2, Color.WHITE, model.history.get_player_history_rows(Color.WHITE))
 
         self._update_turn_indicators(model)
 
+    def _render_history(self, history_text, player, history_rows):
+        """
+        Updates a player's history panel with the rows that changed since it was last rendered.
+        Rows are shown newest first, so moves undone are deleted from the top and new moves inserted there.
+        :param history_text: the player's ScrolledText
+        :param player: the player's Color
+        :param history_rows: the player's history rows, oldest first
+        :return: None
+        """
+        rendered_rows = self._rendered_history_rows.setdefault(player, [])
+
+        # a row object is only shared while it and the rows before it stay in the history,
+        # so the kept rows are found by scanning back from the last possible shared row
+        num_kept = min(len(rendered_rows), len(history_rows))
+        while num_kept and rendered_rows[num_kept - 1] is not history_rows[num_kept - 1]:
+            num_kept -= 1
+
+        if num_kept == len(rendered_rows) == len(history_rows):
+            return
+
+        num_removed = len(rendered_rows) - num_kept
+        if num_removed:
+            history_text.delete("1.0", f"{num_removed * HISTORY_ROW_LINES + 1}.0")
+            del rendered_rows[num_kept:]
+        new_rows = history_rows[num_kept:]
+        history_text.insert("1.0", "".join(reversed(new_rows)))
+        rendered_rows.extend(new_rows)
+
     def _find_color_by_marble(self, marble):
         color = lighten_color(self._theme.get_color_by_key(marble))
 
@@ -160,6 +190,7 @@ class GameUI:
                                  height=15,
                                  font=self.FONT_HISTORY
                                  )
+        self._rendered_history_rows[Color.BLACK] = []
         self._history_1.grid(column=0, pady=(20, 20), padx=10)
 
     def _mount_history_2(self, parent):
@@ -179,6 +210,7 @@ class GameUI:
                                  height=15,
                                  font=self.FONT_HISTORY
                                  )
+        self._rendered_history_rows[Color.WHITE] = []
         self._history_2.grid(column=0, pady=(20, 20), padx=10)
 
     def _mount_buttonbar(self, parent, on_click_undo, on_click_pause, on_click_stop, on_click_reset, on_click_settings):
@@ -2,12 +2,19 @@
 Defines the view for the application.
 """
 
-from tkinter import Tk
+from tkinter import Tk, TclError
+from threading import Event, Thread
+from time import perf_counter
 from ui.view.game import GameUI
 from ui.view.settings import SettingsUI
-from ui.constants import APP_NAME
+from ui.constants import APP_NAME, FPS
+from lib.frame_stats import FrameStats
 from datetime import timedelta
 
+# the virtual event that wakes the Tk loop from other threads
+WAKE_EVENT = "<<Wake>>"
+FRAME_INTERVAL = 1 / FPS
+
 
 class View:
     """
@@ -22,6 +29,13 @@ class View:
         self._done = False
         self._game_view = GameUI()
         self._settings_view = None
+        self._on_wake = None
+        self._wake_event = Event()
+        self._wake_time = None
+        self._frame_job = None
+        self._frame_time = None
+        self.frame_stats = FrameStats()
+        self.wake_stats = FrameStats()
 
     @property
     def window(self):
@@ -71,7 +85,8 @@ class View:
         self._window.configure(background=GameUI.COLOR_BACKGROUND_PRIMARY)
         self._window.protocol("WM_DELETE_WINDOW", lambda: (
             on_exit(),
-            setattr(self, "_done", True)
+            setattr(self, "_done", True),
+            self._window.quit(),
         ))
 
         self._game_view.mount(self._window,
@@ -82,13 +97,88 @@ class View:
             **kwargs
         )
 
-    def update(self):
+    def run(self, on_wake: callable):
         """
-        Performs per-frame view updates.
+        Runs the Tk loop until the window is closed.
+        Animation frames are ticked only while the board animates, and `on_wake` is called
+        on the Tk thread after each `wake`.
+        :param on_wake: the callable for handling wakes
         :return: None
         """
-        self._window.update()
+        self._on_wake = on_wake
+        self._window.bind(WAKE_EVENT, lambda _: self._handle_wake())
+        if self._window.tk.call("info", "exists", "tcl_platform(threaded)"):
+            Thread(target=self._run_waker, daemon=True).start()
+        else:
+            # unthreaded Tk can only be called from its own thread, so wakes are polled each frame instead
+            self._poll_wakes()
+
+        self._window.mainloop()
+        self._done = True
+        self._wake_event.set()
+        self._window.destroy()
+
+    def wake(self):
+        """
+        Wakes the Tk loop to call `on_wake`. Safe to call from any thread; wakes requested
+        before the loop gets to them coalesce into one.
+        :return: None
+        """
+        if self._wake_time is None:
+            self._wake_time = perf_counter()
+        self._wake_event.set()
+
+    def _run_waker(self):
+        """
+        Posts a wake event to the Tk loop for each wake, from a thread of its own, so that
+        the threads waking the loop never wait on the Tk thread.
+        """
+        while True:
+            self._wake_event.wait()
+            if self._done:
+                break
+            self._wake_event.clear()
+            try:
+                self._window.event_generate(WAKE_EVENT, when="tail")
+            except (TclError, RuntimeError):
+                break
+
+    def _poll_wakes(self):
+        if self._wake_event.is_set():
+            self._wake_event.clear()
+            self._handle_wake()
+        self._window.after(round(FRAME_INTERVAL * 1000), self._poll_wakes)
+
+    def _handle_wake(self):
+        wake_time, self._wake_time = self._wake_time, None
+        self._on_wake and self._on_wake()
+        if wake_time is not None:
+            self.wake_stats.record(perf_counter() - wake_time)
+
+    def _request_frame(self):
+        """
+        Schedules animation frames, unless they are already running.
+        """
+        if self._frame_job is None:
+            self._frame_time = None
+            self._frame_job = self._window.after_idle(self._update_frame)
+
+    def _update_frame(self):
+        """
+        Ticks the board animations by one frame, scheduling the next while any remain.
+        """
+        time_start = perf_counter()
+        if self._frame_time is not None:
+            self.frame_stats.record(time_start - self._frame_time)
+        self._frame_time = time_start
+
         self._game_view.update()
+        if not self._game_view.animating:
+            self._frame_job = None
+            return
+        time_taken = perf_counter() - time_start
+        self._frame_job = self._window.after(max(round((FRAME_INTERVAL - time_taken) * 1000), 1),
+                                             self._update_frame)
 
     def update_timer(self, time: timedelta):
         """
@@ -120,6 +210,7 @@ class View:
         :return: None
         """
         self._game_view.apply_move(*args, **kwargs)
+        self._request_frame()
 
     def apply_config(self, config):
         """